@@ -0,0 +1,15 @@
+#!/usr/bin/env python3
+"""Remind about notes that are due (reads the due index in aio.db, never the notes folder)
+Hub: a hub add due 8:00 python ~/projects/a/agents/due.py --send   (window arg: 0d=today+overdue, 2d, 1w)"""
+import os,sys
+from base import send, save
+R=os.path.dirname(os.path.dirname(os.path.abspath(__file__)));sys.path[:0]=[os.path.join(R,'lib'),R]
+from lib import note
+
+w=next((a for a in sys.argv[1:] if not a.startswith('-')),'0d')
+due=note._due(w,unsent=True)  # only notes not reminded about yet (per Due date)
+if not due: print("nothing due"); sys.exit()
+msg="\n".join(f"{d}  {t}"+(f" @{p}" if p else "") for _,t,d,p,*_ in due)
+print(msg)
+save("due",msg)
+if "--send" in sys.argv: send(f"{len(due)} note{'s'*(len(due)>1)} due",msg); note._mark_sent(due)  # send raises on failure: remind again next run
@@ -1,28 +1,30 @@
-"""aio hub - Scheduled jobs (RFC 5322 .txt storage)"""
+"""aio hub - Scheduled jobs (event log in agents/events, see events.py; legacy RFC 5322 .txt jobs still read)"""
 import sys, os, subprocess as sp, shutil, re
 from pathlib import Path
 
 # Add lib/ to path for imports
 _SDIR = str(Path(__file__).resolve().parent.parent / 'lib')
 if _SDIR not in sys.path: sys.path.insert(0, _SDIR)
-from _common import init_db, load_proj, load_apps, db, DEVICE_ID as DI, DATA_DIR, SYNC_ROOT, alog
+from _common import init_db, load_proj, load_apps, db, DEVICE_ID as DI, DATA_DIR, SYNC_ROOT, alog, records
 from sync import sync
+import events
 
 AIO_PY = str(Path(__file__).resolve().parent.parent / 'lib' / 'a.py')
 HUB_DIR = SYNC_ROOT / 'agents'
 
 def _save_job(name, schedule, prompt, device, enabled=True, last_run=None):
-    HUB_DIR.mkdir(parents=True, exist_ok=True)
-    (HUB_DIR/f'{name}.txt').write_text(f"Name: {name}\nSchedule: {schedule}\nPrompt: {prompt}\nDevice: {device}\nEnabled: {enabled}\n"+(f"Last-Run: {last_run}\n" if last_run else ""))
+    events.emit(HUB_DIR, 'add', name, schedule=schedule, prompt=prompt, device=device, enabled=enabled, last_run=last_run)
+    (HUB_DIR/f'{name}.txt').unlink(missing_ok=True)  # legacy whole-file job, now superseded by events
 def _load_jobs():
-    HUB_DIR.mkdir(parents=True, exist_ok=True); jobs = []
-    for f in HUB_DIR.glob('*.txt'):
-        if '_20' in f.stem:
-            continue  # Skip conversation files (have _YYYYMMDD timestamp)
-        d = {k.strip(): v.strip() for line in f.read_text().splitlines() if ':' in line for k, v in [line.split(':', 1)]}
-        if 'Name' in d and 'Schedule' in d: jobs.append((0, d['Name'], d['Schedule'], d.get('Prompt',''), d.get('Device',DI), d.get('Enabled','true').lower()=='true', d.get('Last-Run')))
-    return jobs
-def _rm_job(name): (HUB_DIR/f'{name}.txt').unlink(missing_ok=True)
+    HUB_DIR.mkdir(parents=True, exist_ok=True); jobs = {}
+    for _, d in records(HUB_DIR, [e.path for e in os.scandir(HUB_DIR) if e.name.endswith('.txt') and '_20' not in e.name]):  # not conversation files (_YYYYMMDD)
+        if 'Name' in d and 'Schedule' in d: jobs[d['Name']] = {'schedule': d['Schedule'], 'prompt': d.get('Prompt',''), 'device': d.get('Device',DI), 'enabled': d.get('Enabled','true').lower()=='true', 'last_run': d.get('Last-Run')}
+    for n, e in events.load(HUB_DIR, dead=True).items():
+        if e.get('_rm'): jobs.pop(n, None)
+        else: jobs.setdefault(n, {}).update(e)
+    return [(0, n, j['schedule'], j.get('prompt',''), j.get('device',DI), j.get('enabled',True), j.get('last_run')) for n, j in sorted(jobs.items()) if 'schedule' in j]
+def _rm_job(name): (HUB_DIR/f'{name}.txt').unlink(missing_ok=True); events.emit(HUB_DIR, 'rm', name)
+def _ran_job(name, when): events.emit(HUB_DIR, 'update', name, last_run=when)
 
 def run():
     init_db()
@@ -117,6 +119,6 @@ def run():
             cmd = j[3].replace('aio ', f'{sys.executable} {AIO_PY} ').replace('python ', f'{sys.executable} ')
             print(f"Running {j[1]}...", flush=True); r = sp.run(cmd, shell=True, capture_output=True, text=True); out = r.stdout + r.stderr
             print(out) if out else None; open(LOG, 'a').write(f"\n[{datetime.now():%Y-%m-%d %I:%M:%S%p}] {j[1]}\n{out}")
-            _save_job(j[1], j[2], j[3], j[4], j[5], datetime.now().strftime('%Y-%m-%d %H:%M'))
+            _ran_job(j[1], datetime.now().strftime('%Y-%m-%d %H:%M'))
             snippet = out.strip().split('\n')[-1][:80] if out.strip() else ''
             alog(f"hub:{j[1]} \u2192 {snippet}" if snippet else f"hub:{j[1]}"); print(f"\u2713")
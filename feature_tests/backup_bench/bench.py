@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Incremental backup: chunked dedup snapshot (lib/backup.py) vs full tar|zstd archive
+
+Corpus: N small notes + a few MB-sized append-only logs. Round 1 backs up
+everything, round 2 runs after editing a few notes and appending to two logs.
+Reports time and bytes that would be uploaded per round, then restores the
+whole snapshot and checks it byte for byte against the source (.git excluded).
+The corpus also holds a live WAL-mode aio.db whose newest rows sit only in
+-wal: the restored db must have every row, and no -wal/-shm.
+"""
+import sys, os, time, shutil, random, sqlite3, subprocess as sp
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'lib'))
+import backup
+
+N, LOGS, LOG_MB, EDITS = int(os.getenv('N', 20000)), 8, 2, 10
+D = Path(os.getenv('TMPDIR', '/tmp')) / 'backup_bench'
+
+def corpus():
+    shutil.rmtree(D, ignore_errors=True); (D/'src'/'notes').mkdir(parents=True); (D/'src'/'logs').mkdir()
+    r = random.Random(1)
+    for i in range(N):
+        (D/'src'/'notes'/f'n{i}_20260101T000000.000000000.txt').write_text(f"Text: note {i} {r.random()}\nStatus: pending\nDevice: bench\n")
+    for i in range(LOGS):
+        (D/'src'/'logs'/f'dev__s{i}.log').write_bytes(b''.join(f'{j} {r.random()} tool output line\n'.encode() for j in range(LOG_MB * 25000)))
+    (D/'src'/'.git'/'objects').mkdir(parents=True); (D/'src'/'.git'/'objects'/'pack').write_bytes(os.urandom(1 << 20))  # must not be snapshotted
+    global db
+    db = sqlite3.connect(D/'src'/'aio.db'); db.execute('PRAGMA journal_mode=WAL'); db.execute('PRAGMA wal_autocheckpoint=0')
+    db.execute('CREATE TABLE t(x)'); db.executemany('INSERT INTO t VALUES (?)', [(i,) for i in range(1000)]); db.commit()
+
+def change():
+    r = random.Random(2)
+    for i in r.sample(range(N), EDITS):
+        (D/'src'/'notes'/f'n{i}_20260101T000000.000000000.txt').write_text(f"Text: edited {i}\nStatus: done\n")
+    for i in range(2):
+        with open(D/'src'/'logs'/f'dev__s{i}.log', 'ab') as f: f.write(b'appended session output\n' * 200)
+    db.executemany('INSERT INTO t VALUES (?)', [(i,) for i in range(500)]); db.commit()  # lands in -wal only
+
+def tar():
+    t = time.perf_counter()
+    n = len(sp.run(f'tar -cf - --exclude=./.git --exclude="*.db*" -C {D/"src"} . | zstd -q -T0', shell=True, capture_output=True).stdout)
+    return time.perf_counter() - t, n
+
+def snap():
+    t = time.perf_counter()
+    _, s = backup.snapshot({'src': D/'src'}, D/'store')
+    return time.perf_counter() - t, s['new_bytes'], s
+
+if __name__ == '__main__':
+    corpus()
+    print(f"corpus: {N} notes + {LOGS}x{LOG_MB}MB logs\n")
+    print(f"{'round':<14}{'tar.zst s':>10}{'tar.zst KB':>12}{'snap s':>9}{'snap KB':>10}  files read")
+    for name in ('full', 'incremental', 'unchanged'):
+        if name == 'incremental': change()
+        (tt, tb), (st, sb, s) = tar(), snap()
+        print(f"{name:<14}{tt:>10.2f}{tb // 1024:>12}{st:>9.2f}{sb // 1024:>10}  {s['read'] // 1024}K of {s['bytes'] // 1024}K")
+    t = time.perf_counter(); n = backup.restore('src/notes/n7_20260101T000000.000000000.txt', None, D/'one', D/'store')
+    print(f"\nrestore 1 file: {(time.perf_counter() - t) * 1000:.1f}ms ({n} file)")
+    t = time.perf_counter(); n = backup.restore('src', None, D/'out', D/'store')
+    src = {p.relative_to(D/'src') for p in (D/'src').rglob('*') if p.is_file() and '.git' not in p.parts and '.db' not in p.name}
+    out = {p.relative_to(D/'out'/'src') for p in (D/'out'/'src').rglob('*') if p.is_file() and '.db' not in p.name}
+    bad = [p for p in src & out if (D/'src'/p).read_bytes() != (D/'out'/'src'/p).read_bytes()]
+    side = sorted(p.name for p in (D/'out'/'src').glob('aio.db-*'))  # before opening it: sqlite makes its own
+    rows = [sqlite3.connect(f).execute('SELECT count(*) FROM t').fetchone()[0] for f in (D/'src'/'aio.db', D/'out'/'src'/'aio.db')]
+    print(f"restore all: {time.perf_counter() - t:.2f}s ({n} files), missing {len(src - out)}, extra {len(out - src)}, differ {len(bad)}; "
+          f"aio.db rows {rows[1]}/{rows[0]}, sidecars {side or 'none'}")
+    ok = src == out and not bad and rows[0] == rows[1] and not side
+    print("✓ restored bytes match source" if ok else "x restore does not match source")
+    shutil.rmtree(D, ignore_errors=True)
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""`a n due [window]`: parse-every-note scan vs the note_due index (note._due)
+
+Builds N notes over 12 month shards, 1 in 100 with a Due date from a week
+ago to two months out, then times the old way (read + parse every file, filter by Due)
+against the index: first call in a process, warm calls for a few windows,
+and the unsent lookup (what a hub job runs) after one due-date edit.
+"""
+import sys, os, time, shutil, random
+from datetime import datetime, timedelta
+from pathlib import Path
+ROOT = Path(__file__).resolve().parents[2]
+sys.path[:0] = [str(ROOT / 'lib'), str(ROOT)]
+import _common
+from _common import parse_kv
+
+N = int(os.getenv('N', 100000))
+D = Path(os.getenv('TMPDIR', '/tmp')) / 'note_due_bench'
+
+def build(d, n):
+    rnd, now = random.Random(0), datetime.now()
+    for m in range(12):
+        (d / f'2026-{m + 1:02d}').mkdir(parents=True)
+    for i in range(n):
+        due = f"Due: {now + timedelta(days=rnd.randint(-7, 60)):%Y-%m-%d}\n" if i % 100 == 0 else ''
+        (d / f'2026-{i % 12 + 1:02d}' / f'{i:08x}_20261001T120000.{i:09d}.txt').write_text(
+            f"Text: note {i}\nStatus: pending\nDevice: dev\nCreated: 2026-10-01 12:00\n{due}")
+    old = time.time() - 10
+    for s in d.iterdir(): os.utime(s, (old, old))
+
+def scan(d, until):
+    return sorted(kv['Due'] for f in _common.shard_files(d) if (kv := parse_kv(Path(f).read_text())).get('Due', '9') <= until)
+
+def ms(f, n=50):
+    ts = []
+    for _ in range(n):
+        t = time.perf_counter(); f(); ts.append((time.perf_counter() - t) * 1000)
+    return sorted(ts)[n // 2]
+
+if __name__ == '__main__':
+    shutil.rmtree(D, ignore_errors=True)
+    notes = D / 'notes'; build(notes, N)
+    _common.DB_PATH = str(D / 'aio.db')
+    from lib import note
+    note.NOTES_DIR, note._sync = notes, lambda **k: None
+    t = time.perf_counter(); note._due(); cold = (time.perf_counter() - t) * 1000
+    note._ix_c.close(); note._ix_c = None
+    t = time.perf_counter(); note._due(); first = (time.perf_counter() - t) * 1000
+    assert [n[2] for n in note._due('7d')] == scan(notes, note._horizon('7d'))
+    print(f"{N} notes, {N // 100} with Due  scan: {ms(lambda: scan(notes, note._horizon('7d')), 3):.0f}ms  index cold: {cold:.0f}ms  first call in a process: {first:.2f}ms\n")
+    print(f"{'window':<10}{'hits':>6}{'ms':>8}")
+    for w in ('today', '7d', '1m', 'all'):
+        print(f"{w:<10}{len(note._due(w)):>6}{ms(lambda: note._due(w)):>8.2f}")
+    note._mark_sent(note._due('0d', unsent=True))
+    n = note._due('1m')[-1]; note._update(n[7], due=f'{datetime.now():%Y-%m-%d}')
+    t = time.perf_counter(); r = note._due('0d', unsent=True); rem = (time.perf_counter() - t) * 1000
+    print(f"\nunsent after 1 due edit: {len(r)} new in {rem:.2f}ms")
+    shutil.rmtree(D, ignore_errors=True)
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""`a n ?query`: read-every-note substring scan vs the FTS5 index (note._search)
+
+Builds N notes over 12 month shards plus an event log, then times the old
+scan (read + parse every file, substring test), the index cold (first
+search builds it), and warm searches: word, prefix, phrase, field,
+boolean. Also a search after one new note and after one edit event, which
+re-index only that note.
+"""
+import sys, os, time, shutil, random, itertools
+from pathlib import Path
+ROOT = Path(__file__).resolve().parents[2]
+sys.path[:0] = [str(ROOT / 'lib'), str(ROOT)]
+import _common
+from _common import parse_kv
+
+N = int(os.getenv('N', 100000))
+D = Path(os.getenv('TMPDIR', '/tmp')) / 'note_search_bench'
+COMMON = 'fix add check call buy update review todo'.split()  # each in ~1/4 of notes
+
+def build(d, n):
+    rnd = random.Random(0)
+    vocab = [''.join(rnd.choice('abcdefghijklmnoprstu') for _ in range(rnd.randint(4, 9))) for _ in range(20000)]
+    for r, w in ((2000, 'dentist'), (500, 'garden'), (501, 'invoice'), (100, 'kernel'), (30, 'router'), (60, 'laptop')): vocab[r] = w
+    cum = list(itertools.accumulate(1 / (r + 1) for r in range(len(vocab))))
+    for m in range(12):
+        (d / f'2026-{m + 1:02d}').mkdir(parents=True)
+    for i in range(n):
+        t = ' '.join([rnd.choice(COMMON)] + rnd.choices(vocab, cum_weights=cum, k=5)) + f' n{i}'  # Zipf
+        p = f'Project: p{i % 7}\n' if i % 3 == 0 else ''
+        (d / f'2026-{i % 12 + 1:02d}' / f'{i:08x}_20261001T120000.{i:09d}.txt').write_text(
+            f"Text: {t}\nStatus: pending\nDevice: dev\nCreated: 2026-10-01 12:00\n{p}")
+    old = time.time() - 10
+    for s in d.iterdir(): os.utime(s, (old, old))  # past the racy-mtime window
+
+def scan(d, q):
+    return [kv for f in _common.shard_files(d) if q in f" {(kv := parse_kv(Path(f).read_text())).get('Text', '').lower()} "]
+
+def ms(f, n=20):
+    ts = []
+    for _ in range(n):
+        t = time.perf_counter(); f(); ts.append((time.perf_counter() - t) * 1000)
+    return sorted(ts)[n // 2]
+
+if __name__ == '__main__':
+    shutil.rmtree(D, ignore_errors=True)
+    notes = D / 'notes'; build(notes, N)
+    _common.DB_PATH = str(D / 'aio.db')
+    from lib import note
+    note.NOTES_DIR, note._sync = notes, lambda **k: None
+    t = time.perf_counter(); note._search('milk'); cold = (time.perf_counter() - t) * 1000
+    note._ix_c.close(); note._ix_c = None
+    t = time.perf_counter(); note._search('dentist'); first = (time.perf_counter() - t) * 1000
+    print(f"{N} notes  scan 'dentist': {ms(lambda: scan(notes, 'dentist'), 3):.1f}ms  index cold: {cold:.0f}ms  first search in a process: {first:.2f}ms\n")
+    assert sorted(n[1] for n in note._search('dentist')) == sorted(kv['Text'] for kv in scan(notes, ' dentist '))
+    print(f"{'query':<28}{'hits':>6}{'ms':>8}")
+    for q in ('dentist', 'dent', 'n4242', '"garden invoice"', 'project:p3 kernel', 'router NOT laptop', 'fix'):
+        print(f"{q:<28}{len(note._search(q)):>6}{ms(lambda: note._search(q)):>8.2f}")
+    note._save('dentist at nine')
+    new_d = note.shard(notes); os.utime(new_d, (time.time() - 10,) * 2)
+    t = time.perf_counter(); hit = note._search('nine'); add = (time.perf_counter() - t) * 1000
+    note._update(hit[0][7], text='dentist at ten')
+    t = time.perf_counter(); hit = note._search('ten'); upd = (time.perf_counter() - t) * 1000
+    print(f"\nafter 1 add: {add:.1f}ms  after 1 edit event: {upd:.1f}ms  ({hit[0][1]})")
+    shutil.rmtree(D, ignore_errors=True)
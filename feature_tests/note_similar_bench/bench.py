@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""`a n similar`: brute-force Jaccard over every note vs bm25 candidates from note_fts (note._similar)
+
+Builds N pending notes of 6-14 words drawn Zipf-style from a 20k-word vocabulary,
+and plants DUPS near-duplicates (one word swapped, one added). Times the save-time check
+(_dup) and `a n similar #` against comparing with every note, checks each planted
+pair is found, then times clustering the whole pending set (_clusters).
+"""
+import sys, os, time, shutil, random
+from pathlib import Path
+ROOT = Path(__file__).resolve().parents[2]
+sys.path[:0] = [str(ROOT / 'lib'), str(ROOT)]
+import _common
+
+N = int(os.getenv('N', 50000))
+DUPS = 100
+D = Path(os.getenv('TMPDIR', '/tmp')) / 'note_similar_bench'
+
+def corpus(n):
+    rnd = random.Random(0)
+    vocab = [''.join(rnd.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rnd.randint(3, 9))) for _ in range(20000)]
+    w = [1 / (r + 1) for r in range(len(vocab))]
+    out = [' '.join(rnd.choices(vocab, w, k=rnd.randint(6, 14))) for _ in range(n - DUPS)]
+    pairs = []
+    for k in range(DUPS):
+        i, ws = k * ((n - DUPS) // DUPS), out[k * ((n - DUPS) // DUPS)].split()
+        ws[rnd.randrange(len(ws))] = rnd.choice(vocab); ws.append(rnd.choice(vocab))
+        pairs.append((i, len(out))); out.append(' '.join(ws))
+    return out, pairs
+
+def build(d, texts):
+    for m in range(12):
+        (d / f'2026-{m + 1:02d}').mkdir(parents=True)
+    for i, t in enumerate(texts):
+        (d / f'2026-{i % 12 + 1:02d}' / f'{i:08x}_20261001T120000.{i:09d}.txt').write_text(
+            f"Text: {t}\nStatus: pending\nDevice: dev\nCreated: 2026-10-01 12:00\n")
+    old = time.time() - 10
+    for s in d.iterdir(): os.utime(s, (old, old))
+
+def ms(f, n=20):
+    ts = []
+    for _ in range(n):
+        t = time.perf_counter(); f(); ts.append((time.perf_counter() - t) * 1000)
+    return sorted(ts)[n // 2]
+
+if __name__ == '__main__':
+    shutil.rmtree(D, ignore_errors=True)
+    texts, pairs = corpus(N)
+    notes = D / 'notes'; build(notes, texts)
+    _common.DB_PATH = str(D / 'aio.db')
+    from lib import note
+    note.NOTES_DIR, note._sync = notes, lambda **k: None
+    t = time.perf_counter(); note._ix_refresh(note._ix_db()); cold = (time.perf_counter() - t) * 1000
+    pend = note._pending()
+    sets = [note._words(x) for x in texts]
+    brute = lambda s: max((note._jac(s, o), i) for i, o in enumerate(sets) if o is not s)
+    ids = {n[1]: n[0] for n in pend}
+    found = sum(any(m[1] == texts[j] for _, m in note._similar(texts[i], 3, skip=ids[texts[i]])) for i, j in pairs)
+    dup = sum(bool(note._dup(texts[j])) for _, j in pairs)
+    q = texts[pairs[0][1]]
+    print(f"{N} notes, {DUPS} planted near-duplicates  index build: {cold / 1000:.1f}s\n")
+    print(f"{'':<28}{'ms':>8}")
+    print(f"{'brute force Jaccard':<28}{ms(lambda: brute(sets[pairs[0][1]]), 3):>8.1f}")
+    print(f"{'_similar (a n similar #)':<28}{ms(lambda: note._similar(q)):>8.2f}")
+    print(f"{'_dup (save-time check)':<28}{ms(lambda: note._dup(q)):>8.2f}")
+    print(f"{'_pending':<28}{ms(lambda: note._pending(), 5):>8.1f}")
+    t = time.perf_counter(); g = note._clusters(pend)
+    print(f"{'_clusters (a n similar)':<28}{(time.perf_counter() - t) * 1000:>8.1f}")
+    print(f"\nplanted pair in top 3: {found}/{DUPS}  _dup warns: {dup}/{DUPS}  clusters: {len(g)} ({sum(map(len, g))} notes)")
+    shutil.rmtree(D, ignore_errors=True)
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""Parse-every-file loaders vs the aio.db record index (_common.records)
+
+Builds a notes-sized folder of `Key: value` .txt records and times a full
+load: the old glob+read+parse, the index cold (first ingest), from aio.db
+(a new process, nothing changed), from the in-process memo (repeat call) and
+after one edit. Also the add_proj -> list_all ->
+refresh_caches path, which loads the projects folder three times.
+"""
+import sys, os, time, shutil
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'lib'))
+import _common
+from _common import records, parse_kv
+
+N, P = int(os.getenv('N', 5000)), int(os.getenv('P', 200))
+D = Path(os.getenv('TMPDIR', '/tmp')) / 'record_index_bench'
+
+def build(d, n, kind):
+    d.mkdir(parents=True)
+    for i in range(n):
+        body = f"Name: proj{i}\nRepo: https://github.com/u/proj{i}\n" if kind == 'proj' else \
+               f"Text: note {i} " + 'lorem ipsum ' * 8 + f"\nStatus: pending\nDevice: dev\nCreated: 2026-10-01 12:00\nProject: p{i % 7}\n"
+        (d/f'{kind}{i}_20261001T120000.{i:09d}.txt').write_text(body)
+    old = time.time() - 10
+    for f in d.iterdir(): os.utime(f, (old, old))  # past the racy-mtime window
+
+def glob_parse(d):
+    return [parse_kv(f.read_text()) for f in sorted(d.glob('*.txt'))]
+
+def ms(f, n=5):
+    ts = []
+    for _ in range(n):
+        t = time.perf_counter(); f(); ts.append((time.perf_counter() - t) * 1000)
+    return sorted(ts)[n // 2]
+
+if __name__ == '__main__':
+    shutil.rmtree(D, ignore_errors=True)
+    notes, projs = D/'notes', D/'projects'
+    build(notes, N, 'note'); build(projs, P, 'proj')
+    _common.DB_PATH = str(D/'aio.db')
+    rows = {}
+    for name, d in ((f'notes ({N})', notes), (f'projects ({P})', projs)):
+        t = time.perf_counter(); cold = records(d); cold_ms = (time.perf_counter() - t) * 1000
+        assert [x for _, x in cold] == glob_parse(d)
+        f = next(d.iterdir())
+        def edit(): f.write_text(f.read_text() + 'X: 1\n'); os.utime(f, (time.time() - 10,) * 2); records(d)
+        rows[name] = (ms(lambda: glob_parse(d)), cold_ms, ms(lambda: (_common._rec_mem.clear(), records(d))), ms(lambda: records(d)), ms(edit))
+    pr = rows.pop(f'projects ({P})')
+    print(f"{'folder':<24}{'parse all':>10}{'cold':>9}{'db':>9}{'memo':>9}{'1 edit':>9}{'db speedup':>11}")
+    for k, (a, c, w, m, e) in rows.items():
+        print(f"{k:<24}{a:>10.1f}{c:>9.1f}{w:>9.1f}{m:>9.1f}{e:>9.1f}{a / w:>10.1f}x")
+    print(f"{f'projects ({P})':<24}{pr[0]:>10.1f}{pr[1]:>9.1f}{pr[2]:>9.1f}{pr[3]:>9.1f}{pr[4]:>9.1f}{pr[0] / pr[2]:>10.1f}x")
+    old, new = 3 * pr[0], pr[2] + 2 * pr[3]
+    print(f"add_proj -> list_all -> refresh_caches (3 project loads): {old:.1f} -> {new:.1f}ms ({old / new:.1f}x)")
+    shutil.rmtree(D, ignore_errors=True)
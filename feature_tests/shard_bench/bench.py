@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""Flat vs month-sharded append-only folder at N entries (activity/notes/agents layout)
+
+Measures what the readers and sync do: newest-30 listing (a log), full listing
+(note._load), add_timestamps after one new file, and git status / add+commit
+of one new file.
+"""
+import sys, os, time, shutil, subprocess as sp
+from pathlib import Path
+from datetime import datetime, timedelta
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'lib'))
+from _common import shard_files
+import sync
+
+N, MONTHS = int(os.getenv('N', 50000)), 24
+D = Path(os.getenv('TMPDIR', '/tmp')) / 'shard_bench'
+env = {**os.environ, 'GIT_AUTHOR_NAME': 'b', 'GIT_AUTHOR_EMAIL': 'b@b', 'GIT_COMMITTER_NAME': 'b', 'GIT_COMMITTER_EMAIL': 'b@b'}
+
+def build(layout):
+    r = D / layout; (r/'activity').mkdir(parents=True)
+    t0 = datetime(2026, 10, 1) - timedelta(days=30 * MONTHS)
+    for i in range(N):
+        t = t0 + timedelta(seconds=i * 30 * MONTHS * 86400 // N)
+        d = r/'activity'/t.strftime('%Y-%m') if layout == 'sharded' else r/'activity'
+        d.mkdir(exist_ok=True)
+        (d/f'{t:%Y%m%dT%H%M%S}.000_dev.txt').write_text(f'{t:%m/%d %H:%M} dev cmd{i} /home\n')
+    sp.run(f'cd {r} && git init -q -b main && git config core.untrackedCache true && git add -A && git commit -qm init', shell=True, env=env)
+    return r
+
+def ms(f, n=5):
+    ts = []
+    for _ in range(n):
+        t = time.perf_counter(); f(); ts.append((time.perf_counter() - t) * 1000)
+    return sorted(ts)[n // 2]
+
+def newest30(r, layout):
+    if layout == 'flat': return sorted(os.listdir(r/'activity'))[-30:]
+    return sorted(shard_files(r/'activity', months=2), key=os.path.basename)[-30:]
+
+def new_file(r, layout):
+    d = r/'activity'/'2026-10' if layout == 'sharded' else r/'activity'
+    d.mkdir(exist_ok=True); f = d/f'{time.time_ns()}.txt'; f.write_text('x'); return f
+
+if __name__ == '__main__':
+    shutil.rmtree(D, ignore_errors=True)
+    rows = {}
+    for layout in ('flat', 'sharded'):
+        r = build(layout)
+        sp.run(['git', '-C', str(r), 'status', '-s'], capture_output=True)  # warm untracked cache
+        row = {'newest 30 (a log)': ms(lambda: newest30(r, layout)),
+               'list all (note._load)': ms(lambda: shard_files(r/'activity'))}
+        seen = {}; sync.add_timestamps(r/'activity', seen=seen)
+        def ts_after_write(): new_file(r, layout); time.sleep(0); sync.add_timestamps(r/'activity', seen=seen)
+        row['add_timestamps +1 file'] = ms(ts_after_write)
+        def status(): new_file(r, layout); sp.run(['git', '-C', str(r), 'status', '--porcelain'], capture_output=True)
+        row['git status +1 file'] = ms(status)
+        def commit(): new_file(r, layout); sp.run(f'cd {r} && git add -A && git commit -qm x', shell=True, env=env)
+        row['git add+commit +1 file'] = ms(commit)
+        rows[layout] = row
+    print(f"N={N} entries over {MONTHS} months\n")
+    print(f"{'op':<26}{'flat ms':>10}{'sharded ms':>12}{'speedup':>9}")
+    for k in rows['flat']:
+        f, s = rows['flat'][k], rows['sharded'][k]
+        print(f"{k:<26}{f:>10.2f}{s:>12.2f}{f / max(s, 1e-3):>8.1f}x")
+    shutil.rmtree(D, ignore_errors=True)
@@ -26,10 +26,26 @@ _USER_CONF = os.path.expanduser('~/.tmux.conf')
 _SRC_LINE = 'source-file ~/.a/tmux.conf  # a'
 RCLONE_REMOTE_PREFIX, RCLONE_BACKUP_PATH = 'a-gdrive', 'adata'
 ACTIVITY_DIR = ADATA_ROOT / 'git' / 'activity'
+_MONTH = re.compile(r'^\d{4}-\d{2}$')
+
+def shard(d, when=None):
+    """Month shard d/YYYY-MM of an append-only folder (notes, activity, agents), created on demand"""
+    p = Path(d) / (when or datetime.now()).strftime('%Y-%m')
+    p.mkdir(parents=True, exist_ok=True)
+    return p
+
+def shard_files(d, months=None):
+    """*.txt paths (str) in d: month shards newest first, then flat (unmigrated) files; months=N walks only the N newest shards"""
+    try: ents = list(os.scandir(d))
+    except OSError: return []
+    subs = sorted((e.path for e in ents if e.is_dir() and _MONTH.match(e.name)), reverse=True)[:months]
+    out = []
+    for s in subs:
+        out += [f'{s}/{n}' for n in os.listdir(s) if n.endswith('.txt') and n[0] != '.']
+    return out + [e.path for e in ents if e.name.endswith('.txt') and e.name[0] != '.' and e.is_file()]
 
 def alog(msg):
     """Append activity log entry (individual file, append-only)"""
-    ACTIVITY_DIR.mkdir(parents=True, exist_ok=True)
     now = datetime.now()
     ms = int(now.timestamp() * 1000) % 1000
     fn = now.strftime(f'%Y%m%dT%H%M%S.{ms:03d}_{DEVICE_ID}.txt')
@@ -38,7 +54,7 @@ def alog(msg):
     if os.path.isdir(os.path.join(cwd, '.git')):
         r = sp.run(['git', 'remote', 'get-url', 'origin'], capture_output=True, text=True, cwd=cwd)
         if r.returncode == 0 and r.stdout.strip(): repo = f' git:{r.stdout.strip()}'
-    (ACTIVITY_DIR / fn).write_text(f'{now:%m/%d %H:%M} {DEVICE_ID} {msg} {cwd}{repo}\n')
+    (shard(ACTIVITY_DIR, now) / fn).write_text(f'{now:%m/%d %H:%M} {DEVICE_ID} {msg} {cwd}{repo}\n')
 
 # Basic helpers
 def _git(path, *a, **k): return sp.run(['git', '-C', path] + list(a), capture_output=True, text=True, **k)
@@ -149,6 +165,60 @@ def init_db():
         c.execute("INSERT OR IGNORE INTO sessions VALUES ('a', 'aider', 'OLLAMA_API_BASE=http://127.0.0.1:11434 aider --model ollama_chat/mistral')")
         c.commit()
 
+# Record index: `Key: value` .txt files (projects, cmds, ssh, hub, notes) parsed once into
+# aio.db by path+mtime+size; later loads stat the folder and re-read only what changed.
+# The .txt files stay the source of truth - drop the table and it rebuilds.
+_rec_ready, _rec_mem = False, {}  # _rec_mem: this process's last view per folder {path: (mtime, size, kv)}
+def parse_kv(text): return {k.strip(): v.strip() for line in text.splitlines() if ':' in line for k, v in [line.split(':', 1)]}
+def _read_kv(f):
+    try: return parse_kv(Path(f).read_text(errors='replace'))
+    except OSError: return None  # deleted since the listing (sync, rm on another tab)
+def _rec_db():
+    global _rec_ready
+    c = db()
+    if not _rec_ready:
+        c.execute("CREATE TABLE IF NOT EXISTS records(path TEXT PRIMARY KEY, dir TEXT NOT NULL, mtime INTEGER NOT NULL, size INTEGER NOT NULL, data TEXT NOT NULL)")
+        c.execute("CREATE INDEX IF NOT EXISTS records_dir ON records(dir)"); _rec_ready = True
+    return c
+def records(d, files=None):
+    """[(path, {Key: value})] for d/*.txt (or the given paths, e.g. shard_files(d)), sorted by path"""
+    d = str(d)
+    if files is None:
+        try: files = [e.path for e in os.scandir(d) if e.name.endswith('.txt') and e.name[0] != '.' and e.is_file()]
+        except OSError: files = []
+    st = {}
+    for f in sorted(files):
+        try: s = os.stat(f); st[f] = (s.st_mtime_ns, s.st_size)
+        except OSError: pass
+    mem = _rec_mem.get(d)
+    if mem is not None and len(mem) == len(st) and all((m := mem.get(f)) and m[0] == x[0] and m[1] == x[1] for f, x in st.items()):
+        return [(f, dict(m[2])) for f, m in mem.items()]  # copies: callers may overlay fields
+    c = None
+    try:
+        c = _rec_db()
+        rows = json.loads(c.execute("SELECT '[' || ifnull(group_concat('[' || json_quote(path) || ',' || mtime || ',' || size || ',' || data || ']'), '') || ']' "
+                                    "FROM (SELECT * FROM records WHERE dir=? ORDER BY path)", (d,)).fetchone()[0])  # one statement (one snapshot), one decode
+    except (sqlite3.Error, ValueError):
+        c and c.close()
+        return [(f, kv) for f in st if (kv := _read_kv(f)) is not None]
+    rows = {p: (m, z, kv) for p, m, z, kv in rows}
+    mem, put, now = {}, [], time.time_ns()
+    for f, (m, z) in st.items():
+        r = rows.pop(f, None)
+        if r and r[0] == m and r[1] == z:
+            mem[f] = r; continue
+        if (kv := _read_kv(f)) is None: continue
+        m = -1 if now - m < 1_000_000_000 else m  # racy mtime (same-tick rewrite): re-read next time
+        mem[f] = (m, z, kv); put.append((f, d, m, z, json.dumps(kv)))
+    try:
+        with c:
+            put and c.executemany("INSERT OR REPLACE INTO records VALUES(?,?,?,?,?)", put)
+            rows and c.executemany("DELETE FROM records WHERE path=?", [(p,) for p in rows])
+    except sqlite3.Error: pass  # locked by another writer: served from disk, index catches up next call
+    finally: c.close()
+    _rec_mem[d] = mem
+    return [(f, dict(m[2])) for f, m in mem.items()]
+
 def load_cfg():
     p = os.path.join(DATA_DIR, "config.txt")
     if os.path.exists(p):
@@ -157,15 +227,13 @@ def load_cfg():
 
 def load_proj():
     proj_dir = SYNC_ROOT / 'workspace' / 'projects'; proj_dir.mkdir(parents=True, exist_ok=True); projs = []
-    for f in proj_dir.glob('*.txt'):
-        d = {k.strip(): v.strip() for line in f.read_text().splitlines() if ':' in line for k, v in [line.split(':', 1)]}
+    for _, d in records(proj_dir):
         if 'Name' in d: projs.append((d.get('Path', f'~/projects/{d["Name"]}'), d.get('Repo', ''), d['Name']))
     return [(os.path.expanduser(p), r) for p, r, n in sorted(projs, key=lambda x: x[2])]
 
 def load_apps():
     cmds_dir = SYNC_ROOT / 'workspace' / 'cmds'; cmds_dir.mkdir(parents=True, exist_ok=True); cmds = []
-    for f in cmds_dir.glob('*.txt'):
-        d = {k.strip(): v.strip() for line in f.read_text().splitlines() if ':' in line for k, v in [line.split(':', 1)]}
+    for _, d in records(cmds_dir):
         if 'Name' in d and 'Command' in d: cmds.append((d['Name'], d['Command']))
     return sorted(cmds, key=lambda x: x[0])
 
@@ -199,7 +267,7 @@ def add_proj(p):
     d = SYNC_ROOT / 'workspace' / 'projects'; d.mkdir(parents=True, exist_ok=True)
     if (d/f'{name}.txt').exists(): return False, f"Exists: {name}"
     repo = sp.run(['git','-C',p,'remote','get-url','origin'],capture_output=True,text=True).stdout.strip()
-    (d/f'{name}.txt').write_text(f"Name: {name}\n" + (f"Repo: {repo}\n" if repo else "")); sync('workspace')
+    (d/f'{name}.txt').write_text(f"Name: {name}\n" + (f"Repo: {repo}\n" if repo else "")); sync('workspace', wait=False)
     _refresh_cache(); return True, f"Added: {name}"
 
 def rm_proj(i):
@@ -207,7 +275,7 @@ def rm_proj(i):
     projs = load_proj()
     if i < 0 or i >= len(projs): return False, f"Invalid index: {i}"
     name = os.path.basename(projs[i][0])
-    (SYNC_ROOT/'workspace'/'projects'/f'{name}.txt').unlink(missing_ok=True); sync('workspace')
+    (SYNC_ROOT/'workspace'/'projects'/f'{name}.txt').unlink(missing_ok=True); sync('workspace', wait=False)
     _refresh_cache(); return True, f"Removed: {name}"
 
 def add_app(n, cmd):
@@ -215,14 +283,14 @@ def add_app(n, cmd):
     from .sync import sync, SYNC_ROOT
     d = SYNC_ROOT / 'workspace' / 'cmds'; d.mkdir(parents=True, exist_ok=True)
     if (d/f'{n}.txt').exists(): return False, f"Exists: {n}"
-    (d/f'{n}.txt').write_text(f"Name: {n}\nCommand: {cmd}\n"); sync('workspace')
+    (d/f'{n}.txt').write_text(f"Name: {n}\nCommand: {cmd}\n"); sync('workspace', wait=False)
     _refresh_cache(); return True, f"Added: {n}"
 
 def rm_app(i):
     from .sync import sync, SYNC_ROOT
     a = load_apps()
     if i < 0 or i >= len(a): return False, f"Invalid index: {i}"
-    n = a[i][0]; (SYNC_ROOT/'workspace'/'cmds'/f'{n}.txt').unlink(missing_ok=True); sync('workspace')
+    n = a[i][0]; (SYNC_ROOT/'workspace'/'cmds'/f'{n}.txt').unlink(missing_ok=True); sync('workspace', wait=False)
     _refresh_cache(); return True, f"Removed: {n}"
 
 def fmt_cmd(c, mx=60):
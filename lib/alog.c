@@ -1,7 +1,7 @@
 /* ═══ ACTIVITY LOG ═══ */
 static void alog(const char *cmd, const char *cwd, const char *extra) { (void)extra;
-    char dir[P]; snprintf(dir, P, "%s/git/activity", AROOT);
-    time_t t = time(NULL); struct tm *tm = localtime(&t);
+    char base[P], dir[P]; snprintf(base, P, "%s/git/activity", AROOT);
+    time_t t = time(NULL); month_dir(dir, base, t); struct tm *tm = localtime(&t);
     struct timespec ts; clock_gettime(CLOCK_REALTIME, &ts);
     char lf[P]; snprintf(lf, P, "%s/%04d%02d%02dT%02d%02d%02d.%03ld_%s.txt", dir,
         tm->tm_year+1900, tm->tm_mon+1, tm->tm_mday, tm->tm_hour, tm->tm_min, tm->tm_sec,
@@ -1,2 +1,211 @@
-"""aio backup - Placeholder for sync rewrite"""
-def run(): print("backup: sync system removed, rewrite pending")
+"""a backup [ls|restore|setup] - Dedup snapshots of adata/local, adata/git and session logs
+
+Files are split with content-defined chunking (gear hash, FastCDC-style cut
+points), so an edit only changes the chunks around it. Chunks are stored once
+by sha256 under STORE/chunks, snapshots are JSON manifests of path -> chunks.
+Upload copies only chunks the remote has not seen, then the manifest.
+Unchanged files (same size+mtime as the last snapshot) are not re-read;
+changed ones are streamed in WINDOW reads, never loaded whole.
+Skipped: a root's .git (adata/git's history already lives on its remote),
+the large-file blob cache (already in the rclone blob store) and sqlite's
+-wal/-shm/-journal files: a live .db is snapshotted through sqlite's backup
+API instead, so the copy is consistent and includes what is still in the WAL.
+"""
+import sys, os, json, time, zlib, hashlib, random, threading, sqlite3, subprocess as sp
+from pathlib import Path
+from _common import DATA_DIR, SYNC_ROOT, LOG_DIR, DEVICE_ID, RCLONE_BACKUP_PATH, get_rclone, _configured_remotes
+
+STORE = Path(DATA_DIR) / 'snap'
+ROOTS = {'local': Path(DATA_DIR), 'git': SYNC_ROOT, 'logs': Path(LOG_DIR)}
+BLOBS = Path(DATA_DIR) / 'blobs'  # sync.BLOB_CACHE
+DB_SIDE = ('.db-wal', '.db-shm', '.db-journal')
+MIN, AVG, MAX = 16 << 10, 64 << 10, 256 << 10
+WINDOW = 1 << 20
+_rng = random.Random(0x5eed)  # fixed seed so cut points are stable across runs/devices
+_G = [_rng.getrandbits(64) for _ in range(256)]
+_M64, _MASK = (1 << 64) - 1, ((1 << (AVG.bit_length() - 1)) - 1) << 48
+
+def _cut(b, s):
+    """End of the chunk starting at b[s]: skip MIN bytes, roll gear hash until the top bits are zero or MAX"""
+    n, G = len(b), _G
+    if n - s <= MIN:
+        return n
+    h, i, end = 0, s + MIN, min(n, s + MAX)
+    while i < end:
+        h = ((h << 1) + G[b[i]]) & _M64
+        if not h & _MASK: break
+        i += 1
+    return min(i + 1, end)
+
+def cuts(b):
+    """Chunk boundaries of b"""
+    s, out = 0, []
+    while s < len(b):
+        s = _cut(b, s); out.append(s)
+    return out
+
+def chunks(fh):
+    """Chunks of an open file, cut exactly as cuts() cuts its whole content, reading WINDOW bytes at a time:
+    a chunk is only cut once MAX bytes past its start are buffered (or at EOF), so memory stays ~WINDOW + MAX"""
+    buf, eof = b'', False
+    while True:
+        while not eof and len(buf) < MAX + WINDOW:
+            r = fh.read(WINDOW); eof = not r; buf += r
+        s = 0
+        while s < len(buf) and (eof or len(buf) - s >= MAX):
+            c = _cut(buf, s); yield buf[s:c]; s = c
+        buf = buf[s:]
+        if eof: return
+
+def _chunk_path(cid, store=STORE):
+    return store / 'chunks' / cid[:2] / cid[2:]
+
+def _put(data, store, new):
+    cid = hashlib.sha256(data).hexdigest()
+    p = _chunk_path(cid, store)
+    if not p.exists():
+        p.parent.mkdir(parents=True, exist_ok=True)
+        tmp = p.with_suffix('.tmp'); tmp.write_bytes(zlib.compress(data, 1)); tmp.replace(p)
+        new.append(cid)
+    return cid
+
+def _walk(root, skip):
+    """Regular files under root (no symlinks/sockets), skipping the paths in skip (the store, .git, blobs)"""
+    stack = [root]
+    while stack:
+        try: it = os.scandir(stack.pop())
+        except OSError: continue
+        with it:
+            for e in it:
+                if e.path in skip or e.name.endswith(DB_SIDE): continue
+                if e.is_dir(follow_symlinks=False): stack.append(e.path)
+                elif e.is_file(follow_symlinks=False): yield e
+
+def _manifests(store=STORE):
+    return sorted((store / 'manifests').glob('*.json')) if (store / 'manifests').exists() else []
+
+def _load(m):
+    return json.loads(Path(m).read_text())
+
+def _db_copy(src, store):
+    """Consistent copy of a live sqlite db (WAL contents included) via the backup API; None if not a readable db"""
+    out = store / 'tmp' / 'db'
+    out.parent.mkdir(parents=True, exist_ok=True); out.unlink(missing_ok=True)
+    try:
+        s, d = sqlite3.connect(src, timeout=5), sqlite3.connect(out)
+        try: s.backup(d)
+        finally: s.close(); d.close()
+    except sqlite3.Error:
+        return None
+    return out
+
+def snapshot(roots=None, store=STORE):
+    """Chunk every root into store; returns (manifest path, stats)"""
+    roots, store = roots or ROOTS, Path(store)
+    prev = _load(ms[-1])['files'] if (ms := _manifests(store)) else {}
+    files, new, stats = {}, [], {'files': 0, 'read': 0, 'bytes': 0}
+    for name, root in roots.items():
+        if not Path(root).is_dir(): continue
+        for e in _walk(str(root), {str(store), os.path.join(root, '.git'), str(BLOBS)}):
+            key = f'{name}/{os.path.relpath(e.path, root)}'
+            st = e.stat(follow_symlinks=False)
+            old, src, mt = prev.get(key), e.path, st.st_mtime_ns
+            stats['files'] += 1; stats['bytes'] += st.st_size
+            if db := e.name.endswith('.db'):  # writes land in -wal first: it counts toward "changed"
+                try: mt = max(mt, os.stat(e.path + '-wal').st_mtime_ns)
+                except OSError: pass
+            if old and old[1] == mt and (db or old[2] == st.st_size):  # chunks are never pruned
+                files[key] = old; continue
+            if db:
+                src = _db_copy(e.path, store) or e.path  # not sqlite after all: plain file
+            try:
+                with open(src, 'rb') as fh:
+                    ids, n = [], 0
+                    for c in chunks(fh):
+                        ids.append(_put(c, store, new)); n += len(c)
+            except OSError: continue
+            stats['read'] += n
+            files[key] = [st.st_mode & 0o777, mt, n, ids]
+    stats['new_chunks'] = len(new)
+    stats['new_bytes'] = sum(_chunk_path(c, store).stat().st_size for c in new)
+    m = store / 'manifests' / f'{time.strftime("%Y%m%dT%H%M%S")}.{time.time_ns() % 10**9:09d}.json'
+    m.parent.mkdir(parents=True, exist_ok=True)
+    m.write_text(json.dumps({'device': DEVICE_ID, 'roots': {k: str(v) for k, v in roots.items()}, 'files': files}, separators=(',', ':')))
+    return m, stats
+
+def _remote_dir(r):
+    return f'{r}:{RCLONE_BACKUP_PATH}/backup/{DEVICE_ID}/snap'
+
+def upload(store=STORE):
+    """Copy chunks each remote hasn't seen (tracked in STORE/sent-<remote>) plus manifests; concurrent per remote"""
+    rc, store = get_rclone(), Path(store)
+    if not rc: return False, "no rclone"
+    have = {str(p.relative_to(store)) for p in (store / 'chunks').glob('*/*')} | {str(p.relative_to(store)) for p in _manifests(store)}
+    res = {}
+    def one(r):
+        sent_f = store / f'sent-{r}'
+        sent = set(sent_f.read_text().split()) if sent_f.exists() else set()
+        todo = sorted(have - sent)
+        ok = not todo or sp.run([rc, 'copy', str(store), _remote_dir(r), '--files-from', '-', '--no-traverse', '-q'], input='\n'.join(todo), text=True).returncode == 0
+        if ok: sent_f.write_text('\n'.join(sorted(sent | set(todo))))
+        res[r] = (ok, len(todo))
+    ths = [threading.Thread(target=one, args=(r,)) for r in _configured_remotes()]
+    for t in ths: t.start()
+    for t in ths: t.join()
+    ok = [r for r, (o, _) in res.items() if o]
+    return bool(ok), f"{'✓'*len(ok) or 'x'} {', '.join(f'{r} +{n}' for r, (o, n) in res.items() if o) or 'fail'}"
+
+def _fetch(cid, store):
+    """Pull one missing chunk from the first remote that has it"""
+    rc = get_rclone()
+    for r in (_configured_remotes() if rc else []):
+        rel = _chunk_path(cid, store).relative_to(store)
+        if sp.run([rc, 'copyto', f'{_remote_dir(r)}/{rel}', str(store / rel), '-q']).returncode == 0: return True
+    return False
+
+def restore(path, snap=None, dest='.', store=STORE):
+    """Write every file at or under `path` (e.g. git/notes) from snapshot `snap` (default latest) into dest"""
+    store = Path(store)
+    ms = _manifests(store)
+    m = next((x for x in reversed(ms) if not snap or x.stem.startswith(snap)), None)
+    if not m: return 0
+    path, n = path.strip('/'), 0
+    for key, (mode, mt, size, ids) in _load(m)['files'].items():
+        if key != path and not key.startswith(path + '/'): continue
+        out = Path(dest) / key
+        out.parent.mkdir(parents=True, exist_ok=True)
+        with open(out, 'wb') as f:
+            for c in ids:
+                p = _chunk_path(c, store)
+                if not p.exists() and not _fetch(c, store): raise FileNotFoundError(f'chunk {c} of {key}')
+                f.write(zlib.decompress(p.read_bytes()))
+        os.chmod(out, mode); os.utime(out, ns=(mt, mt)); n += 1
+    return n
+
+HELP = """a backup - Dedup snapshots (local, git, logs) → gdrive
+
+  a backup                          Snapshot + upload new chunks
+  a backup ls                       List snapshots
+  a backup restore <path> [snap] [dest]
+                                    Restore a file/folder, e.g. git/notes
+                                    (snap: timestamp prefix, default latest;
+                                     dest default .)"""
+
+def run():
+    a = sys.argv[2:]
+    sub = a[0] if a else None
+    if sub == 'setup': STORE.mkdir(parents=True, exist_ok=True); return
+    if sub == 'ls':
+        for m in _manifests():
+            f = _load(m)['files']; print(f"{m.stem}  {len(f):>6} files  {sum(v[2] for v in f.values()) // 1024:>8}K")
+        return
+    if sub == 'restore' and len(a) > 1:
+        n = restore(a[1], a[2] if len(a) > 2 else None, a[3] if len(a) > 3 else '.')
+        print(f"✓ restored {n} files" if n else "x nothing matched"); return
+    if sub in ('help', '-h', '--help'): print(HELP); return
+    t = time.perf_counter()
+    m, s = snapshot()
+    print(f"✓ {m.stem}: {s['files']} files {s['bytes'] // 1024}K, read {s['read'] // 1024}K, +{s['new_chunks']} chunks {s['new_bytes'] // 1024}K ({time.perf_counter() - t:.2f}s)")
+    ok, msg = upload(); print(msg)
+
+if __name__ == '__main__': run()
@@ -0,0 +1,83 @@
+"""Append-only event log per folder: {folder}/events/{device}/{YYYY-MM}.jsonl
+
+One line per event: {"ts","dev","op","id", ...fields}. op is add|update|ack|rm.
+Each device appends only to its own segments, so git never merges two edits
+into one file - the same conflict-free property the timestamped .txt files
+have. State is last-writer-wins per field on (ts, dev), so replay order does
+not matter and an offline device's late events land where they belong.
+A local snapshot (state + byte offset per segment) means a load only reads
+the tail written since; it is refreshed every SNAP_EVERY tail events.
+"""
+import os, json, time, hashlib
+from pathlib import Path
+from _common import DEVICE_ID, DATA_DIR
+
+SNAP_EVERY = 200
+SNAP_DIR = Path(DATA_DIR) / 'events'
+
+def _ts():
+    n = time.time_ns()
+    return time.strftime('%Y%m%dT%H%M%S', time.localtime(n // 1000000000)) + f'.{n % 1000000000:09d}'
+
+def emit(folder, op, rid, **data):
+    """Append one event to this device's current segment; returns it"""
+    ev = {'ts': _ts(), 'dev': DEVICE_ID, 'op': op, 'id': rid, **{k: v for k, v in data.items() if v is not None}}
+    seg = Path(folder) / 'events' / DEVICE_ID / f"{time.strftime('%Y-%m')}.jsonl"
+    seg.parent.mkdir(parents=True, exist_ok=True)
+    with open(seg, 'a') as f:
+        f.write(json.dumps(ev, separators=(',', ':'), ensure_ascii=False) + '\n')  # one write: never a torn line for readers
+    return ev
+
+def segments(folder):
+    """Every device's segment files (str paths)"""
+    d = Path(folder) / 'events'
+    try: devs = [e.path for e in os.scandir(d) if e.is_dir()]
+    except OSError: return []
+    return sorted(f'{v}/{n}' for v in devs for n in os.listdir(v) if n.endswith('.jsonl'))
+
+def apply(state, ev):
+    """Fold one event into state {id: {field: [ts-key, value]}} (last writer wins per field)"""
+    k = (ev.get('ts', ''), ev.get('dev', ''))
+    r = state.setdefault(ev['id'], {})
+    fields = {f: v for f, v in ev.items() if f not in ('ts', 'dev', 'op', 'id')}
+    if ev['op'] == 'ack': fields['status'] = 'done'
+    fields['_rm'] = ev['op'] == 'rm'
+    for f, v in fields.items():
+        if f not in r or list(k) >= r[f][0]:
+            r[f] = [list(k), v]
+
+def _snap_path(folder):
+    return SNAP_DIR / f'{hashlib.sha1(str(Path(folder).resolve()).encode()).hexdigest()[:12]}.json'
+
+def _read(folder):
+    """(state, offsets, tail events) from snapshot + everything appended since"""
+    try: snap = json.loads(_snap_path(folder).read_text())
+    except (OSError, ValueError): snap = {'state': {}, 'offs': {}}
+    state, offs, tail = snap['state'], snap['offs'], 0
+    segs = segments(folder)
+    if any(os.path.getsize(s) < offs.get(s, 0) for s in segs) or set(offs) - set(segs):
+        state, offs = {}, {}  # a segment shrank or vanished (reset/rewrite): replay from scratch
+    for s in segs:
+        with open(s, 'rb') as f:
+            f.seek(offs.get(s, 0))
+            b = f.read()
+        end = b.rfind(b'\n') + 1  # ignore a half-written last line
+        for line in b[:end].splitlines():
+            try: apply(state, json.loads(line)); tail += 1
+            except (ValueError, KeyError): pass
+        offs[s] = offs.get(s, 0) + end
+    return state, offs, tail
+
+def snapshot(folder, state=None, offs=None):
+    if state is None: state, offs, _ = _read(folder)
+    SNAP_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = _snap_path(folder).with_suffix('.tmp')
+    tmp.write_text(json.dumps({'state': state, 'offs': offs}, separators=(',', ':')))
+    tmp.replace(_snap_path(folder))
+
+def load(folder, dead=False):
+    """{id: {field: value}} for every record the events know about; rm'd ones dropped unless dead (then '_rm': True)"""
+    state, offs, tail = _read(folder)
+    if tail >= SNAP_EVERY: snapshot(folder, state, offs)
+    out = {rid: {f: v[1] for f, v in r.items()} for rid, r in state.items()}
+    return out if dead else {rid: r for rid, r in out.items() if not r.get('_rm')}
@@ -21,7 +21,8 @@ HELP = """a gdrive - Google Drive backup (unlimited accounts)
                           adata/git/ → adata/backup/{device}/git.tar.zst
   a gdrive init         Pull auth from GDrive (new device setup)
 
-  Logs: use 'a log sync' (tar.zst to adata/backup/{device}/)"""
+  Logs: use 'a log sync' (tar.zst to adata/backup/{device}/)
+  Dedup: use 'a backup' (changed chunks only → adata/backup/{device}/snap/)"""
 
 def run():
     wda = sys.argv[2] if len(sys.argv) > 2 else None
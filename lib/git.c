@@ -41,9 +41,17 @@ static void sync_repo(void) {
     snprintf(c, sizeof(c),
         "git -C '%s' add -A 2>/dev/null && git -C '%s' commit -qm sync 2>/dev/null;"
         "git -C '%s' pull --no-rebase --no-edit -q origin main 2>/dev/null;"
-        "git -C '%s' push -q origin main 2>/dev/null", SROOT, SROOT, SROOT, SROOT);
+        "git -C '%s' push -q origin main 2>/dev/null && touch '%s/.git/a-synced'", SROOT, SROOT, SROOT, SROOT, SROOT);
     (void)!system(c);
 }
+/* stale-while-revalidate (sync.py): age of the last good sync, for read commands that use sync_bg */
+static void synced_ago(char *o, size_t n) {
+    char f[P]; struct stat st; snprintf(f,P,"%s/.git/a-synced",SROOT);
+    if(stat(f,&st)){snprintf(o,n,"never synced");return;} long s=(long)(time(NULL)-st.st_mtime);
+    if(s<60) snprintf(o,n,"synced just now"); else if(s<3600) snprintf(o,n,"synced %ldm ago",s/60);
+    else if(s<172800) snprintf(o,n,"synced %ldh ago",s/3600); else snprintf(o,n,"synced %ldd ago",s/86400);
+}
+static time_t synced_at(void) { char f[P]; struct stat st; snprintf(f,P,"%s/.git/a-synced",SROOT); return stat(f,&st)?0:st.st_mtime; }
 static void sync_bg(void) {
     pid_t p=fork();if(p<0)return;if(p>0){waitpid(p,NULL,WNOHANG);return;}
     if(fork()>0)_exit(0);setsid();sync_repo();_exit(0);
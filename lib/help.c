@@ -119,7 +119,7 @@ static int cmd_dir(int argc, char **argv) { (void)argc;(void)argv;
     execlp("ls", "ls", (char*)NULL); return 1;
 }
 
-static int cmd_backup(int argc, char **argv) { (void)argc;(void)argv; puts("backup: sync system removed, rewrite pending"); return 0; }
+static int cmd_backup(int argc, char **argv) { fallback_py("backup", argc, argv); }
 static int cmd_rebuild(int argc, char **argv) { (void)argc;(void)argv; puts("rebuild: sync system removed, rewrite pending"); return 0; }
 
 static int cmd_x(int argc, char **argv) { (void)argc;(void)argv;
@@ -2,7 +2,7 @@
 import sys, shutil, subprocess as sp
 from pathlib import Path
 from datetime import datetime
-from .sync import sync, SYNC_ROOT
+from .sync import sync, SYNC_ROOT, revalidate, synced_ago
 from _common import cloud_account, DEVICE_ID
 
 LOGIN_DIR = SYNC_ROOT / 'login'
@@ -27,9 +27,11 @@ def _rclone_remotes():
 
 def run():
     LOGIN_DIR.mkdir(parents=True, exist_ok=True)
-    (LOGIN_DIR/'.git').exists() or sync('login')
+    wda = sys.argv[2] if len(sys.argv) > 2 else None
+    wda == 'apply' and sync('login')  # applying tokens: wait for the freshest copy
+    changed = revalidate()  # listing: disk as-is, sync in the background
     url = sp.run(['git','-C',str(LOGIN_DIR),'remote','get-url','origin'], capture_output=True, text=True).stdout.strip()
-    print(f"Login: {LOGIN_DIR}\n  {url}\n")
+    print(f"Login: {LOGIN_DIR} ({synced_ago()})\n  {url}\n")
 
     # gh token
     gh_local = sp.run(['gh','auth','token'], capture_output=True, text=True).stdout.strip()
@@ -45,10 +47,11 @@ def run():
     if not remotes: print("  x none")
 
     # list synced files
+    if changed():
+        gh_sync, gh_src = _load_gh(); print(f"\n↻ {synced_ago()}" + (f", gh sync: {gh_src}" if gh_sync else ""))
     files = [f.name for f in LOGIN_DIR.glob('*') if f.is_file()]
     print(f"\nSynced: {', '.join(files) if files else '(none)'}")
 
-    wda = sys.argv[2] if len(sys.argv) > 2 else None
     if wda == 'save':
         if gh_local: _save_gh(gh_local)
         if RCLONE_LOCAL.exists(): shutil.copy(RCLONE_LOCAL, LOGIN_DIR/'rclone.conf')
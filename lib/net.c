@@ -9,8 +9,10 @@ static int cmd_log(int argc, char **argv) {
 
     char adir[P]; snprintf(adir, P, "%s/git/activity", AROOT);
 
+    /* flat (unmigrated) + month shards, ordered by file name (= timestamp); ACT_LS(n) = newest n shards only */
+    #define ACT_LS(n) "{ ls '%s'/*.txt; ls -d '%s'/[0-9][0-9][0-9][0-9]-[0-9][0-9] | sort | tail -" n " | while read d; do ls \"$d\"/*.txt; done; } 2>/dev/null | awk -F/ '{print $NF\"\\t\"$0}' | sort | cut -f2"
     if (sub && !strcmp(sub, "all")) {
-        char c[B]; snprintf(c, B, "cat $(ls '%s'/*.txt 2>/dev/null | sort) 2>/dev/null", adir);
+        char c[B]; snprintf(c, B, "cat $(" ACT_LS("10000") ") 2>/dev/null", adir, adir);
         (void)!system(c); return 0;
     }
 
@@ -33,14 +35,14 @@ static int cmd_log(int argc, char **argv) {
     char c[B], out[256];
     printf("%-5s %-7s %-16s %-20s %-30s %s\n", "DATE", "TIME", "DEVICE", "CMD", "CWD", "GIT");
     fflush(stdout);
-    snprintf(c, B, "cat $(ls '%s'/*.txt 2>/dev/null | sort | tail -30) 2>/dev/null"
-        " | awk '{split($2,t,\":\"); h=int(t[1]); m=t[2]; ap=\"AM\"; if(h>=12){ap=\"PM\"; if(h>12)h-=12} if(h==0)h=12; $2=h\":\"m ap} 1'", adir);
+    snprintf(c, B, "cat $(" ACT_LS("2") " | tail -30) 2>/dev/null"
+        " | awk '{split($2,t,\":\"); h=int(t[1]); m=t[2]; ap=\"AM\"; if(h>=12){ap=\"PM\"; if(h>12)h-=12} if(h==0)h=12; $2=h\":\"m ap} 1'", adir, adir);
     (void)!system(c);
 
     /* Git remote for activity log */
     snprintf(c, B, "git -C '%s/git' remote get-url origin 2>/dev/null", AROOT);
     pcmd(c, out, 256); out[strcspn(out, "\n")] = 0;
-    snprintf(c, B, "ls '%s'/*.txt 2>/dev/null | wc -l", adir);
+    snprintf(c, B, "find '%s' -maxdepth 2 -name '*.txt' 2>/dev/null | wc -l", adir);
     char nout[64]; pcmd(c, nout, 64);
     printf("\nActivity: %s/ (%d files)\n  git: %s\n  gdrive: adata/backup/git.tar.zst (via a gdrive sync)\n", adir, atoi(nout), out[0] ? out : "(no remote)");
 
@@ -57,31 +59,7 @@ static int cmd_log(int argc, char **argv) {
 static int cmd_login(int argc, char **argv) { fallback_py("login", argc, argv); }
 
 /* ── sync ── */
-static int cmd_sync(int argc, char **argv) {
-    printf("%s\n", SROOT);
-    sync_repo();
-    char c[B], out[256];
-    snprintf(c, B, "git -C '%s' remote get-url origin 2>/dev/null", SROOT);
-    pcmd(c, out, 256); out[strcspn(out,"\n")] = 0;
-    char t[256]; snprintf(c, B, "git -C '%s' log -1 --format='%%cd %%s' --date=format:'%%Y-%%m-%%d %%I:%%M:%%S %%p' 2>/dev/null", SROOT);
-    pcmd(c, t, 256); t[strcspn(t,"\n")] = 0;
-    printf("  %s\n  Last: %s\n  Status: synced\n", out, t);
-    /* Count files per folder */
-    const char *folders[] = {"common","ssh","login","agents","notes","workspace","docs","tasks"};
-    for (int i = 0; i < 8; i++) {
-        char d[P]; snprintf(d, P, "%s/%s", SROOT, folders[i]);
-        if (!dexists(d)) continue;
-        char cnt_cmd[P]; snprintf(cnt_cmd, P, "find '%s' -name '*.txt' -maxdepth 2 2>/dev/null | wc -l", d);
-        char cnt[16]; pcmd(cnt_cmd, cnt, 16); cnt[strcspn(cnt,"\n")] = 0;
-        printf("  %s: %s files\n", folders[i], cnt);
-    }
-    if (argc > 2 && !strcmp(argv[2], "all")) {
-        puts("\n--- Broadcasting to SSH hosts ---");
-        char bc[B]; snprintf(bc, B, "%s/lib/a.py", SDIR);
-        char cmd[B]; snprintf(cmd, B, "python3 '%s' ssh all 'a sync'", bc); (void)!system(cmd);
-    }
-    return 0;
-}
+static int cmd_sync(int argc, char **argv) { fallback_py("sync", argc, argv); }
 
 /* ── update ── */
 static int cmd_update(int argc, char **argv) {
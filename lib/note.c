@@ -4,36 +4,71 @@ static void do_archive(const char *p) {
     snprintf(d,P,"%s%s",a,s); rename(p,d);
 }
 /* ── note ── */
-static void note_save(const char *d, const char *t) {
-    struct timespec tp; clock_gettime(CLOCK_REALTIME,&tp); time_t now=tp.tv_sec;
-    char ts[32],fn[P],buf[B]; strftime(ts,32,"%Y%m%dT%H%M%S",localtime(&now));
-    snprintf(fn,P,"%s/%08x_%s.%09ld.txt",d,(unsigned)(tp.tv_nsec^(unsigned)now),ts,tp.tv_nsec);
-    snprintf(buf,B,"Text: %s\nStatus: pending\nDevice: %s\nCreated: %s\n",t,DEV,ts); writef(fn,buf);
+/* events.py log: notes/events/<dev>/YYYY-MM.jsonl, last writer per field on (ts,dev) wins */
+typedef struct{char id[96],k[80];const char*l;}NEv;
+typedef struct{char id[96];int hide;char*t;}NSt;
+static NSt*nst;static int nnst;
+static int jstr(const char *l, const char *k, char *o, size_t n) {
+    char pat[32]; snprintf(pat,32,"\"%s\":\"",k); const char *s=strstr(l,pat); if(!s) return 0; s+=strlen(pat);
+    size_t j=0; for(;*s&&*s!='"'&&j+1<n;s++){ if(*s=='\\'&&s[1]){s++; o[j++]=*s=='n'?'\n':*s=='t'?'\t':*s;} else o[j++]=*s; }
+    o[j]=0; return 1;
 }
-static char gnp[256][P],gnt[256][512];
-static int load_notes(const char *dir, const char *f) {
-    DIR *d=opendir(dir); if(!d) return 0; struct dirent *e; int n=0;
-    while((e=readdir(d))) { if(e->d_name[0]=='.'||!strstr(e->d_name,".txt")) continue;
-        char fp[P]; snprintf(fp,P,"%s/%s",dir,e->d_name); kvs_t kv=kvfile(fp);
-        const char *t=kvget(&kv,"Text"),*s=kvget(&kv,"Status");
-        if(t&&(!s||!strcmp(s,"pending"))&&(!f||strcasestr(t,f))){if(n<256){snprintf(gnp[n],P,"%s",fp);snprintf(gnt[n],512,"%s",t);} n++;}
+static int nev_cmp(const void *a, const void *b) { const NEv*x=a,*y=b; int c=strcmp(x->id,y->id); return c?c:strcmp(x->k,y->k); }
+static int nst_cmp(const void *a, const void *b) { return strcmp(((const NSt*)a)->id,((const NSt*)b)->id); }
+static void note_events(const char *dir) {
+    for(int i=0;i<nnst;i++) free(nst[i].t);
+    free(nst); nst=NULL; nnst=0;
+    char ed[P]; snprintf(ed,P,"%s/events",dir); DIR *d=opendir(ed); if(!d) return;
+    NEv *ev=NULL; int ne=0,ce=0; char **bufs=NULL; int nb=0,cb=0; struct dirent *e;
+    while((e=readdir(d))) { if(e->d_name[0]=='.') continue;
+        char dd[P]; snprintf(dd,P,"%s/%s",ed,e->d_name); DIR *s=opendir(dd); if(!s) continue; struct dirent *f;
+        while((f=readdir(s))) { if(!strstr(f->d_name,".jsonl")) continue;
+            char fp[P]; snprintf(fp,P,"%s/%s",dd,f->d_name); char *b=readf(fp,NULL); if(!b) continue;
+            if(nb==cb){cb=cb?cb*2:64;bufs=realloc(bufs,(size_t)cb*sizeof*bufs);} bufs[nb++]=b;
+            for(char *l=b,*nl;l&&*l;l=nl) { nl=strchr(l,'\n'); if(!nl) break; *nl++=0; /* no newline yet = half-written, skip */
+                char ts[40],dv[36]; if(ne==ce){ce=ce?ce*2:1024;ev=realloc(ev,(size_t)ce*sizeof*ev);}
+                if(!jstr(l,"id",ev[ne].id,96)||!jstr(l,"ts",ts,40)||!jstr(l,"dev",dv,36)) continue;
+                snprintf(ev[ne].k,80,"%s\x01%s",ts,dv); ev[ne++].l=l; }
+        } closedir(s);
+    } closedir(d);
+    qsort(ev,(size_t)ne,sizeof*ev,nev_cmp); nst=malloc((size_t)(ne?ne:1)*sizeof*nst);
+    for(int i=0;i<ne;) { int j=i,rm=0,st=0; char t[512],op[8],sv[16],tv[512]; t[0]=0;
+        for(;j<ne&&!strcmp(ev[j].id,ev[i].id);j++) { jstr(ev[j].l,"op",op,8); rm=!strcmp(op,"rm");
+            if(!strcmp(op,"ack")) st=1; else if(jstr(ev[j].l,"status",sv,16)) st=strcmp(sv,"pending")!=0;
+            if(jstr(ev[j].l,"text",tv,512)) snprintf(t,512,"%s",tv); }
+        NSt *n=&nst[nnst++]; snprintf(n->id,96,"%s",ev[i].id); n->hide=rm||st; n->t=t[0]?strdup(t):NULL; i=j;
+    }
+    free(ev); for(int i=0;i<nb;i++) free(bufs[i]); free(bufs);
+}
+static char gnt[256][512];
+static int load_notes_in(const char *dir, int n) {
+    DIR *d=opendir(dir); if(!d) return n; struct dirent *e;
+    while((e=readdir(d))) { if(e->d_name[0]=='.') continue;
+        char fp[P]; snprintf(fp,P,"%s/%s",dir,e->d_name);
+        if(is_month(e->d_name)){n=load_notes_in(fp,n);continue;}
+        if(!strstr(e->d_name,".txt")) continue;
+        NSt key; snprintf(key.id,96,"%.*s",(int)(strlen(e->d_name)-4),e->d_name);
+        NSt *ov=nnst?bsearch(&key,nst,(size_t)nnst,sizeof*nst,nst_cmp):NULL; if(ov&&ov->hide) continue;
+        kvs_t kv=kvfile(fp);
+        const char *t=kvget(&kv,"Text"),*s=kvget(&kv,"Status"); if(ov&&ov->t) t=ov->t;
+        if(t&&(!s||!strcmp(s,"pending"))){if(n<256) snprintf(gnt[n],512,"%s",t); n++;}
     } closedir(d); return n;
 }
+static int load_notes(const char *dir) { note_events(dir); return load_notes_in(dir,0); }
+static void note_py(int argc, char **argv) { /* note.py run() for everything but the plain piped listing */
+    char c[B]; snprintf(c,B,"import sys; sys.path[:0]=['%s/lib','%s']; from lib import note; note.run()",SDIR,SDIR);
+    char **na=malloc(((unsigned)argc+3)*sizeof(char*)); na[0]="python3"; na[1]="-c"; na[2]=c;
+    for(int i=1;i<argc;i++) na[i+2]=argv[i];
+    na[argc+2]=NULL; execvp("python3",na); perror("a: python3"); _exit(127);
+}
 static int cmd_note(int argc, char **argv) {
     char dir[P]; snprintf(dir,P,"%s/notes",SROOT); mkdirp(dir);
-    if(argc>2&&argv[2][0]!='?'){char t[B]="";for(int i=2,l=0;i<argc;i++) l+=snprintf(t+l,(size_t)(B-l),"%s%s",i>2?" ":"",argv[i]);
-        note_save(dir,t);sync_repo();puts("\xe2\x9c\x93");return 0;}
-    sync_repo(); const char *f=(argc>2&&argv[2][0]=='?')?argv[2]+1:NULL; int n=load_notes(dir,f);
-    if(!n){puts("a n <text>");return 0;} if(!isatty(STDIN_FILENO)){for(int i=0;i<n&&i<10;i++)puts(gnt[i]);return 0;}
-    printf("Notes: %d pending\n  %s\n\n[a]ck [d]el [s]earch [q]uit | type=add\n",n,dir);
-    for(int i=0,s=n<256?n:256;i<s;){
-        printf("\n[%d/%d] %s\n> ",i+1,n,gnt[i]); char line[B]; if(!fgets(line,B,stdin)) break; line[strcspn(line,"\n")]=0;
-        if(line[0]=='q'&&!line[1]) break;
-        if(!line[1]&&(line[0]=='a'||line[0]=='d')){do_archive(gnp[i]);sync_repo();puts("\xe2\x9c\x93");memmove(gnp+i,gnp+i+1,(size_t)(s-i-1)*P);memmove(gnt+i,gnt+i+1,(size_t)(s-i-1)*512);n--;s=n<256?n:256;continue;}
-        if(line[0]=='s'&&!line[1]){printf("search: ");char q[128];if(fgets(q,128,stdin)){q[strcspn(q,"\n")]=0;n=load_notes(dir,q);s=n<256?n:256;i=0;printf("%d results\n",n);}continue;}
-        if(line[0]){note_save(dir,line);sync_repo();n=load_notes(dir,NULL);s=n<256?n:256;printf("\xe2\x9c\x93 [%d]\n",n);continue;}
-        i++;
-    } return 0;
+    if(argc>2||isatty(STDIN_FILENO)) note_py(argc,argv); /* add (near-dup warning), FTS search, triage, bulk, due, similar */
+    if(time(NULL)-synced_at()>=30) sync_bg();
+    char ago[32]; synced_ago(ago,32); int n=load_notes(dir); /* list from disk now, sync behind */
+    if(!n){puts("a n <text>");return 0;}
+    for(int i=0;i<n&&i<10;i++) puts(gnt[i]);
+    fprintf(stderr,"(%s)\n",ago); return 0;
 }
 /* ── task ── */
 typedef struct{char d[P],t[256],p[8];}Tk;
@@ -1,74 +1,439 @@
 # Append-only notes: {id}_{timestamp}.txt = no conflicts
 # Uses sync.py append-only logic for conflict-free sync
+# Edits/acks/deletes are events (notes/events/, see events.py) keyed by the file stem
 
-import sys, subprocess as sp
+import sys, os, re, json, time, math, sqlite3, unicodedata, subprocess as sp
 from pathlib import Path
-from datetime import datetime
-from _common import DEVICE_ID, SYNC_ROOT
-from .sync import _sync, ts, add_timestamps
+from datetime import datetime, timedelta
+from _common import DEVICE_ID, SYNC_ROOT, shard, shard_files, records, parse_kv, db, _MONTH
+from .sync import _sync, ts, add_timestamps, revalidate, synced_ago
+from . import events
 
 NOTES_DIR = SYNC_ROOT / 'notes'
+TASKS_DIR = SYNC_ROOT / 'tasks'
 
-def _save(text, status='pending', project=None, due=None, device=None):
+def _body(text, status='pending', project=None, due=None, device=None, created=None):
+    content = f"Text: {text}\nStatus: {status}\nDevice: {device or DEVICE_ID}\nCreated: {created or f'{datetime.now():%Y-%m-%d %H:%M}'}\n"
+    if project:
+        content += f"Project: {project}\n"
+    if due:
+        content += f"Due: {due}\n"
+    return content
+
+def _save(text, status='pending', project=None, due=None, device=None, sync=True):
     """Save a new note with timestamp"""
     NOTES_DIR.mkdir(parents=True, exist_ok=True)
     # Create filename: first 8 chars of content hash + timestamp
     slug = hex(hash(text) & 0xffffffff)[2:].zfill(8)
     filename = f'{slug}_{ts()}.txt'
-    content = f"Text: {text}\nStatus: {status}\nDevice: {device or DEVICE_ID}\nCreated: {datetime.now():%Y-%m-%d %H:%M}\n"
-    if project:
-        content += f"Project: {project}\n"
-    if due:
-        content += f"Due: {due}\n"
-    (NOTES_DIR / filename).write_text(content)
-    _sync(silent=True)
+    (shard(NOTES_DIR) / filename).write_text(_body(text, status, project, due, device))
+    sync and _sync(silent=True, wait=False)
     return filename
 
+def _when(created):
+    """datetime of a Created: value (python or C format), else None"""
+    for f in ('%Y-%m-%d %H:%M', '%Y%m%dT%H%M%S', '%Y-%m-%d'):
+        try: return datetime.strptime(str(created), f)
+        except ValueError: pass
+    return None
+
+_ID = re.compile(r'^[0-9a-f]{8}_(\d{4})(\d\d)\d\dT\d{6}\.\d{9}$')
+
+def _import(lines):
+    """One note per line: a JSON object with export's fields, or plain text. An exported id is
+    kept as the file name (same note, same place; already there = skipped, so re-importing is
+    harmless), else a Created time picks the month shard. Syncs once; returns the count"""
+    now, dirs, n = datetime.now(), {}, 0
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        d = None
+        if line[0] == '{':
+            try: d = {k.lower(): v for k, v in json.loads(line).items()}
+            except (ValueError, AttributeError): d = None
+        d = d if d is not None else {'text': line}
+        d = {k: ' '.join(str(v).splitlines()).strip() for k, v in d.items() if v is not None}  # one line each: a field can't add headers
+        text = d.get('text')
+        if not text:
+            continue
+        if m := _ID.match(str(d.get('id', ''))):
+            month, name = f'{m[1]}-{m[2]}', d['id']
+        else:
+            when = _when(d.get('created'))
+            month = f'{when or now:%Y-%m}'
+            name = f'{hex(hash(text) & 0xffffffff)[2:].zfill(8)}_{f"{when:%Y%m%dT%H%M%S}.{time.time_ns() % 1000000000:09d}" if when else ts()}'
+        sd = dirs.get(month) or dirs.setdefault(month, shard(NOTES_DIR, datetime.strptime(month, '%Y-%m')))
+        try:
+            with open(sd / f'{name}.txt', 'x') as f:
+                f.write(_body(text, d.get('status') or 'pending', d.get('project'), d.get('due'), d.get('device'), d.get('created')))
+        except FileExistsError:
+            continue
+        n += 1
+    n and _sync(silent=True)
+    return n
+
+def _export(fmt='jsonl', out=None):
+    """Write every live note newest first, one per line (JSONL, or txt = text only).
+    Streams shard by shard; only one shard's file names are held at a time. Returns the count"""
+    out, ev, n = out or sys.stdout, events.load(NOTES_DIR, dead=True), 0
+    try: ents = list(os.scandir(NOTES_DIR))
+    except OSError: return 0
+    for s in sorted((e.path for e in ents if e.is_dir() and _MONTH.match(e.name)), reverse=True) + [str(NOTES_DIR)]:
+        for f in sorted((x for x in os.listdir(s) if x.endswith('.txt') and x[0] != '.'), key=lambda x: x.rsplit('_', 1)[-1], reverse=True):
+            try:
+                with open(f'{s}/{f}', errors='replace') as fh:
+                    d = _overlay(parse_kv(fh.read()), ev.get(f[:-4], {}))
+            except OSError:
+                continue
+            if d and 'Text' in d:
+                out.write(d['Text'] + '\n' if fmt == 'txt' else json.dumps({'id': f[:-4], **{k.lower(): v for k, v in d.items()}}, ensure_ascii=False) + '\n')
+                n += 1
+    return n
+
 def _load():
-    """Load all notes, sorted by timestamp (newest first)"""
+    """Load all notes from disk, sorted by timestamp (newest first); see revalidate for freshness"""
     NOTES_DIR.mkdir(parents=True, exist_ok=True)
-    _sync(silent=True)
-    notes = []
-    for f in sorted(NOTES_DIR.glob('*.txt'), key=lambda p: p.stem.rsplit('_', 1)[-1] if '_20' in p.stem else '0', reverse=True):
-        if f.name.startswith('.'):
-            continue
-        d = {k.strip(): v.strip() for line in f.read_text().splitlines() if ':' in line for k, v in [line.split(':', 1)]}
-        if 'Text' in d:
+    notes, ev = [], events.load(NOTES_DIR, dead=True)
+    for f, d in sorted(((Path(f), d) for f, d in records(NOTES_DIR, shard_files(NOTES_DIR))), key=lambda x: x[0].stem.rsplit('_', 1)[-1] if '_20' in x[0].stem else '0', reverse=True):
+        d = _overlay(d, ev.get(f.stem, {}))
+        if d and 'Text' in d:
             notes.append((f.stem, d['Text'], d.get('Due'), d.get('Project'), d.get('Device', DEVICE_ID), d.get('Status', 'pending'), d.get('Created'), f))
     return notes
 
-def _update(old_file, text, status='pending', project=None, due=None, device=None):
-    """Update note by archiving old and creating new version"""
-    # Archive old version
-    archive = NOTES_DIR / '.archive'
-    archive.mkdir(exist_ok=True)
-    if old_file.exists():
-        old_file.rename(archive / old_file.name)
-    # Save new version
-    return _save(text, status, project, due, device)
-
-def _rm(filepath):
-    """Delete a note (move to archive)"""
-    archive = NOTES_DIR / '.archive'
-    archive.mkdir(exist_ok=True)
-    if filepath.exists():
-        filepath.rename(archive / filepath.name)
-    _sync(silent=True)
+def _overlay(d, e):
+    """File fields with the note's event fields on top; None once it was rm'd"""
+    if e.get('_rm'):
+        return None
+    d.update({k.capitalize(): v for k, v in e.items() if k[0] != '_'})
+    return d
+
+# Search index: FTS5 over Text/Project/Due/Status in aio.db. A note file never changes once
+# written, so it is indexed once by name; a search re-indexes only files in shard dirs whose
+# mtime moved and notes named by events appended since the last search.
+# note_due rides along: a B-tree on Due for pending notes, so "what's due" is a range scan.
+_TOK = re.compile(r'"[^"]*"\*?|\S+')
+_DATE = re.compile(r'^\d{4}-\d\d-\d\d')
+FTS_COLS = ('text', 'project', 'due', 'status')
+RANK_MAX = 1000  # bm25 over the newest RANK_MAX hits only: ranking is ~5us/hit, a common word hits thousands
+IX_V = 2  # bump when the tables below change: the next refresh rebuilds
+
+_ix_c = None  # one connection per process: the interactive loop searches again and again
+def _ix_db():
+    global _ix_c
+    if _ix_c:
+        return _ix_c
+    c = db()
+    c.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS note_fts USING fts5({', '.join(FTS_COLS)}, id UNINDEXED, path UNINDEXED, device UNINDEXED, created UNINDEXED, prefix='2 3')")
+    c.execute("CREATE TABLE IF NOT EXISTS note_ix(n INTEGER PRIMARY KEY, id TEXT NOT NULL, dir TEXT NOT NULL)")  # n = note_fts rowid
+    c.execute("CREATE INDEX IF NOT EXISTS note_ix_id ON note_ix(id)")
+    c.execute("CREATE INDEX IF NOT EXISTS note_ix_dir ON note_ix(dir)")
+    c.execute("CREATE TABLE IF NOT EXISTS note_ix_meta(k TEXT PRIMARY KEY, v TEXT NOT NULL)")
+    c.execute("CREATE VIRTUAL TABLE IF NOT EXISTS note_vocab USING fts5vocab(note_fts, col)")  # per-word doc counts (df)
+    c.execute("CREATE TABLE IF NOT EXISTS note_due(n INTEGER PRIMARY KEY, due TEXT NOT NULL, id, text, project, device, created, path)")  # pending notes with a Due date; fields copied so a query never touches note_fts
+    c.execute("CREATE INDEX IF NOT EXISTS note_due_due ON note_due(due)")
+    c.execute("CREATE TABLE IF NOT EXISTS note_due_sent(id TEXT NOT NULL, due TEXT NOT NULL, PRIMARY KEY(id, due))")  # reminders fired here
+    _ix_c = c
+    return c
+
+def _ix_stat(root):
+    """{dir: mtime_ns} of the notes folder + month shards, {segment: size} of its event log"""
+    dirs = {root: os.stat(root).st_mtime_ns}
+    dirs.update({e.path: e.stat().st_mtime_ns for e in os.scandir(root) if e.is_dir() and _MONTH.match(e.name)})
+    return dirs, {s: os.path.getsize(s) for s in events.segments(root)}
+
+def _ix_state(c):
+    r = c.execute("SELECT v FROM note_ix_meta WHERE k='state'").fetchone()
+    return json.loads(r[0]) if r else {}
+
+def _ix_put(c, n, nid, path, e):
+    """(Re)write note_fts/note_due row n from the file plus its events"""
+    c.execute("DELETE FROM note_fts WHERE rowid=?", (n,))
+    c.execute("DELETE FROM note_due WHERE n=?", (n,))
+    try: d = _overlay(parse_kv(Path(path).read_text(errors='replace')), e)
+    except OSError: return
+    if d and 'Text' in d:
+        c.execute("INSERT INTO note_fts(rowid, text, project, due, status, id, path, device, created) VALUES(?,?,?,?,?,?,?,?,?)",
+                  (n, d['Text'], d.get('Project'), d.get('Due'), d.get('Status', 'pending'), nid, path, d.get('Device', DEVICE_ID), d.get('Created')))
+        if d.get('Status', 'pending') == 'pending' and _DATE.match(d.get('Due') or ''):
+            c.execute("INSERT INTO note_due VALUES(?,?,?,?,?,?,?,?)", (n, d['Due'][:10], nid, d['Text'], d.get('Project'), d.get('Device', DEVICE_ID), d.get('Created'), path))
+
+def _ix_refresh(c):
+    """Bring note_fts up to date with NOTES_DIR; a few stats when nothing moved"""
+    root = str(NOTES_DIR)
+    dirs, segs = _ix_stat(root)
+    st = _ix_state(c)
+    if st.get('root') == root and st.get('v') == IX_V and st['dirs'] == dirs and all(st['offs'].get(s) == z for s, z in segs.items()):
+        return
+    c.execute("BEGIN IMMEDIATE")  # one refresher at a time; re-read what the last one left
+    try:
+        st = _ix_state(c)
+        if st.get('root') != root or st.get('v') != IX_V or set(st['offs']) - set(segs) or any(z < st['offs'].get(s, 0) for s, z in segs.items()):
+            c.execute("DELETE FROM note_ix"); c.execute("DELETE FROM note_fts"); c.execute("DELETE FROM note_due")  # first run, other folder, new tables or rewritten log
+            st = {'root': root, 'dirs': {}, 'offs': {}, 'v': IX_V}
+        gone, new, touched, now = [], [], set(), time.time_ns()
+        for d in set(st['dirs']) - set(dirs):
+            gone += [n for n, in c.execute("SELECT n FROM note_ix WHERE dir=?", (d,))]; del st['dirs'][d]
+        for d, m in dirs.items():
+            if st['dirs'].get(d) == m: continue
+            have = dict(c.execute("SELECT id, n FROM note_ix WHERE dir=?", (d,)))
+            disk = {f[:-4] for f in os.listdir(d) if f.endswith('.txt') and f[0] != '.'}
+            gone += [have[i] for i in have.keys() - disk]; new += [(d, i) for i in disk - have.keys()]
+            st['dirs'][d] = -1 if now - m < 1_000_000_000 else m  # racy mtime: list again next time
+        for s, z in segs.items():
+            off = st['offs'].get(s, 0)
+            if z == off: continue
+            with open(s, 'rb') as f:
+                f.seek(off); b = f.read()
+            end = b.rfind(b'\n') + 1  # skip a half-written last line
+            for line in b[:end].splitlines():
+                try: touched.add(json.loads(line)['id'])
+                except (ValueError, KeyError): pass
+            st['offs'][s] = off + end
+        c.executemany("DELETE FROM note_fts WHERE rowid=?", [(n,) for n in gone])
+        c.executemany("DELETE FROM note_due WHERE n=?", [(n,) for n in gone])
+        c.executemany("DELETE FROM note_ix WHERE n=?", [(n,) for n in gone])
+        if new or touched:
+            ev = events.load(root, dead=True)
+            for d, i in sorted(new, key=lambda x: x[1].rsplit('_', 1)[-1]):  # rowid follows note time
+                n = c.execute("INSERT INTO note_ix(id, dir) VALUES(?,?)", (i, d)).lastrowid
+                _ix_put(c, n, i, f'{d}/{i}.txt', ev.get(i, {}))
+            touched -= {i for _, i in new}
+            for i in touched:
+                for n, d in c.execute("SELECT n, dir FROM note_ix WHERE id=?", (i,)).fetchall():
+                    _ix_put(c, n, i, f'{d}/{i}.txt', ev.get(i, {}))
+        c.execute("INSERT OR REPLACE INTO note_ix_meta VALUES('state', ?)", (json.dumps(st),))
+        c.commit()
+    except BaseException:
+        c.rollback(); raise
+
+def _fts_query(q):
+    """User query -> FTS5 MATCH: words match as prefixes, "quoted phrases" as phrases,
+    field:word within one of FTS_COLS; AND/OR/NOT pass through"""
+    out = []
+    for t in _TOK.findall(q):
+        if t in ('AND', 'OR', 'NOT'):
+            out.append(t); continue
+        col, _, w = t.partition(':') if t[0] != '"' and t.split(':', 1)[0] in FTS_COLS else ('', '', t)
+        if w.startswith('"'):
+            w = '"' + w.rstrip('*').strip('"').replace('"', '') + '"' + ('*' if w.endswith('*') else '')
+        elif w.rstrip('*'):
+            w = '"' + w.rstrip('*').replace('"', '') + '"*'
+        else:
+            continue
+        out.append(f'{col}:{w}' if col else w)
+    return ' '.join(out)
+
+def _ranked(c, m, status='pending', limit=256):
+    """Rows matching FTS5 expression m, bm25 order over the newest RANK_MAX hits"""
+    lo = c.execute("SELECT rowid FROM note_fts WHERE note_fts MATCH ? ORDER BY rowid DESC LIMIT 1 OFFSET ?", (m, RANK_MAX - 1)).fetchone()
+    rows = c.execute("SELECT id, text, due, project, device, status, created, path FROM note_fts WHERE note_fts MATCH ? AND rowid >= ? AND status=? ORDER BY rank LIMIT ?",
+                     (m, lo[0] if lo else 0, status, limit)).fetchall()
+    return [r[:7] + (Path(r[7]),) for r in rows]
+
+def _search(q, status='pending', limit=256):
+    """Notes matching q, best first (bm25 over the newest RANK_MAX hits), in _load's tuple shape;
+    plain substring scan if FTS5 is unavailable"""
+    try:
+        c = _ix_db()
+        _ix_refresh(c)
+        return _ranked(c, _fts_query(q) or '""', status, limit)
+    except (sqlite3.Error, OSError):
+        return [n for n in _load() if n[5] == status and q.lower() in n[1].lower()][:limit]
+
+def _horizon(w):
+    """Last Due date inside window w: '7d', '2w', '1m', '3' (days), 'today', 'all'"""
+    if w == 'all':
+        return '9999-12-31'
+    m = re.fullmatch(r'(\d+)([dwm]?)', w or '0') if w != 'today' else None
+    days = int(m[1]) * {'': 1, 'd': 1, 'w': 7, 'm': 30}[m[2]] if m else 0
+    return f'{datetime.now() + timedelta(days=days):%Y-%m-%d}'
+
+def _due(w='7d', unsent=False):
+    """Pending notes due by the end of window w (overdue included), soonest first, in _load's tuple shape;
+    unsent: only those this device has not reminded about yet (same note, same Due)"""
+    c = _ix_db()
+    _ix_refresh(c)
+    rows = c.execute("SELECT d.id, d.text, d.due, d.project, d.device, 'pending', d.created, d.path FROM note_due d "
+                     + ("LEFT JOIN note_due_sent s ON s.id = d.id AND s.due = d.due WHERE s.id IS NULL AND " if unsent else "WHERE ")
+                     + "d.due <= ? ORDER BY d.due, d.n", (_horizon(w),)).fetchall()
+    return [r[:7] + (Path(r[7]),) for r in rows]
+
+def _mark_sent(notes):
+    """Record _due(..., unsent=True) notes as reminded; call only once the reminder went out"""
+    with _ix_db() as c:
+        c.executemany("INSERT OR IGNORE INTO note_due_sent VALUES(?,?)", [(n[0], n[2]) for n in notes])
+
+# Similar notes: bm25 (FTS5's TF-IDF weighting, run in C) over an OR of a note's rarest
+# words picks candidates, word-set Jaccard says how alike they are. No model, no NumPy.
+_WORD = re.compile(r'[^\W_]+')
+SIM_CAND = 300  # postings budget: take the rarest words until their doc counts reach this
+SIM_DUP = 0.6  # Jaccard at which two notes count as near-duplicates (save warning, clusters)
+
+def _words(t):
+    """Word set as FTS5's unicode61 tokenizer sees it (lowercase, diacritics folded)"""
+    t = t.lower()
+    if not t.isascii():
+        t = ''.join(ch for ch in unicodedata.normalize('NFKD', t) if not unicodedata.combining(ch))
+    return set(_WORD.findall(t))
+
+def _jac(a, b):
+    return len(a & b) / len(a | b) if a | b else 0.0
+
+def _candidates(ws, k):
+    """bm25's top k pending notes for an OR of the rarest words in ws (postings up to SIM_CAND)"""
+    c = _ix_db()
+    _ix_refresh(c)
+    df = dict(c.execute(f"SELECT term, doc FROM note_vocab WHERE col='text' AND term IN ({','.join('?' * len(ws))})", sorted(ws))) if ws else {}
+    pick, tot = [], 0
+    for w in sorted(df, key=df.get):  # rarest first: they say the most and cost the least
+        if pick and tot + df[w] > SIM_CAND:
+            break
+        pick.append(w); tot += df[w]
+    return _ranked(c, 'text:(' + ' OR '.join(f'"{w}"' for w in pick) + ')', limit=k) if pick else []
+
+def _similar(text, k=10, skip=None):
+    """[(jaccard, note)] for the k pending notes most like text: bm25's top 4k, best Jaccard first; skip = an id to leave out.
+    Scores every pending note if FTS5 is unavailable"""
+    ws = _words(text)
+    try:
+        hits = _candidates(ws, 4 * k + 1)
+    except (sqlite3.Error, OSError):
+        hits = _pending()
+    return sorted(((_jac(ws, _words(n[1])), n) for n in hits if n[0] != skip), key=lambda x: -x[0])[:k]
+
+def _dup(text):
+    """'~ 83% like: <note>' if a pending note is a near-duplicate of text; only once the index exists"""
+    try:
+        if not _ix_state(_ix_db()):
+            return None  # never built here: don't make a quick add pay for the first build
+        j, n = (_similar(text, 1) or [(0, None)])[0]
+    except (sqlite3.Error, OSError):
+        return None
+    return f"~ {j:.0%} like: {n[1]}" if j >= SIM_DUP else None
+
+def _tasks():
+    """[(title, path)] of a task entries (NNNNN-slug_ts), titled as task.c shows them"""
+    try: names = os.listdir(TASKS_DIR)
+    except OSError: return []
+    return [(re.split(r'_|\.txt', nm[6:] if re.match(r'\d{5}-', nm) else nm)[0].replace('-', ' '), f'{TASKS_DIR}/{nm}')
+            for nm in names if nm[0] != '.' and nm != 'README.md']
+
+def _pending():
+    """Pending notes in the order triage numbers them (_load's: newest first)"""
+    return [n for n in _load() if n[5] == 'pending']
+
+def _clusters(notes, th=SIM_DUP):
+    """Near-duplicate groups (2+ notes) linked by Jaccard >= th, as a prefix-filtered set join (PPJoin):
+    going shortest first, a note only meets earlier ones sharing one of its rarest words and within th of its size"""
+    ws = [_words(n[1]) for n in notes]
+    df, post, up = {}, {}, list(range(len(notes)))
+    for s in ws:
+        for w in s: df[w] = df.get(w, 0) + 1
+    def root(i):
+        while up[i] != i:
+            up[i] = up[up[i]]; i = up[i]
+        return i
+    k = th / (1 + th)  # |a & b| >= k * (|a| + |b|)  <=>  Jaccard >= th
+    for i in sorted(range(len(ws)), key=lambda i: len(ws[i])):
+        a = ws[i]
+        ra = sorted(a, key=lambda w: (df[w], w))
+        seen = set()
+        for w in ra[:len(a) - math.ceil(th * len(a)) + 1]:  # probe prefix
+            for j in post.get(w, ()):
+                if j not in seen and len(ws[j]) >= th * len(a):
+                    seen.add(j)
+                    if len(a & ws[j]) >= k * (len(a) + len(ws[j])) and root(i) != root(j):
+                        up[root(j)] = root(i)
+        for w in ra[:len(a) - math.ceil(2 * k * len(a)) + 1]:  # index prefix: enough against longer notes
+            post.setdefault(w, []).append(i)
+    groups = {}
+    for i in range(len(notes)):
+        groups.setdefault(root(i), []).append(notes[i])
+    return sorted((g for g in groups.values() if len(g) > 1), key=len, reverse=True)
+
+def _update(old_file, text=None, status=None, project=None, due=None, sync=True):
+    """Record changed fields as an event on the note (file itself is never rewritten)"""
+    events.emit(NOTES_DIR, 'ack' if status == 'done' else 'update', old_file.stem, text=text, status=status, project=project, due=due)
+    sync and _sync(silent=True, wait=False)
+
+def _rm(filepath, sync=True):
+    """Delete a note (rm event; hidden everywhere once synced)"""
+    events.emit(NOTES_DIR, 'rm', filepath.stem)
+    sync and _sync(silent=True, wait=False)
+
+def _merge(cur, fresh, i):
+    """Rebase triage queue cur (cursor i) on fresh, a reload after a background sync.
+    Notes keep their place with fresh's fields, ones acked/removed elsewhere drop out,
+    new ones queue right after the cursor. Returns (queue, cursor)"""
+    by, seen = {n[0]: n for n in fresh}, {n[0] for n in cur}
+    at = cur[i][0] if i < len(cur) else None
+    j = sum(n[0] in by for n in cur[:i])
+    out = [by[n[0]] for n in cur if n[0] in by]
+    k = j + (at in by)
+    return out[:k] + [n for n in fresh if n[0] not in seen] + out[k:], j
 
 def run():
-    raw = ' '.join(sys.argv[2:]) if len(sys.argv) > 2 else None
-    notes = _load()
-    pending = [n for n in notes if n[5] == 'pending']
+    a = sys.argv[2:]
+    raw = ' '.join(a) if a else None
+
+    # Bulk: a n import <file|->, a n export [jsonl|txt] (anything else is a note)
+    if a[:1] == ['export'] and a[1:] in ([], ['jsonl'], ['txt']):
+        try:
+            _export(a[1] if a[1:] else 'jsonl')
+            sys.stdout.flush()
+        except BrokenPipeError:  # export | head
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return
+    if a[:1] == ['import'] and len(a) == 2 and (a[1] == '-' or os.path.exists(a[1])):  # a missing path is note text
+        try:
+            with (sys.stdin if a[1] == '-' else open(a[1], errors='replace')) as f:
+                print(f"✓ {_import(f)} notes")
+        except OSError as e:  # a directory, unreadable
+            print(f"x {a[1]}: {e.strerror}")
+        return
+
+    # a n due [window], a n due remind [window]: from the due index, no folder scan
+    rem = a[1:2] == ['remind']
+    w = a[1 + rem:]
+    if a[:1] == ['due'] and len(w) <= 1 and (not w or re.fullmatch(r'\d+[dwm]?|today|all', w[0])):
+        today = f'{datetime.now():%Y-%m-%d}'
+        due = _due(w[0] if w else '0d', unsent=True) if rem else _due(w[0] if w else '7d')
+        for nid, t, d, p, _, _, _, _ in due:
+            print(f"{'!' if d < today else ' '} {d}  {t}" + (f" @{p}" if p else ""))
+        rem and _mark_sent(due)
+        return
+
+    # a n similar [#|id]: notes and tasks like pending note # (as numbered in triage), else near-duplicate clusters
+    if a[:1] == ['similar'] and len(a) <= 2:
+        pending = _pending()
+        if len(a) == 1:
+            for g in _clusters(pending):
+                print(f"{len(g)}:" + ''.join(f"\n  {n[1]}" + (f" @{n[3]}" if n[3] else "") for n in g[:5]) + (f"\n  +{len(g) - 5}" if len(g) > 5 else ""))
+            return
+        n = pending[int(a[1]) - 1] if a[1].isdigit() and 0 < int(a[1]) <= len(pending) else next((x for x in pending if x[0] == a[1]), None)
+        if not n:
+            print(f"x {a[1]}?"); return
+        print(n[1])
+        for j, m in _similar(n[1], skip=n[0]):
+            print(f"  {j:4.0%}  {m[1]}" + (f" @{m[3]}" if m[3] else ""))
+        ws = _words(n[1])
+        for j, t in sorted(((_jac(ws, _words(t)), t) for t, _ in _tasks()), reverse=True)[:3]:
+            j and print(f"  {j:4.0%}  task: {t}")
+        return
 
     # Quick add
     if raw and raw[0] != '?':
+        d = _dup(raw)  # before the save, or the index would find the note itself
         _save(raw)
-        print("✓")
+        print("✓" + (f" {d}" if d else ""))
         return
 
-    # Search filter
-    if raw:
-        pending = [n for n in pending if raw[1:].lower() in n[1].lower()]
+    # List what's on disk now, sync in the background
+    changed = revalidate()
+    q = raw[1:] if raw else ''
+    find = lambda: _search(q) if q else _pending()
+    pending = find()
 
     if not pending:
         print("a n <text>")
@@ -78,47 +443,67 @@ def run():
     if not sys.stdin.isatty():
         for nid, t, _, p, _, _, _, _ in pending[:10]:
             print(f"{t}" + (f" @{p}" if p else ""))
+        print(f"({synced_ago()})", file=sys.stderr)
         return
 
-    # Interactive mode
+    # Interactive mode: work on pending in memory; edits go to disk at once and are pushed
+    # by one background sync at a time, remote changes are merged in between prompts
     url = sp.run(['git', '-C', str(SYNC_ROOT), 'remote', 'get-url', 'origin'], capture_output=True, text=True).stdout.strip()
-    print(f"Notes: {len(pending)} pending\n  {NOTES_DIR}\n  {url}\n")
-    print(f"{len(pending)} notes | [a]ck [e]dit [s]earch [q]uit | 1/20=due")
-    i = 0
-    while i < len(pending):
-        nid, txt, due, proj, dev, _, _, filepath = pending[i]
-        print(f"\n[{i+1}/{len(pending)}] {txt}" + (f" @{proj}" if proj else "") + (f" [{due}]" if due else "") + (f" <{dev[:8]}>" if dev else ""))
-        ch = input("> ").strip()
-        if ch == 'a':
-            _update(filepath, txt, 'done', proj, due, dev)
-            print("✓")
-            pending.pop(i)
-            continue
-        elif ch == 'e':
-            nv = input("new: ").strip()
-            if nv:
-                _update(filepath, nv, 'pending', proj, due, dev)
+    try: due = len(_due('0d'))
+    except (sqlite3.Error, OSError): due = 0
+    print(f"Notes: {len(pending)} pending" + (f", {due} due" if due else "") + f" ({synced_ago()})\n  {NOTES_DIR}\n  {url}\n")
+    print(f"{len(pending)} notes | [a]ck [d]el [e]dit [s]earch [q]uit | 1/20=due")
+    i, dirty = 0, False
+    try:
+        while i < len(pending):
+            if changed():  # background sync brought something new
+                pending, i = _merge(pending, find(), i)
+                print(f"↻ {synced_ago()}: {len(pending)} pending")
+                if i >= len(pending):
+                    break
+            if dirty and not changed.busy():
+                changed, dirty = revalidate(force=True), False
+            nid, txt, due, proj, dev, _, _, filepath = pending[i]
+            print(f"\n[{i+1}/{len(pending)}] {txt}" + (f" @{proj}" if proj else "") + (f" [{due}]" if due else "") + (f" <{dev[:8]}>" if dev else ""))
+            ch = input("> ").strip()
+            if ch in ('a', 'd'):
+                _update(filepath, status='done', sync=False) if ch == 'a' else _rm(filepath, sync=False)
                 print("✓")
-            pending = [n for n in _load() if n[5] == 'pending']
-            continue
-        elif '/' in ch:
-            from dateutil.parser import parse
-            d = str(parse(ch, dayfirst=False))[:10]
-            _update(filepath, txt, 'pending', proj, d, dev)
-            print(f"✓ {d}")
-            pending = [n for n in _load() if n[5] == 'pending']
-            continue
-        elif ch == 's':
-            q = input("search: ")
-            pending = [n for n in _load() if n[5] == 'pending' and q.lower() in n[1].lower()]
-            i = 0
-            print(f"{len(pending)} results")
-            continue
-        elif ch == 'q':
-            return
-        elif ch:
-            _save(ch)
-            pending = [n for n in _load() if n[5] == 'pending']
-            print(f"✓ [{len(pending)}]")
-            continue
-        i += 1
+                pending.pop(i)
+                dirty = True
+                continue
+            elif ch == 'e':
+                nv = input("new: ").strip()
+                if nv:
+                    _update(filepath, nv, sync=False)
+                    pending[i] = (nid, nv) + pending[i][2:]
+                    dirty = True
+                    print("✓")
+                continue
+            elif '/' in ch:
+                from dateutil.parser import parse
+                d = str(parse(ch, dayfirst=False))[:10]
+                _update(filepath, due=d, sync=False)
+                pending[i] = (nid, txt, d) + pending[i][3:]
+                dirty = True
+                print(f"✓ {d}")
+                continue
+            elif ch == 's':
+                q = input("search: ").strip()
+                pending = find()
+                i = 0
+                print(f"{len(pending)} results")
+                continue
+            elif ch == 'q':
+                return
+            elif ch:
+                dup = _dup(ch)
+                f = shard(NOTES_DIR) / _save(ch, sync=False)
+                pending.insert(0, (f.stem, ch, None, None, DEVICE_ID, 'pending', f'{datetime.now():%Y-%m-%d %H:%M}', f))
+                i += 1  # stay on the note being triaged
+                dirty = True
+                print(f"✓ [{len(pending)}]" + (f" {dup}" if dup else ""))
+                continue
+            i += 1
+    finally:  # push what this session wrote; a sync still running is waited for by the detached one (repo lock), not by us
+        dirty and revalidate(force=True)
@@ -2,19 +2,19 @@
 import sys, os, subprocess as sp, re, shutil, base64
 from pathlib import Path
 from concurrent.futures import ThreadPoolExecutor as TP
-from _common import _up, _die, DATA_DIR
-from .sync import sync, SYNC_ROOT
+from _common import _up, _die, DATA_DIR, records
+from .sync import sync, SYNC_ROOT, revalidate, synced_ago
 
 SSH_DIR = SYNC_ROOT / 'ssh'
 def _parse(f): return {k.strip(): v.strip() for line in f.read_text().splitlines() if ':' in line for k, v in [line.split(':', 1)]}
 def _save(n, h, pw=None, **kw):
     SSH_DIR.mkdir(parents=True, exist_ok=True); d = _parse(SSH_DIR/f'{n}.txt') if (SSH_DIR/f'{n}.txt').exists() else {}
     d.update({'Name': n, 'Host': h}); pw and d.update({'Password': pw}); d.update({k: v for k, v in kw.items() if v})
-    (SSH_DIR/f'{n}.txt').write_text('\n'.join(f"{k}: {v}" for k, v in d.items() if v) + '\n'); sync('ssh')
+    (SSH_DIR/f'{n}.txt').write_text('\n'.join(f"{k}: {v}" for k, v in d.items() if v) + '\n'); sync('ssh', wait=False)
 def _load():
-    SSH_DIR.mkdir(parents=True, exist_ok=True); sync('ssh')
-    return [d for f in sorted(SSH_DIR.glob('*.txt')) if (d := _parse(f)).get('Name')]
-def _rm(n): (SSH_DIR/f'{n}.txt').unlink(missing_ok=True); sync('ssh')
+    SSH_DIR.mkdir(parents=True, exist_ok=True)  # disk as-is; run() revalidates in the background
+    return [d for _, d in records(SSH_DIR) if d.get('Name')]
+def _rm(n): (SSH_DIR/f'{n}.txt').unlink(missing_ok=True); sync('ssh', wait=False)
 def _os(): return sp.run('uname -sr 2>/dev/null || echo unknown', shell=True, capture_output=True, text=True).stdout.strip()
 
 def run():
@@ -25,12 +25,9 @@ def run():
         except: return '?'
     def _sshd_port(): return 8022 if os.environ.get('TERMUX_VERSION') else 22
 
-    raw = _load(); hosts = [(d.get('Name','?'), d.get('Host')) for d in raw]; hmap = {d['Name']: d['Host'] for d in raw if d.get('Host')}; pwmap = {d['Name']: d.get('Password') for d in raw}; osmap = {d['Name']: d.get('OS') for d in raw}
-
     if wda == 'start': r = sp.run(['sshd'], capture_output=True, text=True) if os.environ.get('TERMUX_VERSION') else sp.run(['sudo', '/usr/sbin/sshd'], capture_output=True, text=True); print(f"✓ sshd started (port {_sshd_port()})") if r.returncode == 0 or _sshd_running() else print(f"x sshd failed: {r.stderr.strip() or 'install openssh-server'}"); return
     if wda == 'stop': sp.run(['pkill', '-x', 'sshd']) if os.environ.get('TERMUX_VERSION') else sp.run(['sudo', 'pkill', '-x', 'sshd']); print("✓ sshd stopped" if not _sshd_running() else "x failed"); return
     if wda in ('status', 's'): u, ip, p = os.environ.get('USER', 'u0_a'), _sshd_ip(), _sshd_port(); print(f"{'✓ RUNNING' if _sshd_running() else 'x STOPPED'}  ssh {u}@{ip} -p {p}"); return
-    if not wda: u, ip, p = os.environ.get('USER', 'u0_a'), _sshd_ip(), _sshd_port(); me = next((n for n,h in hosts if ip in h), None); url = sp.run(['git','-C',str(SSH_DIR),'remote','get-url','origin'], capture_output=True, text=True).stdout.strip(); shutil.which('ssh') or print("! pkg install openssh"); print(f"SSH {'✓ ON' if _sshd_running() else 'x OFF'}  →  ssh {u}@{ip} -p {p}{' ('+me+')' if me else ' [not in list]'}\n  {SSH_DIR}\n  {url}\n  start/stop/status  server control\n  setup              install & configure\n  self [name]        add this device\n  add/rm/mv/pw <#>   manage hosts\n  all \"cmd\"          run cmd on all hosts\n  Termux: run 'passwd' to set password before 'a ssh self'\nHosts:"); up=list(TP(8).map(_up,[h or '' for _,h in hosts])); [print(f"  {i}. x {n}: missing Name:/Host:") if not h else print(f"  {i}. {'✓x'[not up[i]]} {n}: {h}{' [pw]' if pwmap.get(n) else ''}{' <- this' if n==me else ''}") for i,(n,h) in enumerate(hosts)] or print("  (none)"); (any(not x for x in up) and not sp.run("ping -c1 -W1 $(ip route|awk '/default/{print $3}')",shell=True,capture_output=True).returncode) and print("! Unreachable hosts - check AP isolation (wired↔wifi blocked)"); print(f"\nAI: a ssh <#|name> cmd"); return
     if wda == 'setup': ip = _sshd_ip(); u = os.environ.get('USER', 'user'); ok = _sshd_running(); cmd = 'pkg install -y openssh && sshd' if os.environ.get('TERMUX_VERSION') else 'sudo apt install -y openssh-server && sudo systemctl enable --now ssh'; (not ok and input("SSH not running. Install? (y/n): ").lower() in ['y', 'yes'] and sp.run(cmd, shell=True)); ok = ok or _sshd_running(); print(f"This: {os.environ.get('HOSTNAME', 'host')} ({u}@{ip}:{_sshd_port()})\nSSH: {'✓ running' if ok else 'x not running'}\n\nTo connect here from another device:\n  ssh {u}@{ip} -p {_sshd_port()}"); return
     if wda == 'key': kf = Path.home()/'.ssh/id_ed25519'; kf.exists() or sp.run(['ssh-keygen','-t','ed25519','-N','','-f',str(kf)]); print(f"Public key:\n{(kf.with_suffix('.pub')).read_text().strip()}"); return
     if wda == 'auth': d = Path.home()/'.ssh'; d.mkdir(exist_ok=True); af = d/'authorized_keys'; k = input("Paste public key: ").strip(); af.open('a').write(f"\n{k}\n"); af.chmod(0o600); print("✓ Added"); return
@@ -64,6 +61,10 @@ def run():
         u=os.environ.get('USER') or sp.run('whoami',shell=True,capture_output=True,text=True).stdout.strip() or 'user'; h=f"{u}@{ip}"+(f":{p}"if p!=22 else""); a=sys.argv[3:]; n=a[0]if a else u; pw=a[1]if len(a)>1 else input("Pw:").strip()
         os.system(f'sshpass -p "{pw}" ssh -oStrictHostKeyChecking=no -p{p} localhost exit')or 0
         _save(n, h, pw, OS=_os()); print(f"✓ {n}={h} [{_os()}]"); return
+    if wda == 'add': h=re.sub(r'\s+-p\s*(\d+)',r':\1',input("Host (user@ip): ").strip()); n=input("Name: ").strip() or h.split('@')[-1].split(':')[0].split('.')[-1]; pw=input("Pw? ").strip() or None; hp=h.rsplit(':',1); 'ok' in sp.run((['sshpass','-p',pw] if pw else [])+['ssh','-o','ConnectTimeout=5','-o','StrictHostKeyChecking=no']+(['-p',hp[1]] if len(hp)>1 else [])+[hp[0],'echo ok'],capture_output=True,text=True).stdout or _die("x auth failed"); _save(n, h, pw); print(f"✓ {n}={h}{' [pw]' if pw else ''}"); return
+    # below here reads host records: serve disk as-is, sync in the background
+    changed = revalidate(); raw = _load(); hosts = [(d.get('Name','?'), d.get('Host')) for d in raw]; hmap = {d['Name']: d['Host'] for d in raw if d.get('Host')}; pwmap = {d['Name']: d.get('Password') for d in raw}; osmap = {d['Name']: d.get('OS') for d in raw}
+    if not wda: u, ip, p = os.environ.get('USER', 'u0_a'), _sshd_ip(), _sshd_port(); me = next((n for n,h in hosts if ip in h), None); url = sp.run(['git','-C',str(SSH_DIR),'remote','get-url','origin'], capture_output=True, text=True).stdout.strip(); shutil.which('ssh') or print("! pkg install openssh"); print(f"SSH {'✓ ON' if _sshd_running() else 'x OFF'}  →  ssh {u}@{ip} -p {p}{' ('+me+')' if me else ' [not in list]'}\n  {SSH_DIR} ({synced_ago()})\n  {url}\n  start/stop/status  server control\n  setup              install & configure\n  self [name]        add this device\n  add/rm/mv/pw <#>   manage hosts\n  all \"cmd\"          run cmd on all hosts\n  Termux: run 'passwd' to set password before 'a ssh self'\nHosts:"); changed() and (hosts := [(d.get('Name','?'), d.get('Host')) for d in _load()]); up=list(TP(8).map(_up,[h or '' for _,h in hosts])); [print(f"  {i}. x {n}: missing Name:/Host:") if not h else print(f"  {i}. {'✓x'[not up[i]]} {n}: {h}{' [pw]' if pwmap.get(n) else ''}{' <- this' if n==me else ''}") for i,(n,h) in enumerate(hosts)] or print("  (none)"); (any(not x for x in up) and not sp.run("ping -c1 -W1 $(ip route|awk '/default/{print $3}')",shell=True,capture_output=True).returncode) and print("! Unreachable hosts - check AP isolation (wired↔wifi blocked)"); print(f"\nAI: a ssh <#|name> cmd"); return
     if wda in ('info','i'): [print(f"{n}: ssh {'-p '+hp[1]+' ' if len(hp:=h.rsplit(':',1))>1 else ''}{hp[0]}{' ('+osmap[n]+')' if osmap.get(n) else ''}") for n,h in hosts]; return
     if wda == 'os':
         cmd = 'uname -sr'; results = []
@@ -81,7 +82,6 @@ def run():
     if wda == 'rm' and len(sys.argv) > 3: a=sys.argv[3]; n=hosts[int(a)][0] if a.isdigit() and int(a)<len(hosts) else a; _rm(n); print(f"✓ rm {n}"); return
     if wda == 'pw' and len(sys.argv) > 3: a=sys.argv[3]; n=hosts[int(a)][0] if a.isdigit() and int(a)<len(hosts) else a; pw=input(f"Pw for {n}: ").strip(); _save(n, hmap[n], pw); print(f"✓ {n}"); return
     if wda in ('mv','rename') and len(sys.argv) > 4: o,n=sys.argv[3:5]; _rm(o); _save(n, hmap.get(o,""), pwmap.get(o)); print(f"✓ {o} → {n}"); return
-    if wda == 'add': h=re.sub(r'\s+-p\s*(\d+)',r':\1',input("Host (user@ip): ").strip()); n=input("Name: ").strip() or h.split('@')[-1].split(':')[0].split('.')[-1]; pw=input("Pw? ").strip() or None; hp=h.rsplit(':',1); 'ok' in sp.run((['sshpass','-p',pw] if pw else [])+['ssh','-o','ConnectTimeout=5','-o','StrictHostKeyChecking=no']+(['-p',hp[1]] if len(hp)>1 else [])+[hp[0],'echo ok'],capture_output=True,text=True).stdout or _die("x auth failed"); _save(n, h, pw); print(f"✓ {n}={h}{' [pw]' if pw else ''}"); return
     nm = hosts[int(wda)][0] if wda.isdigit() and int(wda) < len(hosts) else (_die(f"x No host #{wda}. Run: a ssh") if wda.isdigit() else wda); shutil.which('ssh') or _die("x ssh not installed"); h=hmap.get(nm,nm); pw=pwmap.get(nm); hp=h.rsplit(':',1)
     if len(sys.argv)>3:
         tty = sys.stdout.isatty(); cmd = ['ssh'] + (['-tt'] if tty else ['-oConnectTimeout=10']) + ['-oStrictHostKeyChecking=no'] + (['-p',hp[1]] if len(hp)>1 else []) + [hp[0], 'bash -ic '+repr(' '.join(sys.argv[3:]))+' 2>&1']
@@ -45,12 +45,18 @@
   git+github:  ~/projects/adata/git/ -> a-git repo (common ssh login hub notes workspace docs tasks)
 All files use append-only timestamps."""
 
-import os, subprocess as sp, time, shlex, threading
+import os, sys, subprocess as sp, time, shlex, threading, socket, json, asyncio, queue, shutil, hashlib, re
 from pathlib import Path
-from _common import SYNC_ROOT, RCLONE_BACKUP_PATH, DEVICE_ID, get_rclone, _configured_remotes
+from _common import SYNC_ROOT, DATA_DIR, RCLONE_BACKUP_PATH, DEVICE_ID, get_rclone, _configured_remotes, _git, shard_files, _MONTH
 
 FOLDERS = 'common ssh login notes workspace docs tasks'.split()
 MAX_RETRIES = 3  # retry count for sync
+DEBOUNCE, MAX_BATCH = 0.3, 5.0  # daemon: quiet window before a batch syncs / max age of a batch (s)
+BACKEND = os.environ.get('A_SYNC_BACKEND', 'auto')  # auto | pygit2 | shell (see GIT BACKENDS)
+REMOTE_TTL = 5  # s to trust a cached `ls-remote` of origin/main in the no-change fast path
+last_skip = None  # why the last _sync skipped pull/push (None = it ran)
+BROADCAST_STATUS = Path(DATA_DIR) / 'broadcast.json'  # per-host result of the last _broadcast
+BROADCAST_TIMEOUT = 5  # s per host; hosts are pinged concurrently
 
 # =============================================================================
 # CORE SYNC FUNCTIONS
@@ -65,16 +71,7 @@ def is_conflict(text):
 
 def resolve_conflicts(path):
     """Auto-resolve conflicts: edit wins (accept theirs)"""
-    p = q(path)
-    # Get list of unmerged files
-    r = sp.run(f'cd {p} && git diff --name-only --diff-filter=U', shell=True, capture_output=True, text=True)
-    unmerged = [f for f in r.stdout.strip().split('\n') if f]
-    for f in unmerged:
-        # Edit wins: accept theirs (remote has edits), fallback to ours, fallback to remove
-        sp.run(f'cd {p} && git checkout --theirs {shlex.quote(f)} 2>/dev/null || git checkout --ours {shlex.quote(f)} 2>/dev/null || git rm -f {shlex.quote(f)} 2>/dev/null', shell=True, capture_output=True)
-    # Accept all incoming changes for any remaining conflicts
-    sp.run(f'cd {p} && git checkout --theirs . 2>/dev/null', shell=True, capture_output=True)
-    sp.run(f'cd {p} && git add -A', shell=True, capture_output=True)
+    _backend(path).resolve()
 
 def soft_delete(path, filepath):
     """Archive instead of hard delete (prevents edit vs delete conflicts)"""
@@ -85,103 +82,1219 @@ def soft_delete(path, filepath):
         f.rename(arc / f.name)
 
 # =============================================================================
+# GIT BACKENDS
+# _sync_inline only talks to git through a backend. ShellGit is the original
+# `sh -c` pipeline and always works. Pygit2Git stages, commits, merges and
+# resolves conflicts in-process (no fork/exec) and only runs git for the
+# network steps (fetch/push), which need the user's credential helpers.
+# BACKEND=auto picks pygit2 when it is installed, except for sparse, shallow
+# and partial clones (see _shell_only).
+# =============================================================================
+
+class ShellGit:
+    name = 'shell'
+
+    def __init__(self, path):
+        self.path, self.p = Path(path), q(path)
+
+    def commit(self, msg):
+        """Stage everything and commit (no-op when clean)"""
+        sp.run(f'cd {self.p} && git add -A && git commit -qm {q(msg)}', shell=True, capture_output=True)
+
+    def pull(self):
+        """Merge origin/main into HEAD. Returns git's output (checked by is_conflict)"""
+        r = sp.run(f'cd {self.p} && git pull --no-rebase origin main', shell=True, capture_output=True, text=True)
+        return r.stderr + r.stdout
+
+    def merge(self, ref):
+        """Merge a local ref (a peer's PEER_REF) into HEAD, no network. Output as pull"""
+        r = _git(str(self.path), 'merge', '--no-edit', ref)
+        return r.stderr + r.stdout
+
+    def resolve(self):
+        """Edit wins: accept theirs, fallback to ours, fallback to remove - batched, 3-4 git calls total"""
+        r = sp.run(['git', '-C', str(self.path), 'ls-files', '-u', '-z'], capture_output=True)
+        stages = {}
+        for rec in filter(None, r.stdout.split(b'\0')):
+            meta, f = rec.split(b'\t', 1)
+            stages.setdefault(f, set()).add(meta.split()[2])
+        pick = {b'--theirs': [], b'--ours': [], b'rm': []}
+        for f, st in stages.items():
+            pick[b'--theirs' if b'3' in st else b'--ours' if b'2' in st else b'rm'].append(f)
+        git = ['git', '--literal-pathspecs', '-C', str(self.path)]
+        for how, files in pick.items():
+            if not files: continue
+            cmd = ['rm', '-qf'] if how == b'rm' else ['checkout', how.decode()]
+            sp.run(git + cmd + ['--pathspec-from-file=-', '--pathspec-file-nul'], input=b'\0'.join(files), capture_output=True)
+        sp.run(git + ['add', '-A'], capture_output=True)
+
+    def push(self):
+        """Returns (ok, output)"""
+        r = sp.run(f'cd {self.p} && git push -q origin main', shell=True, capture_output=True, text=True)
+        return r.returncode == 0, r.stderr + r.stdout
+
+    def state(self):
+        """(changed paths, HEAD, origin/main as last fetched) - local files only, no network"""
+        r = sp.run(['git', '-C', str(self.path), 'status', '--porcelain', '-z', '-uall'], capture_output=True)
+        recs, dirty = iter(r.stdout.decode(errors='surrogateescape').split('\0')), []
+        for e in recs:
+            if not e: continue
+            dirty.append(e[3:])
+            e[0] in 'RC' and next(recs, None)  # rename/copy: the source path follows
+        r = _git(str(self.path), 'rev-parse', 'HEAD', 'refs/remotes/origin/main')
+        h = r.stdout.split() if r.returncode == 0 else []
+        return dirty, h[0] if h else None, h[1] if len(h) > 1 else None
+
+    def remote_head(self, ttl=None):
+        """origin's main sha via ls-remote (no pack negotiation), cached for ttl (REMOTE_TTL) seconds"""
+        c = self.path / '.git' / 'a-remote-head'
+        try:
+            if time.time() - c.stat().st_mtime < (REMOTE_TTL if ttl is None else ttl):
+                return c.read_text().strip()
+        except OSError:
+            pass
+        r = _git(str(self.path), 'ls-remote', 'origin', 'refs/heads/main')
+        if r.returncode:
+            return None
+        sha = r.stdout.split()[0] if r.stdout.strip() else ''
+        c.write_text(sha)
+        return sha
+
+class Pygit2Git(ShellGit):
+    name = 'pygit2'
+
+    def __init__(self, path):
+        import pygit2
+        super().__init__(path)
+        self.g, self.repo = pygit2, pygit2.Repository(str(path))
+
+    def _sig(self):
+        try:
+            return self.repo.default_signature
+        except (KeyError, ValueError, self.g.GitError):
+            return self.g.Signature(os.environ.get('GIT_AUTHOR_NAME', DEVICE_ID), os.environ.get('GIT_AUTHOR_EMAIL', f'{DEVICE_ID}@localhost'))
+
+    def _merge_head(self):
+        f = self.path / '.git' / 'MERGE_HEAD'
+        return self.g.Oid(hex=f.read_text()[:40]) if f.exists() else None
+
+    def _stage(self, idx):
+        """git add -A, driven by status so only changed paths are touched"""
+        g = self.g
+        for f, st in self.repo.status().items():
+            if st & g.GIT_STATUS_CONFLICTED:
+                continue
+            if st & g.GIT_STATUS_WT_DELETED:
+                idx.remove(f)
+            elif st & (g.GIT_STATUS_WT_NEW | g.GIT_STATUS_WT_MODIFIED | g.GIT_STATUS_WT_TYPECHANGE):
+                idx.add(f)
+        idx.write()
+
+    def commit(self, msg):
+        try:
+            idx = self.repo.index
+            idx.read()
+            if idx.conflicts:
+                return  # same as `git commit` refusing with unmerged paths
+            self._stage(idx)
+            tree, merge = idx.write_tree(), self._merge_head()
+            head = None if self.repo.head_is_unborn else self.repo.head.target
+            if head and not merge and self.repo[head].tree_id == tree:
+                return
+            sig = self._sig()
+            self.repo.create_commit('HEAD', sig, sig, msg, tree, [p for p in (head, merge) if p])
+            merge and self.repo.state_cleanup()
+        except self.g.GitError:  # e.g. index.lock held by C sync_repo: fails like `git commit` does for ShellGit
+            pass
+
+    def pull(self):
+        r = _git(str(self.path), 'fetch', '-q', 'origin', 'main')
+        if r.returncode:
+            return r.stderr + r.stdout
+        return self._merge(self.g.Oid(hex=(self.path / '.git' / 'FETCH_HEAD').read_text()[:40]), 'origin/main')
+
+    def merge(self, ref):
+        return self._merge(self.repo.references[ref].target, ref)
+
+    def _merge(self, theirs, name):
+        try:
+            an, _ = self.repo.merge_analysis(theirs)
+            if an & self.g.GIT_MERGE_ANALYSIS_UP_TO_DATE:
+                return 'Already up to date.'
+            if an & (self.g.GIT_MERGE_ANALYSIS_FASTFORWARD | self.g.GIT_MERGE_ANALYSIS_UNBORN):
+                self.repo.checkout_tree(self.repo[theirs])
+                self.repo.references.create(self.repo.references['HEAD'].target, theirs, force=True)
+                return 'Fast-forward'
+            self.repo.merge(theirs)
+        except self.g.GitError as e:  # e.g. untracked file in the way
+            return f'error: {e}\nAborting'
+        self.repo.index.read()
+        if self.repo.index.conflicts:
+            return 'CONFLICT: ' + ' '.join(sorted({(o or t or a).path for a, o, t in self.repo.index.conflicts}))
+        self.commit(f'Merge {name}')
+        return 'Merge made'
+
+    def resolve(self):
+        try:
+            idx = self.repo.index
+            idx.read()
+            for anc, ours, theirs in list(idx.conflicts or []):
+                e, path = theirs or ours, (theirs or ours or anc).path
+                del idx.conflicts[path]
+                f = self.path / path
+                if e:
+                    f.parent.mkdir(parents=True, exist_ok=True)
+                    f.write_bytes(self.repo[e.id].data)
+                    idx.add(self.g.IndexEntry(path, e.id, e.mode))
+                else:
+                    f.unlink(missing_ok=True)
+            self._stage(idx)
+        except self.g.GitError:  # locked index: conflicts stay, the commit after refuses, push is rejected/retried
+            pass
+
+    def push(self):
+        r = _git(str(self.path), 'push', '-q', 'origin', 'main')
+        return r.returncode == 0, r.stderr + r.stdout
+
+    def state(self):
+        t = self.repo.references.get('refs/remotes/origin/main')
+        head = None if self.repo.head_is_unborn else str(self.repo.head.target)
+        return list(self.repo.status()), head, t and str(t.target)
+
+def _unchanged(g, st=None):
+    """Why pull/push can be skipped (clean tree, nothing unpushed, origin unmoved), else None. st: g.state() if already read"""
+    dirty, head, tracked = st or g.state()
+    if dirty or not head or head != tracked or _peer_refs(g.path):
+        return None
+    return f'clean, origin/main unchanged ({head[:8]})' if g.remote_head() == head else None
+
+_SHELL_ONLY = re.compile(r'^\s*(sparsecheckout|promisor)\s*=\s*true\s*$', re.I | re.M)
 
-def _broadcast():
-    """Non-blocking: background thread pings other devices once via SSH"""
+def _shell_only(path):
+    """Sparse, shallow or partial clone: libgit2 ignores sparse-checkout (excluded files look deleted)
+    and cannot lazy-fetch missing objects, so only git itself may touch the repo"""
+    g = Path(path) / '.git'
+    if (g / 'shallow').exists():
+        return True
+    for f in ('config', 'config.worktree'):
+        try:
+            if _SHELL_ONLY.search((g / f).read_text(errors='replace')):
+                return True
+        except OSError:
+            pass
+    return False
+
+def _backend(path):
+    """Git backend for path per BACKEND (shell when pygit2 is missing or the repo is sparse/shallow/partial)"""
+    if BACKEND != 'shell' and not _shell_only(path):
+        try:
+            return Pygit2Git(path)
+        except Exception:  # no pygit2, or not a repo yet: let git report its own error
+            pass
+    return ShellGit(path)
+
+# =============================================================================
+# MONTH SHARDS
+# notes/, activity/ and agents/ gain a file per event forever. Writers put new
+# files in {folder}/YYYY-MM/ (_common.shard); readers use _common.shard_files,
+# which also picks up flat files from devices that haven't migrated yet.
+# The first `a sync` on a repo (_init_repo, once per .git/a-sharded) moves
+# existing flat files into their month (from the timestamp in the name;
+# untimestamped files like hub job definitions stay). Flat files an old
+# device pushes later are still read, and `a sync shard` moves them.
+# =============================================================================
+
+SHARDED = ('notes', 'activity', 'agents')
+_TS_MONTH = re.compile(r'(?:^|_)(\d{4})(\d{2})\d{2}T\d{6}')
+
+def shard_folder(d):
+    """Move flat timestamped *.txt in d into d/YYYY-MM/; returns files moved"""
+    n = 0
+    for e in list(os.scandir(d)) if Path(d).is_dir() else []:
+        if not (e.is_file() and e.name.endswith('.txt')) or not (m := _TS_MONTH.search(e.name)): continue
+        dst = Path(d) / f'{m[1]}-{m[2]}'
+        dst.mkdir(exist_ok=True)
+        os.rename(e.path, dst / e.name); n += 1
+    return n
+
+def shard_all(root=None, folders=SHARDED):
+    """shard_folder over folders of root; {folder: files moved}"""
+    return {f: shard_folder(Path(root or SYNC_ROOT) / f) for f in folders}
+
+def _shard_once(root=None):
+    """shard_all the first time this repo is synced (marker .git/a-sharded), then never on the hot path"""
+    mark = Path(root or SYNC_ROOT) / '.git' / 'a-sharded'
+    if mark.exists(): return None
+    r = shard_all(root)
+    mark.touch()
+    return r
+
+# =============================================================================
+# LARGE BLOBS
+# Files over BLOB_MAX under the sync repo never enter git: before commit they
+# move to BLOB_CACHE/{sha[:2]}/{sha} and are replaced in place by a pointer
+#   A-Blob: sha256:<hex>
+#   Size: <bytes>
+# which git syncs like any note. Bytes go to every rclone remote under
+# adata/blobs/ (detached uploads). read_blob/hydrate resolve a pointer from
+# the local cache, fetching from the remote on first read.
+# =============================================================================
+
+BLOB_MAX = int(os.environ.get('A_BLOB_MAX', 50 << 20))  # GitHub warns at 50MB, rejects 100MB
+BLOB_CACHE = Path(DATA_DIR) / 'blobs'
+_PTR = b'A-Blob: sha256:'
+
+def _blob_cache(sha):
+    return BLOB_CACHE / sha[:2] / sha
+
+def is_pointer(path):
+    p = Path(path)
+    try: return p.stat().st_size < 256 and p.read_bytes().startswith(_PTR)
+    except OSError: return False
+
+def _pointer_sha(path):
+    return Path(path).read_bytes()[len(_PTR):].split(b'\n', 1)[0].decode()
+
+def _pointerize(path, rels):
+    """Swap those of rels (changed/untracked paths, from g.state) over BLOB_MAX for pointers; returns [(rel, sha)]"""
+    out = []
+    for rel in rels:
+        f = Path(path) / rel
+        try:
+            if f.is_symlink() or f.stat().st_size <= BLOB_MAX: continue
+        except OSError: continue
+        h = hashlib.sha256()
+        with open(f, 'rb') as fh:
+            for b in iter(lambda: fh.read(1 << 20), b''): h.update(b)
+        sha, size = h.hexdigest(), f.stat().st_size
+        c = _blob_cache(sha); c.parent.mkdir(parents=True, exist_ok=True)
+        if c.exists(): f.unlink()  # same bytes already cached
+        else: shutil.move(str(f), c)
+        f.write_bytes(_PTR + f'{sha}\nSize: {size}\n'.encode())
+        out.append((rel, sha))
+        _blob_upload(sha)
+    return out
+
+def _blob_upload(sha):
+    """Detached rclone copyto of one cached blob to every remote (survives the CLI exiting)"""
+    rc = get_rclone()
+    for r in (_configured_remotes() if rc else []):
+        sp.Popen([rc, 'copyto', str(_blob_cache(sha)), f'{r}:{RCLONE_BACKUP_PATH}/blobs/{sha}', '-q'],
+                 stdin=sp.DEVNULL, stdout=sp.DEVNULL, stderr=sp.DEVNULL, start_new_session=True)
+
+def hydrate(path):
+    """Local path holding the real bytes of path (itself if not a pointer); fetches on first read; None if unavailable"""
+    if not is_pointer(path): return Path(path)
+    sha = _pointer_sha(path)
+    c = _blob_cache(sha)
+    if not c.exists():
+        rc, tmp = get_rclone(), c.with_suffix('.part')
+        for r in (_configured_remotes() if rc else []):
+            if sp.run([rc, 'copyto', f'{r}:{RCLONE_BACKUP_PATH}/blobs/{sha}', str(tmp), '-q']).returncode == 0:
+                h = hashlib.sha256()
+                with open(tmp, 'rb') as fh:
+                    for b in iter(lambda: fh.read(1 << 20), b''): h.update(b)
+                if h.hexdigest() == sha: tmp.replace(c); break
+            tmp.unlink(missing_ok=True)
+    return c if c.exists() else None
+
+def read_blob(path):
+    """Bytes of path, resolving a blob pointer lazily"""
+    p = hydrate(path)
+    if p is None: raise FileNotFoundError(f'blob {_pointer_sha(path)} for {path}: not cached, no remote has it')
+    return p.read_bytes()
+
+# =============================================================================
+# SPARSE PROFILES
+# common/sparse/{device}.txt (in the repo, so every device sees every profile)
+# lists the top-level folders this device checks out, e.g.
+#   Folders: notes tasks ssh login workspace
+# `common` is always included (profiles live there) and so are root files.
+# No profile = full checkout. Excluded folders stay in git history: read
+# them with `a sync get <path>` (one file) or add them with `a sync get <folder>`.
+# =============================================================================
+
+def _profile_file(root=None, device=None):
+    return Path(root or SYNC_ROOT) / 'common' / 'sparse' / f'{device or DEVICE_ID}.txt'
+
+def _profile(root=None):
+    """Folders in this device's profile, or None for a full checkout"""
+    f = _profile_file(root)
+    if not f.exists(): return None
+    for line in f.read_text().splitlines():
+        if line.startswith('Folders:'):
+            return ['common'] + [x for x in line.split(':', 1)[1].split() if x != 'common']
+    return None
+
+def _folders(root=None):
+    """FOLDERS this device actually has checked out (what sync scans/timestamps)"""
+    p = _profile(root)
+    return FOLDERS if p is None else [f for f in FOLDERS if f in p]
+
+def apply_profile(root=None):
+    """Make the worktree match the profile; returns the active folder list (None = full)"""
+    root = str(root or SYNC_ROOT)
+    p = _profile(root)
+    cur = _git(root, 'sparse-checkout', 'list') if _git(root, 'config', '--get', 'core.sparseCheckout').stdout.strip() == 'true' else None
+    if p is None:
+        cur and _git(root, 'sparse-checkout', 'disable')
+    elif not cur or sorted(cur.stdout.split()) != sorted(p):
+        _git(root, 'sparse-checkout', 'set', '--cone', *p)
+    return p
+
+def set_profile(folders, root=None):
+    """Write (folders) or remove (empty) this device's profile, commit it via sync, then apply it"""
+    root, f = Path(root or SYNC_ROOT), _profile_file(root)
+    if folders:
+        f.parent.mkdir(parents=True, exist_ok=True)
+        f.write_text(f"Device: {DEVICE_ID}\nFolders: {' '.join(folders)}\n")
+    else:
+        f.unlink(missing_ok=True)
+    _sync(root, silent=True)
+    return apply_profile(root)
+
+def get_sparse(rel, root=None):
+    """Outside-profile access: folder -> check it out now (True, until the next apply), file -> bytes from HEAD, None = missing"""
+    root = str(root or SYNC_ROOT)
+    rel = rel.strip('/')
+    if _git(root, 'cat-file', '-t', f'HEAD:{rel}').stdout.strip() == 'tree':
+        return _profile(root) is None or _git(root, 'sparse-checkout', 'add', rel.split('/')[0]).returncode == 0
+    r = sp.run(['git', '-C', root, 'cat-file', 'blob', f'HEAD:{rel}'], capture_output=True)
+    return r.stdout if r.returncode == 0 else None
+
+# =============================================================================
+# PEERS
+# Devices in ssh/*.txt. After a push every peer is told concurrently. With
+# P2P (default) the new commits go straight to the peer over SSH as a side
+# ref, PEER_REF/<us>, then the same ControlMaster connection has the peer
+# merge it (PEER_MERGE) under its own repo lock, locally, since the commits
+# are already there: a fast-forward under `flock .git/a-sync.lock`, else
+# `a sync merge` (merge_peers: edit-wins merge, or the full sync when the
+# peer's tree is dirty). The peer's HEAD moves before the broadcast reports
+# ok, and every regular sync merges leftover refs too. A sync only broadcasts when its push carried
+# commits of its own, so the peer's merge doesn't echo back. A peer that
+# can't take the push (repo not found) gets the old ping, a `git pull
+# origin main` on the peer. GitHub stays the hub either way.
+# =============================================================================
+
+P2P = os.environ.get('A_SYNC_P2P', '1') != '0'
+PEER_REF = 'refs/a/peers'
+PEER_GIT = '~/projects/adata/git ~/adata/git'  # peer repo candidates unless its ssh/*.txt has Git: <path>
+PEER_MERGE = 'flock .git/a-sync.lock git merge -q --ff-only {ref} 2>/dev/null || a sync merge >/dev/null 2>&1'  # in the peer's repo
+PEER_MERGE_TIMEOUT = 30
+SSH = ['ssh', '-oConnectTimeout=2', '-oStrictHostKeyChecking=no', '-oControlMaster=auto', '-oControlPath=~/.ssh/a-%C', '-oControlPersist=10m']
+
+def _peers(root=None):
+    """(name, host, password, repo dirs) for every other device in ssh/*.txt"""
     hosts = []
-    for f in (SYNC_ROOT / 'ssh').glob('*.txt'):
+    for f in (Path(root or SYNC_ROOT) / 'ssh').glob('*.txt'):
         d = {k.strip(): v.strip() for l in f.read_text().splitlines() if ':' in l for k, v in [l.split(':', 1)]}
         if d.get('Host') and d.get('Name') != DEVICE_ID:
-            hosts.append((d['Host'], d.get('Password')))
-    if not hosts: return
-    def _ping():
-        for h, pw in hosts:
+            hosts.append((d.get('Name', d['Host']), d['Host'], d.get('Password'), d.get('Git', PEER_GIT)))
+    return hosts
+
+def _ssh_argv(h, pw, cmd):
+    """ssh argv that shares one persistent ControlMaster connection per host"""
+    p = h.rsplit(':', 1)
+    return (['sshpass', '-p', pw] if pw else []) + SSH + (['-p', p[1]] if len(p) > 1 else []) + [p[0], cmd]
+
+def _in_repo(dirs, cmd):
+    """Shell snippet: cmd in the first of dirs that exists"""
+    return f'for d in {dirs}; do cd $d 2>/dev/null && break; done && {cmd}'
+
+async def _ping_all(hosts, cmd, timeout=None):
+    """Run cmd in every host's repo at once. Returns {name: {host, ok, rc, ms, at, via}}"""
+    async def one(n, h, pw, dirs):
+        t = time.time()
+        try:
+            # DEVNULL, not PIPE: a ControlPersist master inherits the pipes and would hold them open
+            p = await asyncio.create_subprocess_exec(*_ssh_argv(h, pw, _in_repo(dirs, cmd)), stdin=sp.DEVNULL, stdout=sp.DEVNULL, stderr=sp.DEVNULL)
             try:
-                p = h.rsplit(':', 1)
-                cmd = (['sshpass', '-p', pw] if pw else []) + ['ssh', '-oConnectTimeout=2', '-oStrictHostKeyChecking=no'] + (['-p', p[1]] if len(p) > 1 else []) + [p[0], 'cd ~/projects/adata/git 2>/dev/null && git pull -q origin main || cd ~/adata/git && git pull -q origin main']
-                sp.run(cmd, capture_output=True, timeout=5)
-            except: pass
-    threading.Thread(target=_ping, daemon=True).start()
+                rc = await asyncio.wait_for(p.wait(), timeout or BROADCAST_TIMEOUT)
+            except asyncio.TimeoutError:
+                p.kill()
+                await p.wait()  # reap it, or the killed ssh lingers as a zombie
+                rc = 'timeout'
+        except OSError as e:
+            rc = str(e)
+        return n, {'host': h, 'ok': rc == 0, 'rc': rc, 'ms': round((time.time() - t) * 1000), 'at': int(t), 'via': 'github'}
+    return dict(await asyncio.gather(*(one(*x) for x in hosts)))
+
+def _peer_remote(path, n, h, dirs):
+    """Make peer-<n> a git remote of path: `git fetch peer-<n>` / push work over SSH"""
+    r, (host, _, port) = f'peer-{n}', h.rpartition(':') if ':' in h else (h, '', '')
+    for k, v in (('url', f'ssh://{host}{":" + port if port else ""}/a-git'), ('fetch', f'+refs/heads/main:refs/remotes/{r}/main'),
+                 ('uploadpack', 'sh -c ' + shlex.quote(_in_repo(dirs, 'exec git-upload-pack .'))),
+                 ('receivepack', 'sh -c ' + shlex.quote(_in_repo(dirs, 'exec git-receive-pack .')))):
+        if _git(str(path), 'config', f'remote.{r}.{k}').stdout.strip() != v:
+            _git(str(path), 'config', f'remote.{r}.{k}', v)
+    return r
+
+def _lan_push(path, n, h, pw, dirs):
+    """Push HEAD to the peer as PEER_REF/<us>, then have the peer merge it (PEER_MERGE). (ok, rc)"""
+    r, ref = _peer_remote(path, n, h, dirs), f'{PEER_REF}/{DEVICE_ID}'
+    env = {**os.environ, 'GIT_SSH_COMMAND': shlex.join((['sshpass', '-p', pw] if pw else []) + SSH), 'GIT_SSH_VARIANT': 'ssh'}
+    try:
+        p = sp.run(['git', '-C', str(path), 'push', '-q', '-f', r, f'HEAD:{ref}'], env=env, stdin=sp.DEVNULL, stdout=sp.DEVNULL, stderr=sp.DEVNULL, timeout=BROADCAST_TIMEOUT)
+        if p.returncode:
+            return False, f'push rc {p.returncode}'
+        p = sp.run(_ssh_argv(h, pw, _in_repo(dirs, PEER_MERGE.format(ref=ref))), stdin=sp.DEVNULL, stdout=sp.DEVNULL, stderr=sp.DEVNULL, timeout=PEER_MERGE_TIMEOUT)
+        return p.returncode == 0, f'merge rc {p.returncode}'
+    except sp.TimeoutExpired:
+        return False, 'timeout'
+
+def _peer_refs(path):
+    """PEER_REF/* that other devices pushed here and HEAD doesn't contain yet"""
+    r = _git(str(path), 'for-each-ref', '--no-merged=HEAD', '--format=%(refname)', PEER_REF)
+    return r.stdout.split() if r.returncode == 0 else []
+
+def _merge_peers(g):
+    """Merge every unmerged PEER_REF into HEAD (edit wins, as for origin); returns had_conflict"""
+    had_conflict = False
+    for ref in _peer_refs(g.path):
+        if is_conflict(g.merge(ref)):
+            had_conflict = True
+            g.resolve()
+            g.commit('auto-resolve: edit wins')
+    return had_conflict
+
+def merge_peers(path=None):
+    """This device's end of a LAN push: merge PEER_REF/* now, no network (dirty tree: full sync). (ok, conflict)"""
+    path = path or SYNC_ROOT
+    with _repo_lock(path):
+        g = _backend(path)
+        if g.state()[0]:
+            return _sync_locked(path, True, True)
+        return True, _merge_peers(g)
+
+def _broadcast(wait=False, path=None):
+    """Non-blocking: hand the new commits to every other device concurrently; results -> BROADCAST_STATUS"""
+    hosts = _peers(path)
+    if not hosts: return
+    def _go():
+        r = {}
+        def lan(n, h, pw, dirs):
+            t = time.time()
+            ok, rc = _lan_push(path or SYNC_ROOT, n, h, pw, dirs)
+            r[n] = {'host': h, 'ok': ok, 'rc': 0 if ok else rc, 'ms': round((time.time() - t) * 1000), 'at': int(t), 'via': 'lan'}
+        ths = [threading.Thread(target=lan, args=x) for x in hosts] if P2P else []
+        for th in ths: th.start()
+        for th in ths: th.join()
+        rest = [x for x in hosts if not r.get(x[0], {}).get('ok')]
+        rest and r.update(asyncio.run(_ping_all(rest, 'git pull -q origin main')))
+        try:
+            BROADCAST_STATUS.write_text(json.dumps(r))
+        except OSError:
+            pass
+    t = threading.Thread(target=_go, daemon=True)
+    t.start()
+    wait and t.join()
+
+def _broadcast_report():
+    """One line per peer from the last broadcast, for `a sync`"""
+    try:
+        r = json.loads(BROADCAST_STATUS.read_text())
+    except (OSError, ValueError):
+        return []
+    return [f"  {n}: {'✓' if d['ok'] else 'x'} {d['ms']}ms {d.get('via', 'github')}" + ('' if d['ok'] else f" ({d['rc']})") + f" {int((time.time() - d['at']) // 60)}m ago"
+            for n, d in sorted(r.items())]
 
 def q(p):
     """Quote path for shell"""
     return shlex.quote(str(p))
 
 def ts():
-    """Generate timestamp with nanosecond precision"""
-    return time.strftime('%Y%m%dT%H%M%S') + f'.{time.time_ns() % 1000000000:09d}'
-
-def add_timestamps(path, recursive=False):
-    """Add timestamps to any files missing them (migration + new files)"""
-    timestamp = ts()
-    pattern = '**/*.txt' if recursive else '*.txt'
-    for p in path.glob(pattern):
-        if '_20' in p.stem:
-            continue
-        if p.name.startswith('.'):
-            continue
-        new_name = f'{p.stem}_{timestamp}{p.suffix}'
-        p.rename(p.with_name(new_name))
+    """Generate timestamp with nanosecond precision (one clock read: strftime() alone uses the coarse clock)"""
+    n = time.time_ns()
+    return time.strftime('%Y%m%dT%H%M%S', time.localtime(n // 1000000000)) + f'.{n % 1000000000:09d}'
+
+def add_timestamps(path, recursive=False, seen=None):
+    """
+    Add timestamps to any files missing them (migration + new files), in path
+    and its YYYY-MM/ month shards.
+
+    seen: {dir: dir mtime_ns} manifest (see _load_seen), one entry for the
+    folder and one per shard. Adding or renaming a file bumps its directory's
+    mtime, so a dir whose mtime still matches the manifest has nothing new and
+    costs one stat instead of a full listing. A new shard bumps the folder's
+    mtime, so an unchanged folder's shards are exactly those already in seen.
+    """
+    key, timestamp = str(path), ts()
+    if recursive:
+        if not os.path.isdir(path): return
+        for p in path.glob('**/*.txt'):
+            if '_20' in p.stem or p.name.startswith('.'):
+                continue
+            p.rename(p.with_name(f'{p.stem}_{timestamp}{p.suffix}'))
+        return
+    months = _stamp_dir(key, seen, timestamp)
+    if months is None:
+        months = [k for k in seen if os.path.dirname(k) == key] if seen else []
+    for m in months:
+        _stamp_dir(m, seen, timestamp)
+
+def _stamp_dir(d, seen, timestamp):
+    """Timestamp new *.txt directly in d unless its mtime matches seen; its month shards, None if not listed"""
+    try:
+        mt = os.stat(d).st_mtime_ns
+    except FileNotFoundError:
+        seen is not None and seen.pop(d, None)
+        return None
+    if seen is not None and seen.get(d) == mt:
+        return None
+    with os.scandir(d) as it:
+        ents = list(it)
+    for e in ents:
+        n = e.name
+        if n.endswith('.txt') and not n.startswith('.') and '_20' not in n[:-4]:
+            os.rename(e.path, os.path.join(d, f'{n[:-4]}_{timestamp}.txt'))
+    if seen is not None:
+        mt = os.stat(d).st_mtime_ns
+        seen[d] = None if _fresh(mt) else mt
+    return [e.path for e in ents if _MONTH.match(e.name) and e.is_dir()]
+
+def _ts_manifest(path):
+    """Per repo: folder or month shard -> dir mtime_ns when add_timestamps last left it clean"""
+    return Path(path) / '.git' / 'a-ts-manifest.json'
+
+TS_MANIFEST_V = 2  # 2: shards have entries; an older manifest would hide them behind an unchanged folder
+
+def _load_seen(path):
+    try:
+        seen = json.loads(_ts_manifest(path).read_text())
+    except (OSError, ValueError):
+        seen = {}
+    return seen if seen.get('_v') == TS_MANIFEST_V else {'_v': TS_MANIFEST_V}
+
+def _save_seen(path, seen):
+    try:
+        _ts_manifest(path).write_text(json.dumps(seen))
+    except OSError:
+        pass
+
+_latest = {}  # repo -> its .git/a-latest.json {folder: {'mtime': ns, 'latest': {name: newest file}}}, loaded once per process
+_repo_at = {}  # folder -> enclosing repo (None: not in one, index kept in memory only)
+
+def _repo(path):
+    key = str(path)
+    if key not in _repo_at:
+        p = Path(path).absolute()
+        _repo_at[key] = next((d for d in (p, *p.parents) if (d / '.git').is_dir()), None)
+    return _repo_at[key]
+
+def _latest_of(repo):
+    if repo not in _latest:
+        try:
+            _latest[repo] = json.loads((repo / '.git' / 'a-latest.json').read_text()) if repo else {}
+        except (OSError, ValueError):
+            _latest[repo] = {}
+    return _latest[repo]
+
+def _fresh(mt):
+    """Racy-git rule: an mtime from the last second may hide a same-tick write"""
+    return time.time_ns() - mt <= 1_000_000_000
+
+def _latest_dir(path):
+    """path's index entry {'mtime', 'latest': {name: newest '{name}_{ts}.txt'}}, rebuilt when the dir changed (new write or pull)"""
+    repo = _repo(path)
+    latest, key = _latest_of(repo), str(path)
+    try:
+        mt = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return {'mtime': None, 'latest': {}}
+    ent = latest.get(key)
+    if not ent or ent['mtime'] != mt:
+        idx = {}
+        with os.scandir(path) as it:
+            for n in (e.name for e in it):
+                if n.endswith('.txt') and '_' in n:
+                    b = n[:-4].rsplit('_', 1)[0]
+                    if n > idx.get(b, ''):
+                        idx[b] = n
+        ent = latest[key] = {'mtime': None if _fresh(mt) else mt, 'latest': idx}
+        _save_latest(repo)
+    return ent
+
+def _latest_put(path, name, fname):
+    """Record a version we just wrote so the next lookup needs no rescan"""
+    ent = _latest_dir(path)
+    if fname > ent['latest'].get(name, ''):
+        ent['latest'][name] = fname
+    mt = os.stat(path).st_mtime_ns
+    ent['mtime'] = None if _fresh(mt) else mt
+    _save_latest(_repo(path))
+
+def _save_latest(repo):
+    try:
+        repo and (repo / '.git' / 'a-latest.json').write_text(json.dumps(_latest[repo]))
+    except OSError:
+        pass
 
 def get_latest(path, name):
-    """Get the latest version of a file by name prefix"""
-    matches = sorted(path.glob(f'{name}_*.txt'))
-    return matches[-1] if matches else None
+    """Get the latest version of a file by name (O(1) via the latest-version index)"""
+    n = _latest_dir(path)['latest'].get(name)
+    return Path(path) / n if n else None
 
-def _sync(path=None, silent=False, auto_timestamp=True):
+def _sync(path=None, silent=False, auto_timestamp=True, wait=True):
+    """
+    Sync path. Returns (success, had_conflict).
+
+    Thin client: if a sync daemon serves path (see _daemon), the request is
+    coalesced with every other write in the debounce window. wait=False only
+    enqueues (returns immediately); wait=True blocks until the batch is pushed.
+    No daemon -> _sync_inline, today's one-round-trip-per-call path.
+    """
+    global last_skip
+    path = path or SYNC_ROOT
+    r = _ask_daemon(path, {'ts': auto_timestamp, 'wait': wait})
+    if r is None:
+        return _sync_inline(path, silent, auto_timestamp)
+    last_skip = r.get('skip')
+    if not r.get('ok') and not silent:
+        print(f"Sync error: {r.get('error', 'daemon sync failed')}")
+    return r.get('ok', False), r.get('conflict', False)
+
+def _sync_inline(path=None, silent=False, auto_timestamp=True):
     """
     Sync with auto-resolution. Returns (success, had_conflict).
 
     - Retries up to MAX_RETRIES times on push rejection
     - Auto-resolves merge conflicts (edit wins)
     - Timestamps files before sync to prevent filename collisions
+    - Skips commit/pull/push when neither side changed (reason in last_skip)
+
+    - Holds .git/a-sync.lock throughout: a detached revalidate and a
+      foreground sync of the same repo take turns instead of racing on
+      index.lock
 
     This function is tested by tests/test_sync/test_sync.py monte carlo sim.
     """
     path = path or SYNC_ROOT
-    p = q(path)
+    with _repo_lock(path):
+        return _sync_locked(path, silent, auto_timestamp)
+
+def _repo_lock(path):
+    """Exclusive flock on path/.git/a-sync.lock until the with block ends (no-op before the repo exists)"""
+    import contextlib, fcntl
+    try:
+        f = open(Path(path) / '.git' / 'a-sync.lock', 'a')
+    except OSError:
+        return contextlib.nullcontext()
+    fcntl.flock(f, fcntl.LOCK_EX)
+    return f  # closing the file releases the lock
+
+def _sync_locked(path, silent, auto_timestamp):
+    global last_skip
+    g = _backend(path)
     had_conflict = False
 
     # Auto-timestamp files in FOLDERS to prevent filename collisions
     if auto_timestamp:
-        for f in FOLDERS:
-            folder_path = Path(path) / f
-            if folder_path.exists():
-                add_timestamps(folder_path)
+        seen = _load_seen(path)
+        before = dict(seen)
+        for f in _folders(path):
+            add_timestamps(Path(path) / f, seen=seen)
+        seen != before and _save_seen(path, seen)
+
+    # Fast path: nothing local to send and origin hasn't moved
+    st = g.state()
+    last_skip = _unchanged(g, st)
+    if last_skip:
+        _mark_synced(g.path)
+        return True, had_conflict
+
+    # Large files: pointer in git, bytes in BLOB_CACHE + rclone (only paths the status above saw change)
+    _pointerize(path, st[0])
 
     for attempt in range(MAX_RETRIES):
         # Step 1: Commit local changes first (prevents "overwritten" errors)
-        sp.run(f'cd {p} && git add -A && git commit -qm sync', shell=True, capture_output=True)
+        g.commit('sync')
 
-        # Step 2: Pull with merge (not rebase)
-        pull = sp.run(f'cd {p} && git pull --no-rebase origin main', shell=True, capture_output=True, text=True)
-
-        if is_conflict(pull.stderr + pull.stdout):
+        # Step 2: Pull with merge (not rebase), then whatever peers pushed here over the LAN
+        if is_conflict(g.pull()):
             had_conflict = True
-            resolve_conflicts(path)
-            sp.run(f'cd {p} && git commit -qm "auto-resolve: edit wins"', shell=True, capture_output=True)
+            g.resolve()
+            g.commit('auto-resolve: edit wins')
+        had_conflict = _merge_peers(g) or had_conflict
 
         # Step 3: Push
-        push = sp.run(f'cd {p} && git push -q origin main', shell=True, capture_output=True, text=True)
+        ours = _git(str(g.path), 'rev-list', '--count', 'refs/remotes/origin/main..HEAD').stdout.strip() != '0'
+        ok, out = g.push()
 
-        if push.returncode == 0:
-            _broadcast()  # notify other devices
+        if ok:
+            (g.path / '.git' / 'a-remote-head').unlink(missing_ok=True)  # origin just moved
+            _mark_synced(g.path)
+            ours and _broadcast(path=g.path)  # hand our commits to other devices (LAN first, see PEERS)
+            _maybe_maintain(g.path)
             return True, had_conflict
 
         # Retry if rejected (remote has newer commits)
-        if 'rejected' in (push.stderr + push.stdout).lower():
+        if 'rejected' in out.lower():
             had_conflict = True
             continue
 
-        # Other errors: fail
         if not silent:
-            print(f"Sync error: {(push.stderr + push.stdout)[:200]}")
+            print(f"Sync error: {out[:200]}")
         return False, had_conflict
 
     if not silent:
         print(f"Sync failed after {MAX_RETRIES} retries")
     return False, had_conflict
 
+# =============================================================================
+# GIT MAINTENANCE
+# Every mutation on every device is a commit, so loose objects and packs pile
+# up and the status/pull/push inside each sync slow down. After a push,
+# _maybe_maintain reads repo health (at most every MAINT_EVERY s) and, over
+# threshold, spawns a detached nice/ionice'd _maintain: git's incremental
+# maintenance tasks, with before/after health and local sync latency saved to
+# .git/a-maint.json for `a sync maint`. The last health reading is cached there
+# too, so the report after every sync costs no rev-list.
+# =============================================================================
+
+MAINT = os.environ.get('A_SYNC_MAINT', '1') != '0'
+LOOSE_MAX, PACKS_MAX, GRAPH_BEHIND_MAX, MAINT_EVERY = 1000, 16, 200, 3600
+MAINT_TASKS = ('loose-objects', 'incremental-repack', 'commit-graph')
+
+def _graph_commits(objs):
+    """Commits covered by the commit-graph (single file or split chain): sum of each file's OIDF fanout[255]"""
+    chain = objs / 'commit-graphs' / 'commit-graph-chain'
+    files = [objs / 'commit-graphs' / f'graph-{h}.graph' for h in chain.read_text().split()] if chain.exists() else [objs / 'commit-graph']
+    n = 0
+    for f in files:
+        if not f.exists(): return None
+        with open(f, 'rb') as fh:
+            hdr = fh.read(8)
+            toc = fh.read(12 * (hdr[6] + 1))
+            off = next((int.from_bytes(toc[i + 4:i + 12], 'big') for i in range(0, len(toc), 12) if toc[i:i + 4] == b'OIDF'), None)
+            if off is None: return None
+            fh.seek(off + 255 * 4); n += int.from_bytes(fh.read(4), 'big')
+    return n
+
+def _health(path):
+    """{loose, packs, kib, graph_behind}: graph_behind = commits not in the commit-graph (None = no graph)"""
+    r = _git(str(path), 'count-objects', '-v')
+    c = dict(l.split(': ') for l in r.stdout.splitlines()) if r.returncode == 0 else {}
+    behind = _graph_commits(Path(path) / '.git' / 'objects' / 'info')
+    if behind is not None:
+        n = _git(str(path), 'rev-list', '--count', '--all').stdout.strip()
+        behind = max(0, int(n) - behind) if n.isdigit() else None
+    return {'loose': int(c.get('count', 0)), 'packs': int(c.get('packs', 0)),
+            'kib': int(c.get('size', 0)) + int(c.get('size-pack', 0)), 'graph_behind': behind}
+
+def _maint_file(path):
+    f = Path(path) / '.git' / 'a-maint.json'
+    try: return json.loads(f.read_text())
+    except (OSError, ValueError): return {}
+
+def _save_health(path, h, **rep):
+    """Cache h (with its time) in .git/a-maint.json next to the last maintenance report"""
+    r = {**_maint_file(path), **rep, 'health': {**h, 'at': int(time.time())}}
+    try: (Path(path) / '.git' / 'a-maint.json').write_text(json.dumps(r))
+    except OSError: pass
+    return h
+
+def _needs_maint(h):
+    return h['loose'] > LOOSE_MAX or h['packs'] > PACKS_MAX or h['graph_behind'] is None or h['graph_behind'] > GRAPH_BEHIND_MAX
+
+def _probe_ms(path, n=5):
+    """Median ms of the local part of every sync (status + rev-parse, as in _unchanged)"""
+    g, ts_ = ShellGit(path), []
+    for _ in range(n):
+        t = time.perf_counter(); g.state(); ts_.append((time.perf_counter() - t) * 1000)
+    return round(sorted(ts_)[n // 2], 1)
+
+def _maintain(path=None):
+    """Run incremental maintenance now; returns the report written to .git/a-maint.json (None if locked)"""
+    path = Path(path or SYNC_ROOT)
+    lock = path / '.git' / 'a-maint.lock'
+    try:
+        if lock.exists() and time.time() - lock.stat().st_mtime > MAINT_EVERY: lock.unlink()
+        os.close(os.open(lock, os.O_CREAT | os.O_EXCL))
+    except OSError:
+        return None
+    try:
+        t = time.time()
+        before = {**_health(path), 'sync_ms': _probe_ms(path)}
+        _git(str(path), 'maintenance', 'run', '--quiet', *(f'--task={x}' for x in MAINT_TASKS))
+        _git(str(path), 'prune-packed')  # loose-objects packs them this run but only drops them next run
+        after = {**_health(path), 'sync_ms': _probe_ms(path)}
+        rep = {'at': int(t), 'took_s': round(time.time() - t, 2), 'before': before, 'after': after}
+        _save_health(path, {k: v for k, v in after.items() if k != 'sync_ms'}, **rep)
+        return rep
+    finally:
+        lock.unlink(missing_ok=True)
+
+def _maybe_maintain(path):
+    """Rate-limited health check; spawns _maintain detached at idle priority when over threshold"""
+    stamp = Path(path) / '.git' / 'a-maint-check'
+    if not MAINT or stamp.exists() and time.time() - stamp.stat().st_mtime < MAINT_EVERY:
+        return False
+    stamp.touch()
+    if not _needs_maint(_save_health(path, _health(path))):
+        return False
+    code = f'import sys; sys.path.insert(0, {os.path.dirname(os.path.abspath(__file__))!r}); import sync; sync._maintain({str(path)!r})'
+    idle = ['nice', '-n', '19'] + (['ionice', '-c', '3'] if shutil.which('ionice') else [])
+    sp.Popen(idle + [sys.executable, '-c', code], stdin=sp.DEVNULL, stdout=sp.DEVNULL, stderr=sp.DEVNULL, start_new_session=True)
+    return True
+
+def _maint_report(path=None, fresh=False):
+    """Health lines from the cached reading (fresh=True, or no reading yet: measure and cache one)"""
+    path = Path(path or SYNC_ROOT)
+    r = _maint_file(path)
+    h = r.get('health')
+    if fresh or not h:
+        h = _save_health(path, _health(path))
+    g = 'none' if h['graph_behind'] is None else f"+{h['graph_behind']}"
+    out = [f"  Repo: {h['loose']} loose, {h['packs']} packs, {h['kib'] // 1024}MB, commit-graph {g}" + (" (maintenance due)" if _needs_maint(h) else "")]
+    if 'before' in r:
+        b, a = r['before'], r['after']
+        out.append(f"  Maintained {time.strftime('%Y-%m-%d %H:%M', time.localtime(r['at']))} ({r['took_s']}s): "
+                   f"loose {b['loose']}→{a['loose']}, packs {b['packs']}→{a['packs']}, sync {b['sync_ms']}→{a['sync_ms']}ms")
+    return out
+
+# =============================================================================
+# SYNC DAEMON
+# Writers send one JSON line over a unix socket in the repo's .git dir. Every
+# request that arrives inside the debounce window shares one commit/pull/push;
+# waiting writers get the shared result back once it is pushed (durable).
+# =============================================================================
+
+def _sock(path):
+    return Path(path) / '.git' / 'a-sync.sock'
+
+def _ask_daemon(path, msg, timeout=300):
+    """Send msg to the daemon serving path. None if no daemon is listening."""
+    s = _sock(path)
+    if not s.exists():
+        return None
+    c = socket.socket(socket.AF_UNIX)
+    try:
+        c.connect(str(s))
+    except OSError:
+        s.unlink(missing_ok=True)  # stale socket from a dead daemon
+        c.close()
+        return None
+    try:
+        c.settimeout(timeout)
+        c.sendall((json.dumps(msg) + '\n').encode())
+        return json.loads(c.makefile().readline() or '{}')
+    except (OSError, ValueError) as e:
+        return {'ok': False, 'error': f'daemon: {e}'}
+    finally:
+        c.close()
+
+def _daemon(path=None):
+    """Serve coalesced syncs for path until a {"cmd": "stop"} request"""
+    path = Path(path or SYNC_ROOT)
+    s = _sock(path)
+    s.unlink(missing_ok=True)
+    srv = socket.socket(socket.AF_UNIX)
+    srv.bind(str(s))
+    srv.listen(64)
+    lock, busy, dirty = threading.Lock(), threading.Lock(), threading.Event()
+    st = {'waiters': [], 'ts': False, 'first': 0.0, 'last': 0.0, 'syncs': 0, 'writes': 0, 'result': None}
+
+    def _reply(c, d):
+        try:
+            c.sendall((json.dumps(d) + '\n').encode())
+        except OSError:
+            pass
+        c.close()
+
+    def _flush():
+        with busy:
+            with lock:
+                batch, st['waiters'], ats, st['ts'] = st['waiters'], [], st['ts'], False
+                dirty.clear()
+            try:
+                ok, conflict, err = *_sync_inline(path, silent=True, auto_timestamp=ats), None
+            except Exception as e:  # the batch fails, the daemon keeps serving
+                ok, conflict, err = False, False, f'{type(e).__name__}: {e}'
+            st['syncs'] += 1
+            st['result'] = {'ok': ok, 'conflict': conflict, 'skip': last_skip, 'at': time.time(), **({'error': err} if err else {})}
+        for c in batch:
+            _reply(c, {'ok': ok, 'conflict': conflict, 'skip': last_skip, **({'error': err} if err else {})})
+
+    def _loop():
+        while True:
+            dirty.wait()
+            while True:  # debounce: DEBOUNCE of quiet, or the batch is MAX_BATCH old
+                now = time.time()
+                with lock:
+                    quiet, age = now - st['last'], now - st['first']
+                if quiet >= DEBOUNCE or age >= MAX_BATCH:
+                    break
+                time.sleep(min(DEBOUNCE - quiet, MAX_BATCH - age))
+            _flush()
+
+    def _serve(c):  # one thread per connection: a stalled client only holds up itself
+        try:
+            c.settimeout(5)
+            m = json.loads(c.makefile().readline() or '{}')
+        except (OSError, ValueError):
+            c.close()
+            return
+        if m.get('cmd') == 'stop':
+            stop.set()
+            _reply(c, {'ok': True})
+            return
+        if m.get('cmd') == 'status':
+            with lock:
+                _reply(c, {'ok': True, 'pid': os.getpid(), 'pending': dirty.is_set(), 'waiting': len(st['waiters']),
+                           'writes': st['writes'], 'syncs': st['syncs'], 'last': st['result']})
+            return
+        with lock:
+            now = time.time()
+            if not dirty.is_set():
+                st['first'] = now
+            st['last'], st['ts'] = now, st['ts'] or m.get('ts', True)
+            st['writes'] += 1
+            if m.get('wait', True):
+                c.settimeout(None)
+                st['waiters'].append(c)
+            else:
+                _reply(c, {'ok': True, 'conflict': False, 'queued': True})
+            dirty.set()
+
+    stop = threading.Event()
+    threading.Thread(target=_loop, daemon=True).start()
+    srv.settimeout(0.2)  # wake up to notice stop
+    try:
+        while not stop.is_set():
+            try:
+                c, _ = srv.accept()
+            except socket.timeout:
+                continue
+            c.settimeout(None)
+            threading.Thread(target=_serve, args=(c,), daemon=True).start()
+    finally:
+        srv.close()
+        s.unlink(missing_ok=True)
+        with busy:  # let an in-flight batch finish
+            pass
+        if dirty.is_set():  # don't drop writes queued before stop
+            _flush()
+
+def _daemon_start(path=None):
+    """Spawn _daemon detached; returns False if one is already serving path"""
+    path = path or SYNC_ROOT
+    if _ask_daemon(path, {'cmd': 'status'}):
+        return False
+    code = f'import sys; sys.path.insert(0, {os.path.dirname(os.path.abspath(__file__))!r}); import sync; sync._daemon({str(path)!r})'
+    sp.Popen([sys.executable, '-c', code], stdin=sp.DEVNULL, stdout=sp.DEVNULL, stderr=sp.DEVNULL, start_new_session=True)
+    for _ in range(50):
+        if _sock(path).exists():
+            break
+        time.sleep(0.02)
+    return True
+
+# =============================================================================
+# STALE-WHILE-REVALIDATE
+# Read commands (a n, a ssh, a login) list what is already on disk and start
+# a background sync instead of waiting on pull/push first. Every successful
+# sync (C sync_repo too) touches .git/a-synced, so output can say how stale
+# the data might be; callers reload only once the sync has moved HEAD.
+# =============================================================================
+
+SWR_FRESH = 30  # s: synced this recently = fresh enough, no revalidation
+
+def _synced_file(path=None):
+    return Path(path or SYNC_ROOT) / '.git' / 'a-synced'
+
+def _mark_synced(path):
+    try:
+        _synced_file(path).touch()
+    except OSError:
+        pass
+
+def synced_ago(path=None):
+    """'synced 3m ago' from the last successful sync of path"""
+    try:
+        s = time.time() - _synced_file(path).stat().st_mtime
+    except OSError:
+        return 'never synced'
+    return ('synced just now' if s < 60 else f'synced {int(s // 60)}m ago' if s < 3600
+            else f'synced {int(s // 3600)}h ago' if s < 172800 else f'synced {int(s // 86400)}d ago')
+
+def _head(path):
+    return _git(str(path), 'rev-parse', '-q', '--verify', 'HEAD').stdout.strip()
+
+def revalidate(path=None, force=False):
+    """Start a background sync of path (daemon if serving, else a detached process); never blocks.
+    Skipped while the last sync is under SWR_FRESH s old, unless force (= push what we just wrote).
+    Returns changed(): True, once, after that sync moved HEAD (= reload your data);
+    changed.busy() is True while the detached sync still runs."""
+    path = Path(path or SYNC_ROOT)
+    st = [_head(path)]
+    try:
+        fresh = time.time() - _synced_file(path).stat().st_mtime < SWR_FRESH
+    except OSError:
+        fresh = False
+    p = None
+    if (force or not fresh) and _ask_daemon(path, {'ts': True, 'wait': False}) is None:
+        code = f'import sys; sys.path.insert(0, {os.path.dirname(os.path.abspath(__file__))!r}); import sync; sync._sync_inline({str(path)!r}, silent=True)'
+        p = sp.Popen([sys.executable, '-c', code], stdin=sp.DEVNULL, stdout=sp.DEVNULL, stderr=sp.DEVNULL, start_new_session=True)
+        threading.Thread(target=p.wait, daemon=True).start()  # reaped even if nobody polls changed() (daemon, hub)
+    def changed():
+        if p is not None and p.poll() is None:
+            return False
+        h = _head(path)
+        if h == st[0]:
+            return False
+        st[0] = h
+        return True
+    changed.busy = lambda: p is not None and p.poll() is None
+    return changed
+
+# =============================================================================
+# FILESYSTEM WATCH
+# Agents and editors write straight into SYNC_ROOT and forget `a sync`. The
+# watcher notices writes (inotify via ctypes; a stat-signature poll where
+# inotify is missing or out of watches), waits for WATCH_QUIET s of quiet (or
+# WATCH_MAX s of continuous writing) and runs one _sync - through the daemon
+# when one is serving. Writes cost nothing until the burst ends; the resync
+# a pull's own checkout triggers hits the no-change fast path.
+# On: `a sync watch start` (detached), or A_SYNC_WATCH=1 so `a sync` starts it.
+# =============================================================================
+
+WATCH_QUIET, WATCH_MAX, WATCH_POLL = 2.0, 30.0, 5.0
+WATCH = os.environ.get('A_SYNC_WATCH', '0') == '1'  # every `a sync` makes sure a watcher is running
+_IN_MASK = 0x8 | 0x40 | 0x80 | 0x100 | 0x200 | 0x400  # CLOSE_WRITE MOVED_FROM MOVED_TO CREATE DELETE DELETE_SELF
+_IN_ISDIR, _IN_OVERFLOW = 0x40000000, 0x4000
+
+def _watch_file(path):
+    return Path(path) / '.git' / 'a-watch.json'
+
+def _ignored(name):
+    """Editor swap/backup files and git's own writes don't count as changes"""
+    return name == '.git' or name.endswith(('~', '.swp', '.swx', '.tmp', '.lock')) or name == '4913'
+
+def _dirs(root):
+    stack = [str(root)]
+    while stack:
+        d = stack.pop(); yield d
+        try:
+            with os.scandir(d) as it:
+                stack += [e.path for e in it if e.is_dir(follow_symlinks=False) and not _ignored(e.name)]
+        except OSError:
+            pass
+
+def _inotify(root):
+    """wait(timeout) -> bool over inotify, or None if unavailable (no Linux, no watches left)"""
+    import ctypes, select, struct
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        fd = libc.inotify_init1(os.O_CLOEXEC | os.O_NONBLOCK)
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+    wds = {}
+    def add(d):
+        wd = libc.inotify_add_watch(fd, os.fsencode(d), _IN_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_add_watch')
+        wds[wd] = d
+    try:
+        for d in _dirs(root): add(d)
+    except OSError:
+        os.close(fd)
+        return None
+    def wait(timeout):
+        if not select.select([fd], [], [], timeout)[0]:
+            return False
+        try:
+            buf = os.read(fd, 1 << 16)
+        except BlockingIOError:
+            return False
+        hit, off = False, 0
+        while off < len(buf):
+            wd, mask, _, n = struct.unpack_from('iIII', buf, off)
+            name = buf[off + 16:off + 16 + n].split(b'\0', 1)[0].decode(errors='replace')
+            off += 16 + n
+            if mask & _IN_OVERFLOW:
+                hit = True; continue
+            if mask & 0x8000:  # IN_IGNORED: dir gone, kernel dropped its watch
+                wds.pop(wd, None); continue
+            if _ignored(name) or wd not in wds:
+                continue
+            hit = True
+            if mask & _IN_ISDIR and mask & 0x180:  # new dir: watch it (and anything already in it)
+                try:
+                    for d in _dirs(os.path.join(wds[wd], name)): add(d)
+                except OSError:
+                    pass
+        return hit
+    wait.mode = 'inotify'
+    return wait
+
+def _poll(root):
+    """wait(timeout) -> bool by comparing an mtime/size signature every WATCH_POLL s"""
+    def sig():
+        h = 0
+        for d in _dirs(root):
+            try:
+                with os.scandir(d) as it:
+                    for e in it:
+                        if not _ignored(e.name) and e.is_file(follow_symlinks=False):
+                            st = e.stat(follow_symlinks=False)
+                            h ^= hash((e.path, st.st_mtime_ns, st.st_size))
+            except OSError:
+                pass
+        return h
+    last = [sig()]
+    def wait(timeout):
+        end = None if timeout is None else time.time() + timeout
+        while True:
+            time.sleep(WATCH_POLL if end is None else max(0, min(WATCH_POLL, end - time.time())))
+            s = sig()
+            if s != last[0]:
+                last[0] = s
+                return True
+            if end is not None and time.time() >= end:
+                return False
+    wait.mode = 'poll'
+    return wait
+
+def watch(path=None, quiet=None, most=None, stop=None, mode=None):
+    """Sync path after each burst of writes until stop (threading.Event) is set"""
+    path = Path(path or SYNC_ROOT)
+    quiet, most = quiet or WATCH_QUIET, most or WATCH_MAX
+    wait = (mode != 'poll' and _inotify(path)) or _poll(path)
+    st = {'pid': os.getpid(), 'mode': wait.mode, 'since': time.time(), 'bursts': 0, 'syncs': 0, 'last': None}
+    _watch_file(path).write_text(json.dumps(st))
+    while not (stop and stop.is_set()):
+        if not wait(1.0 if stop else None):
+            continue
+        first = time.time()
+        while (left := most - (time.time() - first)) > 0 and wait(min(quiet, left)):
+            pass
+        ok, _ = _sync(path, silent=True)
+        st['bursts'] += 1; st['syncs'] += not last_skip
+        st['last'] = {'ok': ok, 'skip': last_skip, 'at': time.time(), 'burst_s': round(time.time() - first, 2)}
+        _watch_file(path).write_text(json.dumps(st))
+    return st
+
+def _watch_pid(path=None):
+    try:
+        pid = json.loads(_watch_file(path or SYNC_ROOT).read_text())['pid']
+        os.kill(pid, 0)
+        return pid
+    except (OSError, ValueError, KeyError):
+        return None
+
+def _watch_start(path=None):
+    """Spawn watch detached; returns False if one is already running for path"""
+    path = path or SYNC_ROOT
+    if _watch_pid(path):
+        return False
+    code = f'import sys; sys.path.insert(0, {os.path.dirname(os.path.abspath(__file__))!r}); import sync; sync.watch({str(path)!r})'
+    sp.Popen([sys.executable, '-c', code], stdin=sp.DEVNULL, stdout=sp.DEVNULL, stderr=sp.DEVNULL, start_new_session=True)
+    return True
+
+# =============================================================================
+
 def _merge_rclone():
     import re
     lc, rc = SYNC_ROOT/'login'/'rclone.conf', Path.home()/'.config/rclone/rclone.conf'
@@ -193,25 +1306,61 @@ def _merge_rclone():
             rc.write_text(rt + m.group() + '\n')
             rt = rc.read_text()
 
+CHUNK, CHUNK_QUEUE = 1 << 20, 32  # 32 MiB of slack between the fastest and slowest remote
+
+def _rcat(rc, dest, chunks, t, done):
+    """Feed chunks into one `rclone rcat` until None (finish) or False (abort); records (ok, seconds) in done[dest]"""
+    p, ok = sp.Popen([rc, 'rcat', dest, '-q'], stdin=sp.PIPE), True
+    while buf := chunks.get():
+        if ok:
+            try: p.stdin.write(buf)
+            except OSError: ok = False  # remote died; keep draining so the reader never blocks
+    if buf is False: p.kill()  # never let a truncated archive replace the last good one
+    try: p.stdin.close()
+    except OSError: pass
+    done[dest] = (p.wait() == 0 and ok, time.perf_counter() - t)
+
 def cloud_sync(local_path, name):
+    """
+    Stream tar | zstd -T0 straight into `rclone rcat` on every remote at once:
+    no temp archive, one compression pass, uploads run concurrently.
+    """
     rc = get_rclone()
     _merge_rclone()
     if not rc: return False, "no rclone"
-    tar = f'{os.getenv("TMPDIR", "/tmp")}/{name}-{DEVICE_ID}.tar.zst'
-    if sp.run(f'tar -cf - -C {local_path} . 2>/dev/null | zstd -q > {tar}', shell=True).returncode > 1:
-        return False, "tar failed"
-    ok = [r for r in _configured_remotes() if sp.run([rc, 'copyto', tar, f'{r}:{RCLONE_BACKUP_PATH}/backup/{DEVICE_ID}/{name}.tar.zst', '-q']).returncode == 0]
-    Path(tar).unlink(missing_ok=True)
-    return bool(ok), f"{'✓'*len(ok) or 'x'} {','.join(ok) or 'fail'}"
-
-def sync(folder=None):
+    remotes = _configured_remotes()
+    if not remotes: return False, "x fail"
+    if miss := [x for x in ('tar', 'zstd') if not shutil.which(x)]:
+        return False, f"no {', '.join(miss)} (install it to upload {name})"
+    tar = sp.Popen(['tar', '-cf', '-', '-C', str(local_path), '.'], stdout=sp.PIPE, stderr=sp.DEVNULL)
+    src = sp.Popen(['zstd', '-q', '-T0'], stdin=tar.stdout, stdout=sp.PIPE)
+    tar.stdout.close()
+    t, n, done = time.perf_counter(), 0, {}
+    dest = {r: f'{r}:{RCLONE_BACKUP_PATH}/backup/{DEVICE_ID}/{name}.tar.zst' for r in remotes}
+    qs = {r: queue.Queue(CHUNK_QUEUE) for r in remotes}
+    ths = [threading.Thread(target=_rcat, args=(rc, dest[r], qs[r], t, done), daemon=True) for r in remotes]
+    for th in ths: th.start()
+    while buf := src.stdout.read(CHUNK):
+        n += len(buf)
+        for c in qs.values(): c.put(buf)
+    src.stdout.close()
+    failed = tar.wait() > 1 or src.wait() or not n  # tar 1 = file changed while reading
+    for c in qs.values(): c.put(False if failed else None)
+    for th in ths: th.join()
+    if failed: return False, "tar failed"
+    ok = [r for r in remotes if done[dest[r]][0]]
+    rate = ', '.join(f'{r} {n / 1e6 / max(done[dest[r]][1], 1e-3):.1f}MB/s' for r in ok)
+    return bool(ok), f"{'✓'*len(ok) or 'x'} {','.join(ok) or 'fail'} {n / 1e6:.1f}MB" + (f" ({rate})" if rate else '')
+
+def sync(folder=None, wait=True):
     """Sync the unified a-git repo (or just pull if folder specified for compat)"""
-    return _sync(SYNC_ROOT)
+    return _sync(SYNC_ROOT, wait=wait)
 
-def sync_file(path, content=None):
+def sync_file(path, content=None, root=None):
     """
     Sync a single file using append-only.
     If content provided, writes new version. Returns path to latest version.
+    root: repo to sync (default SYNC_ROOT).
     """
     path = Path(path)
     repo_path = path.parent
@@ -220,29 +1369,122 @@ def sync_file(path, content=None):
     if content is not None:
         new_path = repo_path / f'{name}_{ts()}{path.suffix}'
         new_path.write_text(content)
+        _latest_put(repo_path, name, new_path.name)
 
-    _sync(SYNC_ROOT, silent=True)
+    _sync(root or SYNC_ROOT, silent=True)
     return get_latest(repo_path, name)
 
+# =============================================================================
+# BOOTSTRAP
+# A new device needs the current notes, not every sync commit ever made.
+# _bootstrap tries, in order:
+#   seed:    newest git.tar.zst any device uploaded (a gdrive sync), untarred,
+#            then one fetch + reset to catch up (full history, no clone)
+#   partial: clone --depth 1 --filter=blob:none --no-checkout, check out
+#            `common` (holds the sparse profile), then the device profile;
+#            blobs for other folders/history arrive only when read
+# then deepens history in the background (nice'd fetch --unshallow).
+# _backend keeps these on ShellGit (libgit2 can't fetch missing objects).
+# =============================================================================
+
+A_GIT = 'seanpattencode/a-git'
+
+def _clone_cmd(dest, url, *flags):
+    return ['git', 'clone', '-q', *flags, url, str(dest)] if url else ['gh', 'repo', 'clone', A_GIT, str(dest), '--', '-q', *flags]
+
+def _seed(dest):
+    """Untar the newest git.tar.zst from any device on the first rclone remote; True if dest is now a repo.
+    Only seeds an empty dest, and leaves it empty again on any failure so _partial can clone into it."""
+    rc, remotes = get_rclone(), _configured_remotes()
+    if not (rc and remotes) or (Path(dest).is_dir() and any(Path(dest).iterdir())): return False
+    try:
+        r = sp.run([rc, 'lsjson', '-R', '--files-only', '--include', '*/git.tar.zst', f'{remotes[0]}:{RCLONE_BACKUP_PATH}/backup'], capture_output=True, text=True, timeout=30)
+        newest = max(json.loads(r.stdout), key=lambda x: x['ModTime'])['Path']
+    except (sp.TimeoutExpired, ValueError, KeyError): return False
+    Path(dest).mkdir(parents=True, exist_ok=True)
+    sp.run(f'{q(rc)} cat {q(f"{remotes[0]}:{RCLONE_BACKUP_PATH}/backup/{newest}")} | zstd -dq | tar -xf - -C {q(dest)}', shell=True)
+    g, ok = Path(dest) / '.git', False
+    if g.is_dir():
+        for f in ('a-sync.sock', 'a-remote-head', 'a-maint.json', 'a-maint-check', 'a-ts-manifest.json', 'a-latest.json', 'config.worktree', 'info/sparse-checkout', 'index.lock'):
+            (g / f).unlink(missing_ok=True)  # the uploading device's local state
+        _git(str(dest), 'config', '--unset', 'core.sparseCheckout')
+        ok = _git(str(dest), 'fetch', '-q', 'origin', 'main').returncode == 0 and _git(str(dest), 'reset', '-q', '--hard', 'origin/main').returncode == 0
+    ok or shutil.rmtree(dest, ignore_errors=True)  # half-extracted or stale: don't block _partial
+    return ok
+
+def _partial(dest, url=None):
+    """Shallow blob-less clone; checks out common, then the device profile (or everything)"""
+    try:
+        if sp.run(_clone_cmd(dest, url, '--depth', '1', '--filter=blob:none', '--no-checkout'), capture_output=True).returncode:
+            return False
+    except OSError:  # no gh
+        return False
+    _git(str(dest), 'sparse-checkout', 'set', '--cone', 'common')
+    _git(str(dest), 'checkout', '-q', 'main')
+    apply_profile(dest)  # no profile -> sparse-checkout disable -> full HEAD checkout
+    return True
+
+def _deepen(path):
+    """Fetch the rest of history (commits/trees; blobs stay lazy) detached at idle priority"""
+    if not (Path(path) / '.git' / 'shallow').exists(): return False
+    idle = ['nice', '-n', '19'] + (['ionice', '-c', '3'] if shutil.which('ionice') else [])
+    sp.Popen(idle + ['git', '-C', str(path), 'fetch', '-q', '--unshallow', 'origin', 'main'],
+             stdin=sp.DEVNULL, stdout=sp.DEVNULL, stderr=sp.DEVNULL, start_new_session=True)
+    return True
+
+def _bootstrap(dest=None, url=None, seed=True):
+    """Fast first checkout of the sync repo; returns the method used ('seed'|'partial') or None"""
+    dest = Path(dest or SYNC_ROOT)
+    how = 'seed' if seed and _seed(dest) else 'partial' if _partial(dest, url) else None
+    if how == 'seed': apply_profile(dest)
+    how and _deepen(dest)
+    return how
+
 def _init_repo():
     """Initialize or clone the a-git repo"""
     if (SYNC_ROOT / '.git').exists():
+        apply_profile()
+        _shard_once()
+        return True
+    if _bootstrap():
         return True
 
     r = sp.run(
-        f'gh repo clone seanpattencode/a-git {q(SYNC_ROOT)} || '
+        f'gh repo clone {A_GIT} {q(SYNC_ROOT)} || '
         f'(cd {q(SYNC_ROOT)} && git init -q -b main && '
         f'echo "backup/\\nlogs/\\n.archive/" > .gitignore && '
         f'git add -A && git commit -qm init && '
         f'gh repo create a-git --private --source=. --push)',
         shell=True, capture_output=True, text=True
     )
+    r.returncode == 0 and apply_profile()
     return r.returncode == 0
 
 HELP = """a sync - Append-only sync to GitHub (no conflicts possible)
 
   a sync           Sync all data (unified a-git repo)
   a sync all       Sync + broadcast to SSH hosts
+  a sync daemon [start|stop|status]
+                   Coalescing daemon: writes within a short window share
+                   one commit+push (no arg = run in foreground)
+  a sync profile [set <folders..>|clear]
+                   This device's sparse checkout (stored in common/sparse/)
+  a sync get <path>  Print a file / check out a folder outside the profile
+  a sync shard [folders..]
+                   Move flat notes/activity/agents files into YYYY-MM/ shards
+  a sync blob <path> [dest]
+                   Real bytes of a large-file pointer (> A_BLOB_MAX, 50MB):
+                   prints cache path, fetches from gdrive if needed
+  a sync peers      Push to every device in ssh/ over SSH now (LAN, no
+                   GitHub round trip) and show results; A_SYNC_P2P=0 = off
+  a sync merge      Merge what peers pushed here (run by them over SSH)
+  a sync watch [start|stop|status]
+                   Sync after writes settle (inotify, else polling): no
+                   manual `a sync` after editing files (no arg = foreground);
+                   A_SYNC_WATCH=1 = every `a sync` starts it if not running
+  a sync maint [now]
+                   Repo health (loose objects, packs, commit-graph) and last
+                   background maintenance; now = run it in the foreground
   a sync help      Show this help
 
 Data: ~/projects/adata/git/ -> github.com/seanpattencode/a-git
@@ -255,6 +1497,81 @@ def run():
     if args and args[0] in ('help', '-h', '--help'):
         print(HELP); return
 
+    if args and args[0] == 'profile':
+        sub = args[1] if len(args) > 1 else None
+        p = set_profile(args[2:]) if sub == 'set' else set_profile([]) if sub == 'clear' else apply_profile()
+        print(f"Profile ({DEVICE_ID}): {' '.join(p) if p else 'full checkout'}")
+        return
+
+    if args and args[0] == 'shard':
+        moved = shard_all(folders=args[1:] or SHARDED)
+        print('  '.join(f"{f}: {n} moved" for f, n in moved.items()))
+        any(moved.values()) and _sync(SYNC_ROOT)
+        return
+
+    if args and args[0] == 'blob' and len(args) > 1:
+        f = Path(args[1]) if Path(args[1]).exists() else SYNC_ROOT / args[1]
+        c = hydrate(f)
+        print(f"x blob for {args[1]} not cached and not on any remote" if c is None else c)
+        if c and len(args) > 2: shutil.copyfile(c, args[2]); print(f"✓ {args[2]}")
+        return
+
+    if args and args[0] == 'get' and len(args) > 1:
+        b = get_sparse(args[1])
+        if b is True: print(f"✓ checked out {args[1]} (until next profile apply)")
+        elif b is None: print(f"x {args[1]} not in repo")
+        else: sys.stdout.write(b.decode(errors='replace'))
+        return
+
+    if args and args[0] == 'maint':
+        if args[1:2] == ['now']:
+            print("✓ maintained" if _maintain() else "• maintenance already running")
+        print('\n'.join(_maint_report(fresh=True)))
+        return
+
+    if args and args[0] == 'peers':
+        hosts = _peers()
+        for n, h, _, dirs in hosts: _peer_remote(SYNC_ROOT, n, h, dirs)
+        _broadcast(wait=True)
+        print('\n'.join(_broadcast_report()) if hosts else "• no peers in ssh/")
+        return
+
+    if args and args[0] == 'merge':
+        ok, conflict = merge_peers()
+        print("✓ merged peers" + (" (conflicts auto-resolved)" if conflict else "") if ok else "x merge failed")
+        return
+
+    if args and args[0] == 'watch':
+        sub = args[1] if len(args) > 1 else None
+        pid = _watch_pid()
+        if sub == 'start':
+            print("✓ watching " + str(SYNC_ROOT) if _watch_start() else f"• already watching (pid {pid})")
+        elif sub == 'stop':
+            pid and os.kill(pid, 15)
+            print(f"✓ stopped watcher {pid}" if pid else "• not watching")
+        elif sub == 'status':
+            r = pid and json.loads(_watch_file(SYNC_ROOT).read_text())
+            print(f"✓ pid {pid} ({r['mode']}): {r['bursts']} bursts -> {r['syncs']} syncs, last={r['last']}" if r else "• not watching")
+        else:
+            print(f"watching {SYNC_ROOT} (Ctrl-C to stop)")
+            try: watch(SYNC_ROOT)
+            except KeyboardInterrupt: pass
+        return
+
+    if args and args[0] == 'daemon':
+        sub = args[1] if len(args) > 1 else None
+        if sub == 'start':
+            print("✓ sync daemon started" if _daemon_start() else "• sync daemon already running")
+        elif sub == 'stop':
+            print("✓ sync daemon stopped" if _ask_daemon(SYNC_ROOT, {'cmd': 'stop'}) else "• sync daemon not running")
+        elif sub == 'status':
+            r = _ask_daemon(SYNC_ROOT, {'cmd': 'status'})
+            print(f"✓ pid {r['pid']}: {r['writes']} writes -> {r['syncs']} syncs, pending={r['pending']} last={r['last']}" if r else "• sync daemon not running")
+        else:
+            print(f"sync daemon: {_sock(SYNC_ROOT)}")
+            _daemon(SYNC_ROOT)
+        return
+
     # Clean stale poll daemon PID file
     pf = Path.home() / '.adata-poll.pid'
     pf.unlink(missing_ok=True)
@@ -262,21 +1579,28 @@ def run():
     _init_repo()
     print(f"{SYNC_ROOT}")
     ok, conflict = _sync(SYNC_ROOT)
+    WATCH and _watch_start() and print("  watching for writes (A_SYNC_WATCH=1)")
 
     url = sp.run(['git', '-C', str(SYNC_ROOT), 'remote', 'get-url', 'origin'],
                  capture_output=True, text=True).stdout.strip()
     t = sp.run(['git', '-C', str(SYNC_ROOT), 'log', '-1', '--format=%cd %s', '--date=format:%Y-%m-%d %I:%M:%S %p'],
                capture_output=True, text=True).stdout.strip()
 
-    status = "CONFLICT" if conflict else ("synced" if ok else "no changes")
+    status = "CONFLICT" if conflict else (f"skipped ({last_skip})" if ok and last_skip else "synced" if ok else "no changes")
     print(f"  {url}\n  Last: {t}\n  Status: {status}")
 
-    for folder in FOLDERS + ['agents']:
+    for folder in _folders() + ['agents']:
         p = SYNC_ROOT / folder
         if p.exists():
-            count = len(list(p.glob('*.txt')))
+            count = len(shard_files(p))
             print(f"  {folder}: {count} files")
 
+    print('\n'.join(_maint_report()))
+
+    if peers := _broadcast_report():
+        print("Peers (last broadcast):")
+        print('\n'.join(peers))
+
     if args and args[0] == 'all':
         print("\n--- Broadcasting to SSH hosts ---")
         sp.run('a ssh all "a sync"', shell=True)
@@ -307,7 +1631,8 @@ def run():
 #
 # File naming: {name}_{YYYYMMDDTHHMMSS.nnnnnnnnn}.txt
 #   - Timestamp ensures uniqueness, no merge conflicts
-#   - get_latest() finds most recent version by prefix
+#   - get_latest() finds most recent version by name (latest-version index,
+#     rebuilt per folder whenever the folder's mtime moves)
 #
 # ============================================================================
 # TROUBLESHOOTING GUIDE
@@ -369,3 +1694,5 @@ def run():
 #   # Then manually merge any local-only files from backup
 #
 # ============================================================================
+
+if __name__ == '__main__': run()
@@ -2,6 +2,7 @@
 import os, subprocess as sp
 from pathlib import Path
 from _common import _sg, list_all, init_db, SCRIPT_DIR, DATA_DIR, load_proj, load_apps, HELP_SHORT, SYNC_ROOT, ADATA_ROOT
+from .sync import apply_profile, _bootstrap, _profile
 
 ADATA_REMOTE = 'https://github.com/seanpattencode/a-git.git'
 
@@ -45,12 +46,11 @@ def ensure_adata():
     # Clone if missing
     if not git_dir.exists():
         SYNC_ROOT.mkdir(parents=True, exist_ok=True)
-        r = sp.run(f'gh repo clone seanpattencode/a-git {SYNC_ROOT}',
-                   shell=True, capture_output=True, text=True)
-        if r.returncode == 0:
-            print(f"✓ Cloned adata/git")
+        if how := _bootstrap():
+            p = _profile()
+            print(f"✓ Cloned adata/git ({how}, history deepening in background)" + (f" (profile: {' '.join(p)})" if p else ""))
         else:
-            print(f"x Failed to clone adata/git: {r.stderr.strip()[:100]}")
+            print(f"x Failed to clone adata/git")
         return
 
     # Fix remote if pointing at wrong repo
@@ -75,6 +75,7 @@ def ensure_adata():
     elif 'behind' in status:
         sp.run(['git', '-C', str(SYNC_ROOT), 'pull', '--ff-only', 'origin', 'main'], capture_output=True)
         print(f"✓ Updated adata/git")
+    apply_profile()
 
 HELP = """a update - Update a from git + refresh caches
   a update        Pull latest, refresh shell/caches, sync repos
@@ -2,6 +2,9 @@
 static int fexists(const char *p) { struct stat s; return stat(p, &s) == 0; }
 static int dexists(const char *p) { struct stat s; return stat(p, &s) == 0 && S_ISDIR(s.st_mode); }
 static void mkdirp(const char *p) { char t[P]; snprintf(t,P,"%s",p); for(char*s=t+1;*s;s++) if(*s=='/'){*s=0;mkdir(t,0755);*s='/';} mkdir(t,0755); }
+/* month shards: notes/activity/agents write to base/YYYY-MM/, readers descend one level */
+static int is_month(const char *n) { return strlen(n)==7 && n[4]=='-' && isdigit(n[0]) && isdigit(n[1]) && isdigit(n[2]) && isdigit(n[3]) && isdigit(n[5]) && isdigit(n[6]); }
+static void month_dir(char *out, const char *base, time_t t) { struct tm *tm = localtime(&t); snprintf(out, P, "%s/%04d-%02d", base, tm->tm_year+1900, tm->tm_mon+1); mkdirp(out); }
 
 static char *readf(const char *p, size_t *len) {
     int fd = open(p, O_RDONLY); if (fd < 0) return NULL;
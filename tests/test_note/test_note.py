@@ -0,0 +1,107 @@
+"""
+Note test - imports lib/note.py directly against a throwaway notes folder and aio.db.
+
+Usage:
+    python test_note.py search   # FTS5 queries (prefix, phrase, field, boolean) + refresh after add/ack/edit
+    python test_note.py similar  # similar # numbered as in triage, save-time dup warning, no-FTS5 fallback
+    python test_note.py import   # a n import: fields flattened to one line each, a dir is refused
+    python test_note.py          # List available tests
+"""
+import sys, os, time, json, shutil
+from pathlib import Path
+
+ROOT = Path(__file__).parent / 'devices'
+sys.path[:0] = [str(Path(__file__).parents[2] / 'lib'), str(Path(__file__).parents[2])]
+shutil.rmtree(ROOT, ignore_errors=True); ROOT.mkdir(parents=True)
+import _common
+_common.DB_PATH = str(ROOT / 'aio.db')
+from lib import note
+note.NOTES_DIR, note._sync = ROOT / 'notes', lambda **k: None
+
+def setup(texts):
+    """Fresh notes folder + index holding texts (dicts of extra fields allowed); returns {text: path}"""
+    shutil.rmtree(note.NOTES_DIR, ignore_errors=True); note.NOTES_DIR.mkdir()
+    with note._ix_db() as c:
+        c.execute("DELETE FROM note_ix_meta")  # next refresh rebuilds
+    out = {}
+    for t in texts:
+        kv = t if isinstance(t, dict) else {'Text': t}
+        out[kv['Text']] = note.shard(note.NOTES_DIR) / note._save(kv['Text'], sync=False, **{k.lower(): v for k, v in kv.items() if k != 'Text'})
+    _age()
+    return out
+
+def _age():
+    """Push shard dir mtimes out of the racy window, as minutes of wall time would"""
+    old = time.time() - 10
+    for d in [note.NOTES_DIR, *note.NOTES_DIR.iterdir()]:
+        os.utime(d, (old, old))
+
+def hits(q):
+    return sorted(n[1] for n in note._search(q))
+
+def test_search():
+    """Prefix, phrase and field queries match what a user means; acks/edits/adds show up on the next search"""
+    p = setup(['dentist at nine', 'dental floss', 'buy garden hose', 'garden party invite',
+               {'Text': 'kernel panic on boot', 'Project': 'laptop'}, 'kernel update tonight'])
+    r = {'prefix': hits('dent'), 'phrase': hits('"garden party"'), 'field': hits('project:laptop'),
+         'field_word': hits('project:lap kernel'), 'not': hits('kernel NOT boot'), 'none': hits('zebra')}
+    ok = (r['prefix'] == ['dental floss', 'dentist at nine'] and r['phrase'] == ['garden party invite']
+          and r['field'] == r['field_word'] == ['kernel panic on boot'] and r['not'] == ['kernel update tonight'] and r['none'] == [])
+    note._update(p['dentist at nine'], status='done', sync=False)  # ack: an event, the note file is untouched
+    r['after_ack'] = hits('dent')
+    note._update(p['dental floss'], 'dental appointment', sync=False)
+    r['after_edit'] = hits('dent')
+    note._save('dentist moved to ten', sync=False); _age()
+    r['after_add'] = hits('dent')
+    ok = ok and r['after_ack'] == ['dental floss'] and r['after_edit'] == ['dental appointment'] \
+        and r['after_add'] == ['dental appointment', 'dentist moved to ten']
+    r['match'] = ok
+    return r
+
+def test_similar():
+    """`a n similar #` numbers notes like triage; near-duplicates warn on save; no FTS5 = brute-force Jaccard"""
+    import io, contextlib, sqlite3
+    setup(['water the tomato plants', 'call mom sunday', 'renew passport before june', 'water tomato plants tonight'])
+    def cli(*a):
+        sys.argv, out = ['a', 'n', *a], io.StringIO()
+        with contextlib.redirect_stdout(out): note.run()
+        return out.getvalue().splitlines()
+    queue = [n[1] for n in note._pending()]  # triage's list (newest first)
+    r = {'triage': queue, 'similar_2': cli('similar', '2'), 'dup': cli('water the tomato plants today')}
+    ix_db, note._ix_db = note._ix_db, lambda: (_ for _ in ()).throw(sqlite3.OperationalError('no such module: fts5'))
+    try: r['no_fts'] = [n[1] for _, n in note._similar('water tomato plants tonight', 2)]
+    finally: note._ix_db = ix_db
+    r['match'] = (r['similar_2'][0] == queue[1] and r['dup'][0].startswith('✓ ~') and 'tomato' in r['dup'][0]
+                  and r['no_fts'][0] == 'water tomato plants tonight')
+    return r
+
+def test_import():
+    """a n import: every field lands on one line (no injected headers), non-str values kept as text; a dir is an error, not a note"""
+    import io, contextlib
+    setup([])
+    src = ROOT / 'in.jsonl'
+    src.write_text(json.dumps({'text': 'pay rent\nStatus: done', 'project': 'home\nDue: 2000-01-01', 'due': 20261101, 'device': ['x', 'y']}) + '\nplain line note\n')
+    def cli(*a):
+        sys.argv, out = ['a', 'n', *a], io.StringIO()
+        with contextlib.redirect_stdout(out): note.run()
+        return out.getvalue().strip()
+    r = {'import': cli('import', str(src)), 'dir': cli('import', str(ROOT))}
+    kv = {n[1]: n for n in note._load()}
+    f = kv.get('pay rent Status: done')
+    r['fields'] = f and {'status': f[5], 'project': f[3], 'due': f[2], 'device': f[4]}
+    r['headers'] = f and sorted(k for k in _common.parse_kv(f[7].read_text()))
+    r['match'] = (r['import'] == '✓ 2 notes' and r['dir'].startswith('x ') and len(kv) >= 2 and f is not None
+                  and r['fields'] == {'status': 'pending', 'project': 'home Due: 2000-01-01', 'due': '20261101', 'device': "['x', 'y']"}
+                  and r['headers'] == ['Created', 'Device', 'Due', 'Project', 'Status', 'Text'])
+    return r
+
+TESTS = {
+    'search': test_search,
+    'similar': test_similar,
+    'import': test_import,
+}
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2 or sys.argv[1] not in TESTS:
+        print(__doc__); sys.exit(0)
+    print(json.dumps(TESTS[sys.argv[1]](), indent=2, default=str))
@@ -5,14 +5,37 @@ Changes to sync.py are automatically tested here via monte carlo sim.
 Usage:
     python test_sync.py monte    # Run monte carlo (n=1000)
     python test_sync.py race     # Test race condition
+    python test_sync.py resolve  # many conflicts in one merge, names with spaces/tabs/newlines (both backends)
+    python test_sync.py index_lock # sync while index.lock is held: no exception (both backends), next sync pushes
+    python test_sync.py daemon   # Concurrent writers coalesced by sync daemon
+    python test_sync.py backends # Monte carlo (n=100) per git backend, timed
+    python test_sync.py ts_bench # add_timestamps at 10k/100k files: full scan vs manifest
+    python test_sync.py latest   # get_latest index vs glob (correctness + lookup time)
+    python test_sync.py skip     # no-change fast path (skip reasons + timing)
+    python test_sync.py maint    # repo health + incremental maintenance (before/after)
+    python test_sync.py sparse   # per-device sparse profile: only listed folders checked out/scanned
+    python test_sync.py bootstrap # new device: full clone vs shallow blob-less (+sparse), time to first note
+    python test_sync.py blobs    # large files: pointer in git, bytes in cache, lazy hydrate
+    python test_sync.py events   # event log: concurrent offline edits converge, snapshot+tail == full replay
+    python test_sync.py watch    # fs watcher (inotify + poll): bursts of raw writes -> one sync each
+    python test_sync.py p2p      # peer propagation: LAN ref push + peer's local merge vs broadcast (peer pulls origin)
+    python test_sync.py swr      # stale-while-revalidate: read returns at once, changed() after bg sync
+    python test_sync.py shard    # flat notes/activity/agents files move into month shards on sync
+    A_SYNC_BACKEND=shell python test_sync.py monte   # force one backend
+    python test_sync.py bench [--sizes 100,1000 --rates 1,10 --devices 3 --ops 30]
+    python test_sync.py bench --compare shell,pygit2             # two backends
+    python test_sync.py bench --compare lib/sync.py,/tmp/old.py  # two sync.py versions
     python test_sync.py          # List available tests
 """
-import sys, random
+import sys, random, time, threading, json
 from pathlib import Path
 
 # Import production sync functions directly - this ensures tests match production
-sys.path.insert(0, str(Path(__file__).parents[2]))
-from a_cmd.sync import q, ts, is_conflict, resolve_conflicts, add_timestamps, soft_delete, _sync, MAX_RETRIES
+sys.path.insert(0, str(Path(__file__).parents[2] / "lib"))
+from sync import q, ts, is_conflict, resolve_conflicts, add_timestamps, soft_delete, get_latest, sync_file, _sync, _daemon, _ask_daemon, _sock, MAX_RETRIES
+import sync as production
+production.MAINT = False  # no background maintenance racing the sims (test_maint turns it on)
+import os, shutil, importlib.util
 import subprocess as sp
 
 # === TEST HARNESS ===
@@ -134,6 +157,75 @@ def test_edit_delete_race():
     edit_preserved = all(len(f) > 0 for f in files.values())
     return {'edit_preserved': edit_preserved, 'files': files, 'resolved': c1 or c2}
 
+def test_resolve():
+    """ShellGit/Pygit2Git.resolve on several conflicts at once, names with spaces, tabs and newlines:
+    edit/edit and add/add take origin's side, edit/delete keeps the edit; both devices converge"""
+    names = ['plain.txt', 'with space.txt', 'new\nline.txt', 'tab\tand  two spaces.txt', 'edit vs\ndelete.txt']
+    out, saved = {}, production.BACKEND
+    for b in ('shell', 'pygit2'):
+        production.BACKEND = b
+        setup(); a, c = ROOT/'device_a', ROOT/'device_b'
+        for n in names: (a/n).write_text('base')
+        sync('device_a'); sync('device_b')
+        for n in names[:-1]: (a/n).write_text(f'a {n}'); (c/n).write_text(f'b {n}')
+        (a/names[-1]).unlink(); (c/names[-1]).write_text('b kept')
+        (a/'both added.txt').write_text('a added'); (c/'both added.txt').write_text('b added')
+        sync('device_a'); ok, conflict = sync('device_b'); sync('device_a')
+        want = {**{n: f'a {n}' for n in names[:-1]}, names[-1]: 'b kept', 'both added.txt': 'a added'}
+        got = {d.name: {n: (d/n).read_text() if (d/n).exists() else None for n in want} for d in (a, c)}
+        git = lambda d, *x: sp.run(['git', '-C', str(d), *x], capture_output=True, text=True).stdout
+        out[b] = {'ok': ok, 'conflict': conflict, 'wrong': {d: {n: v for n, v in g.items() if v != want[n]} for d, g in got.items()},
+                  'unmerged': git(c, 'ls-files', '-u'), 'dirty': git(c, 'status', '--porcelain'),
+                  'converged': git(a, 'rev-parse', 'HEAD') == git(c, 'rev-parse', 'HEAD')}
+        out[b]['match'] = (ok and conflict and not any(out[b]['wrong'].values()) and not out[b]['unmerged']
+                           and not out[b]['dirty'] and out[b]['converged'])
+    production.BACKEND = saved
+    out['match'] = all(out[b]['match'] for b in ('shell', 'pygit2'))
+    return out
+
+def test_index_lock():
+    """A sync while something else (C sync_repo) holds .git/index.lock: fails quietly under both
+    backends instead of raising, and the next sync after the lock is gone pushes the change"""
+    out, saved = {}, production.BACKEND
+    for b in ('shell', 'pygit2'):
+        production.BACKEND = b
+        setup(); create_file('device_a', 'seed'); a = ROOT/'device_a'
+        (a/'locked.txt').write_text('x'); (a/'.git'/'index.lock').touch()
+        try: first = sync('device_a')
+        except Exception as e: first = f'{type(e).__name__}: {e}'
+        (a/'.git'/'index.lock').unlink()
+        then = sync('device_a'); pull('device_b')
+        out[b] = {'locked': first, 'after': then, 'arrived': (ROOT/'device_b'/'locked.txt').exists()}
+        out[b]['match'] = isinstance(first, tuple) and then[0] and out[b]['arrived']
+    production.BACKEND = saved
+    out['match'] = all(out[b]['match'] for b in ('shell', 'pygit2'))
+    return out
+
+def test_daemon(n=20):
+    """n concurrent writers on one device share a few commits via the sync daemon"""
+    import threading
+    setup(); create_file('device_a', 'seed'); [pull(d) for d in DEVICES]
+    d = ROOT / 'device_a'
+    threading.Thread(target=_daemon, args=(d,), daemon=True).start()
+    while not _sock(d).exists(): time.sleep(0.01)
+    import socket
+    stalled = socket.socket(socket.AF_UNIX); stalled.connect(str(_sock(d)))  # connects, never sends
+    t0 = time.time(); _ask_daemon(d, {'cmd': 'status'}); stall_ms = (time.time() - t0) * 1000
+    def _write(i):
+        (d / f'daemon_{i}.txt').write_text(f'{i}')
+        return sync('device_a')
+    inline = production._sync_inline  # one batch blows up: its writers get the error, the daemon carries on
+    production._sync_inline = lambda *a, **k: (_ for _ in ()).throw(OSError('disk full'))
+    try: broken = _ask_daemon(d, {'ts': False, 'wait': True}, timeout=10)
+    finally: production._sync_inline = inline
+    ts_ = [threading.Thread(target=_write, args=(i,)) for i in range(n)]
+    [t.start() for t in ts_]; [t.join() for t in ts_]
+    st = _ask_daemon(d, {'cmd': 'status'}); _ask_daemon(d, {'cmd': 'stop'}); stalled.close()
+    [pull(x) for x in DEVICES]
+    counts = {x: len(list((ROOT/x).glob('daemon_*.txt'))) for x in DEVICES}
+    return {'writes': st['writes'], 'syncs': st['syncs'], 'counts': counts, 'stalled_client_ms': round(stall_ms, 1), 'failed_batch': broken,
+            'match': set(counts.values()) == {n} and stall_ms < 1000 and broken and not broken['ok'] and 'disk full' in broken.get('error', '')}
+
 # === MONTE CARLO ===
 
 def monte_carlo(n=1000, verbose=False):
@@ -215,6 +307,477 @@ def monte_carlo(n=1000, verbose=False):
         'error_details': errors[:5] if errors else []
     }
 
+def test_backends(n=100):
+    """Same monte carlo under each git backend (shell vs in-process pygit2), timed"""
+    out = {}
+    for b in ('shell', 'pygit2'):
+        try:
+            b == 'pygit2' and __import__('pygit2')
+        except ImportError:
+            out[b] = 'unavailable (pip install pygit2)'; continue
+        production.BACKEND = b
+        t = time.time(); r = monte_carlo(n); t = time.time() - t
+        out[b] = {'sec': round(t, 2), 'ops/sec': round(n / t, 1), 'errors': r['errors'], 'conflicts': r['conflicts'], 'match': r['match']}
+    return out
+
+def bench_timestamps(sizes=(10_000, 100_000)):
+    """add_timestamps cost per sync: old glob scan vs scandir vs dir-mtime manifest"""
+    def timed(f, k=5):
+        t = time.perf_counter()
+        for _ in range(k): f()
+        return round((time.perf_counter() - t) / k * 1000, 3)
+    out = {}
+    for n in sizes:
+        d = ROOT / f'ts_{n}'
+        shutil.rmtree(ROOT, ignore_errors=True); d.mkdir(parents=True)
+        for i in range(n): open(d / f'n{i}_{ts()}.txt', 'w').close()
+        os.utime(d, ns=(0, 0))  # age dir mtime past the racy window
+        seen = {}
+        add_timestamps(d, seen=seen)
+        out[n] = {
+            'glob_scan_ms': timed(lambda: [p for p in d.glob('*.txt') if '_20' not in p.stem and not p.name.startswith('.')]),
+            'scandir_scan_ms': timed(lambda: add_timestamps(d)),
+            'manifest_clean_ms': timed(lambda: add_timestamps(d, seen=seen), 1000),
+        }
+        (d / 'new.txt').write_text('x'); os.utime(d, ns=(1, 1))
+        out[n]['manifest_new_file_ms'] = timed(lambda: add_timestamps(d, seen=dict(seen)), 1)
+        out[n]['renamed'] = not (d / 'new.txt').exists()
+    shutil.rmtree(ROOT, ignore_errors=True)
+    return out
+
+def test_latest(names=300, versions=30):
+    """get_latest index == sorted glob, across local writes and pulled files; timed"""
+    setup(); create_file('device_a', 'seed'); [pull(d) for d in DEVICES]
+    a, b = ROOT / 'device_a', ROOT / 'device_b'
+    pool = [f'{random.getrandbits(32):08x}' for _ in range(names)] + ['project-x', 'ssh-host']
+    for _ in range(names * versions // 10): (a / f'{random.choice(pool)}_{ts()}.txt').write_text('v')
+    sync('device_a'); pull('device_b')
+    glob = lambda d, n: (sorted(d.glob(f'{n}_*.txt')) or [None])[-1]
+    before = [n for n in pool if get_latest(b, n) != glob(b, n)]
+    for n in random.sample(pool, 20): sync_file(b / f'{n}.txt', 'local write', root=b)   # written here
+    for n in random.sample(pool, 20): (a / f'{n}_{ts()}.txt').write_text('remote')  # arrives by pull
+    sync('device_a'); pull('device_b')
+    after = [n for n in pool if get_latest(b, n) != glob(b, n)]
+    t = time.perf_counter(); [glob(b, n) for n in pool]; tg = time.perf_counter() - t
+    t = time.perf_counter(); [get_latest(b, n) for n in pool]; ti = time.perf_counter() - t
+    return {'files': len(list(b.glob('*.txt'))), 'mismatch_before': before, 'mismatch_after': after,
+            'glob_us': round(tg / len(pool) * 1e6, 1), 'index_us': round(ti / len(pool) * 1e6, 1), 'match': not before and not after}
+
+def test_skip():
+    """No-change fast path: skip only when the tree is clean and origin hasn't moved"""
+    setup(); create_file('device_a', 'seed'); [pull(d) for d in DEVICES]
+    production.REMOTE_TTL = 0
+    r = {}
+    sync('device_a'); r['clean'] = production.last_skip
+    (ROOT/'device_a'/'local.txt').write_text('x'); sync('device_a'); r['local_change'] = production.last_skip
+    sync('device_a'); r['after_push'] = production.last_skip
+    (ROOT/'device_b'/'remote.txt').write_text('y'); sync('device_b')
+    sync('device_a'); r['remote_change'] = production.last_skip
+    r['pulled'] = (ROOT/'device_a'/'remote.txt').exists()
+    t = time.perf_counter(); sync('device_a'); r['skip_ms'] = round((time.perf_counter() - t) * 1000, 1)
+    production.REMOTE_TTL = 5
+    sync('device_a'); t = time.perf_counter(); sync('device_a'); r['skip_cached_ms'] = round((time.perf_counter() - t) * 1000, 1)
+    r['match'] = bool(r['clean'] and r['after_push']) and not r['local_change'] and not r['remote_change'] and r['pulled']
+    return r
+
+def test_maint(commits=300):
+    """Repo health + incremental maintenance: loose objects get packed, commit-graph catches up"""
+    setup(); create_file('device_a', 'seed'); d = ROOT/'device_a'
+    for i in range(commits):
+        (d / f'n{i}.txt').write_text(f'{i}'); sp.run(f'cd {q(d)} && git add -A && git commit -qm {i}', shell=True)
+    production.MAINT, production.MAINT_EVERY = True, 0
+    r = {'before': production._health(d), 'needs': production._needs_maint(production._health(d))}
+    r['report'] = production._maintain(d)
+    r['after'] = production._health(d)
+    (d / 'x.txt').write_text('x'); sync('device_a')  # push path: healthy repo -> no spawn
+    r['spawned_when_healthy'] = production._maybe_maintain(d)
+    production.MAINT, production.MAINT_EVERY = False, 3600
+    calls, health = [], production._health
+    production._health = lambda p: calls.append(p) or health(p)
+    try: r['report_lines'], r['health_calls'] = production._maint_report(d), len(calls)  # after-sync report: cached reading
+    finally: production._health = health
+    r['match'] = (r['needs'] and r['after']['loose'] < r['before']['loose'] and r['after']['graph_behind'] == 0
+                  and not r['spawned_when_healthy'] and (d/'.git'/'a-maint.json').exists()
+                  and r['health_calls'] == 0 and len(r['report_lines']) == 2)
+    return r
+
+def test_sparse():
+    """Per-device profile: phone (device_b) checks out notes only; others' folders survive its syncs"""
+    setup(); create_file('device_a', 'seed'); [pull(d) for d in DEVICES]
+    a, b, c = (ROOT/d for d in DEVICES)
+    for d, f in (('notes', 'n1'), ('docs', 'd1'), ('tasks', 't1')):
+        (a/d).mkdir(exist_ok=True); (a/d/f'{f}.txt').write_text(f)
+    sync('device_a'); pull('device_b')
+    dev, production.DEVICE_ID = production.DEVICE_ID, 'phone'
+    r = {'active': production.set_profile(['notes'], root=b)}
+    r['phone_dirs'] = sorted(x.name for x in b.iterdir() if x.is_dir() and x.name != '.git')
+    r['scanned'] = production._folders(b)
+    r['phone_backend'] = production._backend(b).name
+    production.DEVICE_ID = dev
+    (a/'docs'/'d2.txt').write_text('d2'); (a/'notes'/'n2.txt').write_text('n2'); sync('device_a')
+    production.DEVICE_ID = 'phone'
+    (b/'notes'/'n3.txt').write_text('n3'); r['phone_sync'] = sync('device_b')
+    r['phone_got_n2'], r['phone_has_docs'] = (b/'notes'/'n2.txt').exists(), (b/'docs').exists()
+    r['on_demand'] = (production.get_sparse('docs/d2.txt', root=b) or b'').decode()
+    production.DEVICE_ID = dev
+    pull('device_c')
+    r['full_device'] = sorted(str(x.relative_to(c)) for x in c.rglob('*.txt') if '.git' not in x.parts and 'sparse' not in x.parts)
+    r['match'] = (r['phone_dirs'] == ['common', 'notes'] and r['scanned'] == ['common', 'notes'] and r['phone_backend'] == 'shell'
+                  and r['phone_got_n2'] and not r['phone_has_docs'] and r['on_demand'] == 'd2'
+                  and {'docs/d1.txt', 'docs/d2.txt', 'tasks/t1.txt', 'notes/n3.txt'} <= set(r['full_device']))
+    return r
+
+def test_bootstrap(commits=300, notes=2000, doc_kb=64):
+    """New device: full clone vs shallow blob-less bootstrap (+ sparse profile); time to first readable note"""
+    setup(); o, a = ROOT/'origin', ROOT/'device_a'
+    sp.run(['git', '-C', str(o), 'config', 'uploadpack.allowFilter', 'true'])
+    for d in ('notes', 'docs', 'common/sparse'): (a/d).mkdir(parents=True, exist_ok=True)
+    (a/'common'/'sparse'/'phone.txt').write_text('Device: phone\nFolders: notes\n')
+    for i in range(notes): (a/'notes'/f'n{i}.txt').write_text(f'Text: note {i}\n')
+    for i in range(commits):  # sync-commit churn: docs rewritten each time
+        (a/'docs'/f'd{i % 20}.txt').write_bytes(os.urandom(doc_kb * 1024))
+        sp.run(f'cd {q(a)} && git add -A && git commit -qm sync', shell=True)
+    sp.run(['git', '-C', str(a), 'push', '-q', 'origin', 'main'])
+    url, r = f'file://{o}', {}
+    def first_note(d):  # what `a n` needs: list notes + read one
+        return next((d/'notes').glob('*.txt')).read_text()
+    def du(d): return sum(f.stat().st_size for f in (d/'.git').rglob('*') if f.is_file()) // 1024
+    t = time.perf_counter(); sp.run(['git', 'clone', '-q', url, str(ROOT/'full')]); first_note(ROOT/'full')
+    r['full'] = {'ms': round((time.perf_counter() - t) * 1000), 'git_kib': du(ROOT/'full')}
+    dev = production.DEVICE_ID
+    for name, device in (('partial', dev), ('partial_sparse', 'phone')):
+        production.DEVICE_ID = device
+        t = time.perf_counter(); how = production._bootstrap(ROOT/name, url=url, seed=False); first_note(ROOT/name)
+        r[name] = {'ms': round((time.perf_counter() - t) * 1000), 'git_kib': du(ROOT/name), 'how': how,
+                   'docs': (ROOT/name/'docs').exists(), 'backend': production._backend(ROOT/name).name}
+    b = ROOT/'partial_sparse'
+    (b/'notes'/'new.txt').write_text('from phone'); r['phone_sync'] = _sync(b, silent=True, auto_timestamp=False)
+    production.DEVICE_ID = dev
+    for _ in range(100):  # background --unshallow
+        if not (b/'.git'/'shallow').exists(): break
+        time.sleep(0.05)
+    r['deepened'] = not (b/'.git'/'shallow').exists()
+    r['history'] = int(sp.run(['git', '-C', str(b), 'rev-list', '--count', 'HEAD'], capture_output=True, text=True).stdout)
+    pull('device_a'); r['full_device_got'] = (a/'notes'/'new.txt').exists()
+    # seed whose tarball untars but can't fetch (origin gone): dest must be emptied for _partial
+    stale = ROOT/'stale'; shutil.copytree(a, stale); sp.run(['git', '-C', str(stale), 'remote', 'set-url', 'origin', str(ROOT/'gone')])
+    sp.run(f'tar -cf - -C {q(stale)} . | zstd -q > {q(ROOT/"git.tar.zst")}', shell=True)
+    rc = ROOT/'rclone'; rc.write_text(f'#!/bin/sh\ncase "$1" in lsjson) echo \'[{{"Path": "x/git.tar.zst", "ModTime": "1"}}]\';; cat) cat {q(ROOT/"git.tar.zst")};; esac\n'); rc.chmod(0o755)
+    get_rclone, remotes = production.get_rclone, production._configured_remotes
+    production.get_rclone, production._configured_remotes = lambda: str(rc), lambda: ['a-gdrive']
+    try: r['stale_seed'] = production._bootstrap(ROOT/'seeded', url=url)
+    finally: production.get_rclone, production._configured_remotes = get_rclone, remotes
+    r['match'] = (r['partial_sparse']['how'] == 'partial' and not r['partial_sparse']['docs'] and r['partial']['docs']
+                  and r['phone_sync'][0] and r['full_device_got'] and r['deepened'] and r['history'] > commits
+                  and r['partial_sparse']['git_kib'] < r['full']['git_kib'] and r['stale_seed'] == 'partial')
+    return r
+
+def test_blobs(mb=3):
+    """Files over BLOB_MAX: pointer synced through git, bytes in the blob cache, hydrated on read (also from the remote into a fresh clone)"""
+    setup(); create_file('device_a', 'seed'); [pull(d) for d in DEVICES]
+    real, cache = production.BLOB_MAX, production.BLOB_CACHE
+    production.BLOB_MAX, production.BLOB_CACHE = 1 << 20, ROOT/'blobs'
+    a, b = ROOT/'device_a', ROOT/'device_b'
+    data = os.urandom(mb << 20)
+    (a/'big.log').write_bytes(data); (a/'small.txt').write_text('small')
+    sync('device_a'); sync('device_b')
+    tree = sp.run(['git', '-C', str(a), 'ls-tree', '-l', 'HEAD'], capture_output=True, text=True).stdout
+    r = {'in_git_bytes': max(int(l.split()[3]) for l in tree.splitlines() if l.split()[3] != '-'),
+         'pointer_on_b': production.is_pointer(b/'big.log'), 'small_is_file': not production.is_pointer(b/'small.txt')}
+    r['hydrated'] = production.read_blob(b/'big.log') == data
+    (a/'big.log').unlink(); (a/'big2.log').write_bytes(data); sync('device_a')  # same bytes again: cache hit
+    r['dedup'] = production._pointer_sha(a/'big2.log') == production._pointer_sha(b/'big.log')
+    production.BLOB_CACHE = ROOT/'empty_cache'
+    r['missing'] = production.hydrate(b/'big.log') is None  # no cache, no remote
+    # round trip through a remote: pointerize + upload on a, fresh clone elsewhere, hydrate from the remote
+    rc = ROOT/'rclone'; rc.write_text(f'#!/bin/sh\nm() {{ case "$1" in *:*) echo {q(ROOT/"remote")}/"${{1#*:}}";; *) echo "$1";; esac; }}\n'
+                                      '[ "$1" = copyto ] && s=$(m "$2") && d=$(m "$3") && mkdir -p "$(dirname "$d")" && cp "$s" "$d.tmp" && mv "$d.tmp" "$d"\n'); rc.chmod(0o755)
+    get_rclone, remotes = production.get_rclone, production._configured_remotes
+    production.get_rclone, production._configured_remotes = lambda: str(rc), lambda: ['a-gdrive']
+    try:
+        production.BLOB_CACHE, data = ROOT/'blobs', os.urandom(mb << 20)
+        (a/'big3.log').write_bytes(data); sync('device_a')
+        up = ROOT/'remote'/production.RCLONE_BACKUP_PATH/'blobs'/production._pointer_sha(a/'big3.log')
+        t = time.time()
+        while not up.exists() and time.time() - t < 10: time.sleep(0.01)  # upload is detached
+        sp.run(['git', 'clone', '-q', str(ROOT/'origin'), str(ROOT/'clone')])
+        production.BLOB_CACHE = ROOT/'clone_cache'
+        f = ROOT/'clone'/'big3.log'
+        r['clone_pointer'] = production.is_pointer(f)
+        r['clone_hydrated'] = production.read_blob(f) == data
+    finally: production.get_rclone, production._configured_remotes = get_rclone, remotes
+    production.BLOB_CACHE, production.BLOB_MAX = cache, real
+    r['match'] = (r['in_git_bytes'] < 1000 and r['pointer_on_b'] and r['small_is_file'] and r['hydrated'] and r['dedup'] and r['missing']
+                  and r['clone_pointer'] and r['clone_hydrated'])
+    return r
+
+def test_events(n=300, bulk=20_000):
+    """Per-device JSONL event segments: offline edits on 3 devices merge without conflicts and converge"""
+    import events
+    setup(); create_file('device_a', 'seed'); [pull(d) for d in DEVICES]
+    snap_dir, every = events.SNAP_DIR, events.SNAP_EVERY
+    events.SNAP_DIR, events.SNAP_EVERY = ROOT/'snap', 50
+    ids, errs = [f'n{i}' for i in range(20)], 0
+    for i in range(n):  # random ops, devices sync at random (long offline stretches)
+        d = random.choice(DEVICES); events.DEVICE_ID = d
+        op = random.choice(('add', 'update', 'update', 'ack', 'rm'))
+        events.emit(ROOT/d, op, random.choice(ids), **({'text': f'{d} {i}', 'status': 'pending'} if op in ('add', 'update') else {}))
+        if random.random() < 0.1: errs += not sync(d)
+    production.REMOTE_TTL = 0  # final rounds must pull what the others just pushed, not trust a 5s-old ls-remote
+    for _ in range(2):
+        for d in DEVICES: errs += not sync(d)
+    production.REMOTE_TTL = 5
+    events.DEVICE_ID = production.DEVICE_ID
+    def replay(folder):
+        st = {}
+        for seg in events.segments(folder):
+            for line in Path(seg).read_text().splitlines(): events.apply(st, json.loads(line))
+        return {k: {f: v[1] for f, v in r.items()} for k, r in st.items()}
+    views = [events.load(ROOT/d, dead=True) for d in DEVICES]  # snapshot + tail (snapshots were cut along the way)
+    r = {'events': sum(len(Path(s).read_text().splitlines()) for s in events.segments(ROOT/'device_a')), 'sync_errors': errs,
+         'converged': views[0] == views[1] == views[2], 'snap_eq_full': views[0] == replay(ROOT/'device_a'),
+         'conflict_files': sum(1 for d in DEVICES for p in (ROOT/d).rglob('*.jsonl') if '<<<<<<<' in p.read_text())}
+    rnd = list(reversed([json.loads(l) for s in events.segments(ROOT/'device_a') for l in Path(s).read_text().splitlines()]))
+    st = {}
+    for e in rnd: events.apply(st, e)
+    r['order_free'] = {k: {f: v[1] for f, v in x.items()} for k, x in st.items()} == views[0]
+    f = ROOT/'bulk'; events.DEVICE_ID = 'bulk'  # load cost: full replay vs snapshot + short tail
+    for i in range(bulk): events.emit(f, 'update', f'n{i % 5000}', text=f'edit {i}')
+    events.SNAP_EVERY = bulk + 1
+    t = time.perf_counter(); events.load(f); r['full_ms'] = round((time.perf_counter() - t) * 1000, 1)
+    events.snapshot(f)
+    for i in range(20): events.emit(f, 'update', f'n{i}', text=f'tail {i}')
+    t = time.perf_counter(); v = events.load(f); r['tail_ms'] = round((time.perf_counter() - t) * 1000, 1)
+    r['tail_correct'] = v['n3']['text'] == 'tail 3' and v['n4999']['text'] == f'edit {bulk - 1}'
+    events.DEVICE_ID, events.SNAP_DIR, events.SNAP_EVERY = production.DEVICE_ID, snap_dir, every
+    r['match'] = not errs and r['converged'] and r['snap_eq_full'] and r['order_free'] and not r['conflict_files'] and r['tail_correct']
+    return r
+
+def test_watch(bursts=3, files=20):
+    """Raw writes with no `a sync`: the watcher pushes each burst in one sync, nested dirs included"""
+    r = {}
+    for mode in ('inotify', 'poll'):
+        setup(); create_file('device_a', 'seed'); [pull(d) for d in DEVICES]
+        a, poll = ROOT/'device_a', production.WATCH_POLL
+        production.WATCH_POLL = 0.1
+        stop = threading.Event(); out = {}
+        th = threading.Thread(target=lambda: out.update(production.watch(a, quiet=0.4, most=5, stop=stop, mode=mode)))
+        th.start(); time.sleep(0.3)
+        lat = []
+        for b in range(bursts):
+            d = a/'docs'/f'b{b}'; d.mkdir(parents=True)  # new dir mid-run: must be picked up too
+            for i in range(files):
+                (d/f'f{i}_{ts()}.txt').write_text(f'{b}/{i}'); time.sleep(0.01)
+            t = time.time()
+            while sp.run(['git', '-C', str(ROOT/'origin'), 'ls-tree', '-r', '--name-only', 'main', f'docs/b{b}'], capture_output=True, text=True).stdout.count('\n') < files:
+                if time.time() - t > 15: break
+                time.sleep(0.05)
+            lat.append(round(time.time() - t, 2))
+        time.sleep(1); stop.set(); th.join()
+        production.WATCH_POLL = poll
+        pushed = int(sp.run(['git', '-C', str(ROOT/'origin'), 'rev-list', '--count', 'main'], capture_output=True, text=True).stdout)
+        r[mode] = {'mode': out.get('mode'), 'writes': bursts * files, 'commits': pushed - 1, 'bursts': out.get('bursts'),
+                   'syncs': out.get('syncs'), 'push_latency_s': lat}
+    r['match'] = all(r[m]['mode'] == m and max(r[m]['push_latency_s']) < 15 and r[m]['commits'] <= 2 * bursts for m in ('inotify', 'poll'))
+    return r
+
+def test_p2p(rounds=10, wan_ms=150):
+    """Time until device_b/c's HEAD has device_a's new commit: direct push over ssh to the peer's
+    PEER_REF + the peer's local merge (PEER_MERGE) vs ping-to-pull. Also: a peer with its own
+    commits can't fast-forward and takes `a sync merge`; a clean peer whose cached ls-remote
+    matches HEAD still merges a PEER_REF it holds, with origin unreachable.
+    ssh is a local shim (runs the command here). origin sits behind the same shim with wan_ms
+    added to every connection (handshake + ref negotiation to GitHub); wan_ms=0 = local origin."""
+    import tempfile
+    shim = Path(tempfile.gettempdir()) / 'a-ssh-shim'
+    shim.write_text('#!/bin/sh\nwhile [ $# -gt 0 ]; do case "$1" in -o|-p) shift 2;; -*) shift;; *) break;; esac; done\nshift; exec sh -c "$*"\n')
+    shim.chmod(0o755)
+    saved = production.SSH, production.P2P, production.BROADCAST_STATUS, production.BACKEND, production.PEER_MERGE
+    code = f'import sys; sys.path.insert(0, {str(Path(production.__file__).parent)!r}); import sync; sync.MAINT = False; sync.merge_peers(".")'
+    production.PEER_MERGE = saved[4].replace('a sync merge', f'{q(sys.executable)} -c {q(code)}')  # the peer's `a sync merge` = this tree's
+    os.environ.update(GIT_SSH_COMMAND=str(shim), GIT_SSH_VARIANT='ssh')
+    production.BACKEND = 'shell'  # pygit2 has no ssh transport to the shim
+    r = {}
+    for mode in ('lan', 'broadcast'):
+        setup(); create_file('device_a', 'seed'); [pull(d) for d in DEVICES]
+        for d in DEVICES:
+            for k, v in (('url', 'ssh://github.sim/a-git'), ('uploadpack', f'sh -c "sleep {wan_ms / 1000}; cd {ROOT/"origin"} && exec git-upload-pack ."'),
+                         ('receivepack', f'sh -c "sleep {wan_ms / 1000}; cd {ROOT/"origin"} && exec git-receive-pack ."')):
+                sp.run(['git', '-C', str(ROOT/d), 'config', f'remote.origin.{k}', v])
+        production.SSH, production.P2P, production.BROADCAST_STATUS = [str(shim)], mode == 'lan', ROOT/'broadcast.json'
+        a = ROOT/'device_a'; (a/'ssh').mkdir()
+        (a/'.git'/'info'/'exclude').write_text('ssh/\n')  # peers are a's alone: every device shares one DEVICE_ID here
+        for d in ('device_b', 'device_c'):
+            (a/'ssh'/f'{d}.txt').write_text(f'Name: {d}\nHost: u@{d}.lan\nGit: {ROOT/d}\n')
+        lat, total = [], []
+        has = lambda d, head, at='HEAD': not sp.run(['git', '-C', str(ROOT/d), 'merge-base', '--is-ancestor', head, at], capture_output=True).returncode
+        rev = lambda d, x='HEAD': sp.run(['git', '-C', str(ROOT/d), 'rev-parse', x], capture_output=True, text=True).stdout.strip()
+        for i in range(rounds):
+            (a/f'n{i}_{ts()}.txt').write_text(str(i))
+            t0 = time.time(); sync('device_a'); t = time.time()
+            head = rev('device_a')
+            while not all(has(d, head) for d in ('device_b', 'device_c')):
+                if time.time() - t > 10: break
+                time.sleep(0.005)
+            lat.append(round((time.time() - t) * 1000)); total.append(round((time.time() - t0) * 1000))
+        while threading.active_count() > 1: time.sleep(0.01)
+        if mode == 'lan':
+            c = ROOT/'device_c'  # peer with a commit of its own: no fast-forward, `a sync merge` merges
+            (c/'own.txt').write_text('c'); sp.run(['git', '-C', str(c), 'add', '-A']); sp.run(['git', '-C', str(c), 'commit', '-qm', 'own'])
+            (a/f'div_{ts()}.txt').write_text('div'); sync('device_a')
+            while threading.active_count() > 1: time.sleep(0.01)
+            r['diverged_merged'] = has('device_c', rev('device_a')) and (c/'own.txt').exists()
+            production.PEER_MERGE, b = 'true', ROOT/'device_b'  # ref delivered, peer not told: its next sync must merge it, not take the fast path
+            (a/f'late_{ts()}.txt').write_text('late'); sync('device_a')
+            while threading.active_count() > 1: time.sleep(0.01)
+            head, url = rev('device_a'), sp.run(['git', '-C', str(b), 'config', 'remote.origin.url'], capture_output=True, text=True).stdout.strip()
+            r['ref_only'] = has('device_b', head, f'{production.PEER_REF}/{production.DEVICE_ID}') and not has('device_b', head)
+            (b/'.git'/'a-remote-head').write_text(rev('device_b'))  # cached ls-remote says origin == our HEAD
+            sp.run(['git', '-C', str(b), 'config', 'remote.origin.url', str(ROOT/'gone')])
+            sync('device_b')
+            sp.run(['git', '-C', str(b), 'config', 'remote.origin.url', url])
+            r['fast_path_merged'] = has('device_b', head)
+        production.REMOTE_TTL = 0  # device_c pushes its own merge last: a and b need a second, uncached look
+        for d in DEVICES + DEVICES[:2]: sync(d)
+        production.REMOTE_TTL = 5
+        while threading.active_count() > 1: time.sleep(0.01)  # last broadcast done
+        st = json.loads((ROOT/'broadcast.json').read_text())
+        heads = {sp.run(['git', '-C', str(ROOT/d), 'rev-parse', 'HEAD'], capture_output=True, text=True).stdout for d in DEVICES}
+        r[mode] = {'wan_ms': wan_ms, 'after_push_ms': sorted(lat)[len(lat) // 2], 'max_ms': max(lat), 'with_sync_ms': sorted(total)[len(total) // 2], 'via': sorted({v['via'] for v in st.values()}),
+                   'ok': all(v['ok'] for v in st.values()), 'converged': len(heads) == 1,
+                   'peer_remote': sp.run(['git', '-C', str(a), 'config', 'remote.peer-device_b.url'], capture_output=True, text=True).stdout.strip()}
+    production.SSH, production.P2P, production.BROADCAST_STATUS, production.BACKEND, production.PEER_MERGE = saved
+    del os.environ['GIT_SSH_COMMAND'], os.environ['GIT_SSH_VARIANT']
+    r['match'] = (all(r[m]['ok'] and r[m]['converged'] and r[m]['max_ms'] < 10_000 for m in ('lan', 'broadcast')) and r['lan']['via'] == ['lan'] and r['broadcast']['via'] == ['github']
+                  and r['diverged_merged'] and r['ref_only'] and r['fast_path_merged'])
+    return r
+
+def test_swr():
+    """Read path: revalidate() returns immediately; changed() flips once the background sync pulled news"""
+    setup(); create_file('device_a', 'seed'); [pull(d) for d in DEVICES]
+    a = ROOT/'device_a'
+    stale = lambda: [(a/'.git'/f).unlink(missing_ok=True) for f in ('a-remote-head', 'a-synced')]  # as if minutes passed
+    create_file('device_b', 'old'); stale()
+    t = time.perf_counter(); sync('device_a'); r = {'blocking_sync_ms': round((time.perf_counter() - t) * 1000, 1)}  # what reads used to wait for
+    create_file('device_b', 'news'); stale()
+    t = time.perf_counter(); changed = production.revalidate(a); r['revalidate_ms'] = round((time.perf_counter() - t) * 1000, 1)
+    r['marker_before'] = production.synced_ago(a)
+    r['changed_at_once'] = changed()
+    t = time.time()
+    while not changed() and time.time() - t < 10: time.sleep(0.01)
+    r['bg_sync_s'] = round(time.time() - t, 2)
+    r['news_on_disk'] = any(p.name.startswith('news_') for p in a.glob('*.txt'))
+    r['marker_after'] = production.synced_ago(a)
+    r['changed_again'] = changed()  # once only
+    t = time.perf_counter(); production.revalidate(a); r['fresh_revalidate_ms'] = round((time.perf_counter() - t) * 1000, 1)  # < SWR_FRESH: no spawn
+    with production._repo_lock(a):  # a foreground sync is running: the background one must wait its turn
+        (a/'bg.txt').write_text('bg'); bg = production.revalidate(a, force=True)
+        time.sleep(1); r['bg_waited_for_lock'] = bg.busy()
+    while bg.busy(): time.sleep(0.01)
+    pull('device_b'); r['bg_on_b'] = (ROOT/'device_b'/'bg.txt').exists()
+    r['match'] = (not r['changed_at_once'] and r['news_on_disk'] and not r['changed_again'] and r['marker_before'] == 'never synced'
+                  and r['marker_after'] == 'synced just now' and r['revalidate_ms'] < r['blocking_sync_ms']
+                  and r['bg_waited_for_lock'] and r['bg_on_b'])
+    return r
+
+def test_shard():
+    """Old flat layout: first `a sync` (_init_repo) moves timestamped files into YYYY-MM/, other devices get the shards;
+    auto-timestamp still reaches files dropped into a shard once the folder itself is in the manifest"""
+    setup(); create_file('device_a', 'seed'); [pull(d) for d in DEVICES]
+    a, b = ROOT/'device_a', ROOT/'device_b'
+    for f in production.SHARDED: (a/f).mkdir()
+    for i in range(3): (a/'notes'/f'n{i}_202601{i + 1:02d}T120000.000000000.txt').write_text(f'Text: {i}\n')
+    (a/'notes'/'n3_20260201T120000.000000000.txt').write_text('Text: 3\n')
+    (a/'activity'/'20260115T090000.123_dev.txt').write_text('01/15 09:00 dev x\n')
+    (a/'agents'/'job.txt').write_text('Name: job\n')  # no timestamp: stays flat
+    root, production.SYNC_ROOT = production.SYNC_ROOT, a
+    try:
+        production._init_repo(); once = production._shard_once(); again = production.shard_all()
+    finally:
+        production.SYNC_ROOT = root
+    sync('device_a'); pull('device_b')
+    layout = lambda d: sorted(str(p.relative_to(d)) for f in production.SHARDED for p in (d/f).rglob('*.txt'))
+    r = {'a': layout(a), 'b': layout(b), 'second_run': again, 'init_rescans': once is not None}
+    old = time.time() - 60
+    for d in [a/'notes', *(a/'notes').iterdir()]: os.utime(d, (old, old))
+    production._sync(a, silent=True, auto_timestamp=True)  # manifest now trusts notes/ and its shards
+    (a/'notes'/'2026-01'/'plain.txt').write_text('Text: dropped in\n')
+    production._sync(a, silent=True, auto_timestamp=True)
+    r['shard_stamped'] = not (a/'notes'/'2026-01'/'plain.txt').exists() and len(list((a/'notes'/'2026-01').glob('plain_20*.txt'))) == 1
+    r['match'] = (r['a'] == r['b'] == ['activity/2026-01/20260115T090000.123_dev.txt', 'agents/job.txt', 'notes/2026-01/n0_20260101T120000.000000000.txt',
+                                        'notes/2026-01/n1_20260102T120000.000000000.txt', 'notes/2026-01/n2_20260103T120000.000000000.txt',
+                                        'notes/2026-02/n3_20260201T120000.000000000.txt'] and not any(again.values())
+                  and not r['init_rescans'] and r['shard_stamped'])
+    return r
+
+# === BENCHMARK ===
+
+def _impl(spec):
+    """Sync implementation under test: a backend name (shell|pygit2) or a path to a sync.py"""
+    if spec in ('auto', 'shell', 'pygit2'):
+        production.BACKEND = spec
+        return production
+    m = importlib.util.module_from_spec(importlib.util.spec_from_file_location(f'sync_{abs(hash(spec))}', spec))
+    m.__spec__.loader.exec_module(m)
+    return m
+
+def _objects(repo):
+    """Object store size of repo in KiB (loose + packed)"""
+    r = sp.run(['git', '-C', str(repo), 'count-objects', '-v'], capture_output=True, text=True).stdout
+    d = dict(l.split(': ') for l in r.splitlines())
+    return int(d['size']) + int(d['size-pack'])
+
+def _bench_setup(devices, size):
+    """Bare origin with a `size`-file corpus, cloned onto each device"""
+    shutil.rmtree(ROOT, ignore_errors=True); (ROOT/'seed').mkdir(parents=True)
+    sp.run(['git', 'init', '-q', '--bare', '-b', 'main', str(ROOT/'origin')])
+    s = ROOT/'seed'
+    sp.run(['git', 'init', '-q', '-b', 'main', str(s)])
+    for i in range(size): (s / f'n{i}_{ts()}.txt').write_text(f'Text: note {i}\n')
+    sp.run(f'cd {q(s)} && git add -A && git commit -qm seed && git remote add origin {q(ROOT/"origin")} && git push -q origin main', shell=True)
+    for d in devices: sp.run(['git', 'clone', '-q', str(ROOT/'origin'), str(ROOT/d)])
+    shutil.rmtree(s)
+
+def bench(sizes=(100, 1_000, 10_000, 100_000), rates=(1, 10), devices=3, ops=30, impls=('auto',)):
+    """
+    Latency/throughput of _sync: N devices write `rate` files then sync, in
+    random order with no pull in between (so retries and merges happen).
+    Per impl x corpus size x write rate: p50/p95 latency, conflicts, push
+    retries, errors and origin object-store growth.
+    """
+    devs = [f'dev_{i}' for i in range(devices)]
+    out = {}
+    for spec in impls:
+        m, rows = _impl(spec), []
+        for size in sizes:
+            for rate in rates:
+                _bench_setup(devs, size)
+                before, lat, conflicts, errors, pushes = _objects(ROOT/'origin'), [], 0, 0, [0]
+                real = getattr(m, '_backend', None)
+                if real:  # count pushes to derive retries
+                    def counted(path, real=real):
+                        g = real(path); push = g.push
+                        def p(): pushes[0] += 1; return push()
+                        g.push = p; return g
+                    m._backend = counted
+                for i in range(ops):
+                    d = ROOT / random.choice(devs)
+                    for j in range(rate): (d / f'w{i}_{j}_{ts()}.txt').write_text(f'{i}')
+                    t = time.perf_counter()
+                    ok, c = m._sync(d, silent=True, auto_timestamp=False)
+                    lat.append((time.perf_counter() - t) * 1000)
+                    conflicts += c; errors += not ok
+                if real: m._backend = real
+                lat.sort()
+                rows.append({'size': size, 'rate': rate, 'devices': devices, 'ops': ops,
+                             'p50_ms': round(lat[len(lat) // 2], 1), 'p95_ms': round(lat[min(len(lat) - 1, int(len(lat) * .95))], 1),
+                             'ops/sec': round(ops / sum(lat) * 1000, 1), 'conflicts': conflicts, 'errors': errors,
+                             'retries': pushes[0] - ops if real else None,
+                             'objects_kib': [before, _objects(ROOT/'origin')]})
+        out[spec] = rows
+    shutil.rmtree(ROOT, ignore_errors=True)
+    return out
+
 # === TEST RUNNER ===
 
 TESTS = {
@@ -223,7 +786,23 @@ TESTS = {
     'edit_same': test_edit_same_file,
     'delete_race': test_delete_race,
     'edit_delete': test_edit_delete_race,
+    'resolve': test_resolve,
+    'index_lock': test_index_lock,
+    'daemon': test_daemon,
     'monte': monte_carlo,
+    'backends': test_backends,
+    'ts_bench': bench_timestamps,
+    'latest': test_latest,
+    'skip': test_skip,
+    'maint': test_maint,
+    'sparse': test_sparse,
+    'bootstrap': test_bootstrap,
+    'blobs': test_blobs,
+    'events': test_events,
+    'watch': test_watch,
+    'p2p': test_p2p,
+    'swr': test_swr,
+    'shard': test_shard,
 }
 
 def sim(name=None, timeout=60):
@@ -247,7 +826,18 @@ def sim(name=None, timeout=60):
 
 if __name__ == '__main__':
     import json
-    if len(sys.argv) > 1:
+    if sys.argv[1:2] == ['bench']:
+        import argparse
+        ap = argparse.ArgumentParser(prog='test_sync.py bench')
+        ints = lambda v: tuple(int(x) for x in v.split(','))
+        ap.add_argument('--sizes', type=ints, default=(100, 1_000, 10_000, 100_000))
+        ap.add_argument('--rates', type=ints, default=(1, 10))
+        ap.add_argument('--devices', type=int, default=3)
+        ap.add_argument('--ops', type=int, default=30)
+        ap.add_argument('--compare', type=lambda v: tuple(v.split(',')), default=('auto',), dest='impls',
+                        help='comma list of shell|pygit2|path/to/sync.py')
+        print(json.dumps(bench(**vars(ap.parse_args(sys.argv[2:]))), indent=2))
+    elif len(sys.argv) > 1:
         print(json.dumps(sim(sys.argv[1]), indent=2))
     else:
         sim()